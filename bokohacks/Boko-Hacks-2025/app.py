@@ -1,74 +1,165 @@
 from flask import Flask
 from extensions import db
-from routes.home import home_bp
-from routes.hub import hub_bp
-from routes.login import login_bp
-from routes.register import register_bp
-from routes.about import about_bp
-from routes.apps import apps_bp
-from routes.notes import notes_bp
-from routes.admin import admin_bp, init_admin_db
-from routes.files import files_bp
-from routes.captcha import captcha_bp
-from routes.retirement import retirement_bp
-from routes.news import news_bp  # Import the new news blueprint
-from models.user import User
-from models.note import Note
-from models.admin import Admin
-from models.file import File  
-from sqlalchemy import inspect
 import os
 
-app = Flask(__name__)
-app.secret_key = "supersecretkey"
+UPLOAD_FOLDER = 'uploads'
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
 
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///boko_hacks.db"
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app(config=None):
+    """Application factory; heavy dependencies are imported on first use, not here"""
+    app = Flask(__name__)
+    app.secret_key = "supersecretkey"
 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-
-db.init_app(app)
-
-# Register Blueprints
-app.register_blueprint(home_bp)
-app.register_blueprint(hub_bp)
-app.register_blueprint(login_bp)
-app.register_blueprint(register_bp)
-app.register_blueprint(about_bp)
-app.register_blueprint(apps_bp)
-app.register_blueprint(notes_bp)
-app.register_blueprint(admin_bp)
-app.register_blueprint(files_bp)
-app.register_blueprint(captcha_bp)
-app.register_blueprint(news_bp)
-app.register_blueprint(retirement_bp)  
-
-def setup_database():
-    """Setup database and print debug info"""
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///boko_hacks.db")
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Any config key can be set from the environment as FLASK_<KEY> (values parsed as JSON)
+    app.config.from_prefixed_env()
+    if config:
+        app.config.update(config)
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    from utils.intrusion import init_scorer
+    from utils.login_stats import init_login_stats
+    from utils.logging_setup import init_logging
+    from utils.metrics import init_metrics
+    from utils.profiler import init_profiler
+    from utils.rate_limit import init_rate_limit
+    from utils.projection import init_projection
+    from utils.retention import init_retention
+    from utils.sessions import init_sessions
+    from utils.summary import init_summary
+    from utils.events import init_events
+    from utils.sync import init_sync
+    from utils.template_cache import init_template_cache
+    from utils.audit import init_audit
+    from utils.captcha.challenge import init_captcha
+    from utils.compression import init_compression
+    from utils.http_cache import init_http_cache
+
+    # JSON logs written by a background listener so request threads never block on disk
+    init_logging(app)
+
+    db.init_app(app)
+
+    # Session data lives server-side; the cookie only carries a random session id
+    init_sessions(app)
+
+    # Admin dashboard push events, shared between workers through a local bus
+    init_events(app)
+
+    # Admin actions go to admin_audit_log through a buffered, batched writer
+    init_audit(app)
+
+    # Schema changes are applied with `flask db upgrade`; alembic is only imported for the CLI
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        init_migrations(app)
+
+    # Request latency, SQL count and payload size histograms, exported on /metrics
+    init_metrics(app)
+
+    # Jinja bytecode cache and a rendered-page cache for templates that never look at the user
+    init_template_cache(app)
+
+    # gzip/brotli for large responses; registered first so its hook runs after the ETag/304 one
+    init_compression(app)
+
+    # Weak ETags/304s for pages and fingerprinted, immutable static assets
+    init_http_cache(app)
+
+    # Opt-in, admin-only sampling profiler (see /admin/profile and the X-Profile header)
+    init_profiler(app)
+
+    # Per-user/per-IP login counters feed both rate limiting and intrusion scoring
+    init_login_stats(app)
+
+    # GCRA attempt limits for login, registration and admin login, checked before any hashing
+    init_rate_limit(app)
+
+    # Signed, single-use captcha challenges checked without a network call
+    init_captcha(app)
+
+    # Intrusion scoring for logins; the model is loaded lazily on first use
+    init_scorer(app)
+
+    # Revisions and tombstones behind the notes/files change feeds
+    init_sync(app)
+
+    # Hub totals, adjusted by every notes and files write
+    init_summary(app)
+
+    # Batched notes retention, run with `flask notes-retention`
+    init_retention(app)
+
+    # Cached Monte Carlo projections for the 401k app
+    init_projection(app)
+
+    register_blueprints(app)
+    return app
+
+def register_blueprints(app):
+    """Import and register every blueprint (and with them the models)"""
+    from routes.home import home_bp
+    from routes.hub import hub_bp
+    from routes.login import login_bp
+    from routes.register import register_bp
+    from routes.about import about_bp
+    from routes.apps import apps_bp
+    from routes.notes import notes_bp
+    from routes.admin import admin_bp
+    from routes.files import files_bp
+    from routes.captcha import captcha_bp
+    from routes.retirement import retirement_bp
+    from routes.news import news_bp
+    from routes.metrics import metrics_bp
+
+    app.register_blueprint(home_bp)
+    app.register_blueprint(hub_bp)
+    app.register_blueprint(login_bp)
+    app.register_blueprint(register_bp)
+    app.register_blueprint(about_bp)
+    app.register_blueprint(apps_bp)
+    app.register_blueprint(notes_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(files_bp)
+    app.register_blueprint(captcha_bp)
+    app.register_blueprint(news_bp)
+    app.register_blueprint(retirement_bp)
+    app.register_blueprint(metrics_bp)
+
+def warm(app):
+    """Compile every template and load the intrusion model, e.g. before a server forks workers"""
+    for name in app.jinja_env.list_templates():
+        if name.endswith('.html'):
+            app.jinja_env.get_template(name)
+
+    scorer = app.extensions.get('intrusion_scorer')
+    if scorer is not None:
+        # Loads the booster only; predicting here would start OpenMP threads that do not survive fork()
+        scorer.warm()
+
+def init_migrations(app):
+    """Attach Flask-Migrate so the `flask db` commands are available"""
+    from flask_migrate import Migrate
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+
+def setup_database(app):
+    """Bring the schema up to date and make sure the default admin exists"""
+    from flask_migrate import stamp, upgrade
+    from sqlalchemy import inspect
+    from routes.admin import init_admin_db
+
+    init_migrations(app)
     with app.app_context():
-        inspector = inspect(db.engine)
-        existing_tables = inspector.get_table_names()
-        
-        if not existing_tables:
-            print("No existing tables found. Creating new tables...")
-            db.create_all()
-            
-            init_admin_db()
-        else:
-            print("Existing tables found:", existing_tables)
-            
-            db.create_all()
-            print("Updated schema with any new tables")
-        
-        for table in ['users', 'notes', 'admin_credentials', 'files']:
-            if table in inspector.get_table_names():
-                print(f"\n{table.capitalize()} table columns:")
-                for column in inspector.get_columns(table):
-                    print(f"- {column['name']}: {column['type']}")
-            else:
-                print(f"\n{table} table does not exist!")
+        tables = inspect(db.engine).get_table_names()
+        if tables and "alembic_version" not in tables:
+            # Databases created by the old create_all() boot path already match the baseline
+            app.logger.info("Existing database without migration history; stamping baseline")
+            stamp(revision="baseline")
+        upgrade()
+        init_admin_db()
 
 if __name__ == "__main__":
-    setup_database()  
-    app.run(debug=True)
\ No newline at end of file
+    app = create_app()
+    setup_database(app)
+    app.run(debug=True)
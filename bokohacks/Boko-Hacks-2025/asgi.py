@@ -0,0 +1,212 @@
+"""ASGI entry point.
+
+    uvicorn asgi:app --port 8000
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+News fetches and file downloads spend nearly all their time waiting on the
+network or the disk, so they are served natively on the event loop: one
+worker can keep many slow upstream calls and downloads in flight at once.
+The admin dashboard's event stream is native too, so an open dashboard
+costs a coroutine rather than a thread.
+Every other request goes to the Flask app through asgiref's WsgiToAsgi,
+which runs it on a thread pool exactly as a WSGI server would.
+
+The native handlers reuse the Flask code (routes.news.load_news and
+routes.files.find_download); the session is opened by the app's own
+session interface, so authorization is identical on both paths.
+"""
+
+import asyncio
+import contextvars
+import json
+import mimetypes
+import os
+import re
+from urllib.parse import parse_qs, quote
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import session
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+from app import create_app, warm
+from routes.admin import dashboard_snapshot
+from routes.files import find_download
+from routes.news import NEWS_API_BASE_URL, NEWS_API_TIMEOUT, load_news
+from utils.compression import compress_payload
+from utils.events import KEEPALIVE_FRAME, AsyncSubscription, sse_frame
+
+DOWNLOAD_PATH = re.compile(r'^/apps/files/download/(\d+)/?$')
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class HybridApp:
+    """Routes I/O-bound endpoints to native coroutines and the rest to Flask"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.client = None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            if scope['path'] == '/apps/news/fetch':
+                return await self.fetch_news(scope, send)
+            if scope['path'] == '/admin/stream' and 'events' in self.flask_app.extensions:
+                return await self.admin_stream(scope, receive, send)
+            match = DOWNLOAD_PATH.match(scope['path'])
+            if match:
+                return await self.download_file(scope, send, int(match.group(1)))
+
+        # In a fresh context: asgiref copies the WSGI thread's context changes back into the caller,
+        # and a stale executor left there fails the next request on the same keep-alive connection
+        return await asyncio.create_task(self.wsgi(scope, receive, send), context=contextvars.Context())
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.client is not None:
+                    await self.client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def http_client(self):
+        # One pooled client per worker; created lazily inside the running event loop
+        if self.client is None:
+            import httpx
+            self.client = httpx.AsyncClient(timeout=NEWS_API_TIMEOUT,
+                                            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50))
+        return self.client
+
+    def session_user(self, scope, key='user'):
+        """Open the request's session through the Flask session interface"""
+        headers = {k.decode('latin-1'): v.decode('latin-1') for k, v in scope['headers'] if k == b'cookie'}
+        with self.flask_app.test_request_context(scope['path'], headers=headers):
+            return session.get(key)
+
+    async def fetch_news(self, scope, send):
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        user = await asyncio.to_thread(self.session_user, scope)
+        payload, status = await load_news(
+            self.http_client(),
+            self.flask_app.config.get('NEWS_API_BASE_URL', NEWS_API_BASE_URL),
+            query.get('category', ['business'])[0],
+            query.get('filter', ['{}'])[0],
+            user,
+        )
+        await self.send_json(send, payload, status, scope)
+
+    def authorize_download(self, scope, file_id):
+        user = self.session_user(scope)
+        with self.flask_app.app_context():
+            return find_download(user, file_id)
+
+    async def download_file(self, scope, send, file_id):
+        file_path, error, status = await asyncio.to_thread(self.authorize_download, scope, file_id)
+        if error:
+            return await self.send_json(send, {'success': False, 'error': error}, status)
+
+        try:
+            f = await asyncio.to_thread(open, file_path, 'rb')
+        except OSError:
+            return await self.send_json(send, {'success': False, 'error': 'File download failed'}, 500)
+
+        try:
+            size = os.fstat(f.fileno()).st_size
+            filename = os.path.basename(file_path)
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', (mimetypes.guess_type(filename)[0] or 'application/octet-stream').encode()),
+                    (b'content-length', str(size).encode()),
+                    (b'content-disposition', f"attachment; filename*=UTF-8''{quote(filename)}".encode()),
+                ],
+            })
+            while True:
+                chunk = await asyncio.to_thread(f.read, DOWNLOAD_CHUNK_SIZE)
+                more = len(chunk) == DOWNLOAD_CHUNK_SIZE
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more})
+                if not more:
+                    break
+        finally:
+            await asyncio.to_thread(f.close)
+
+    def snapshot(self):
+        with self.flask_app.app_context():
+            return json.dumps(dashboard_snapshot())
+
+    async def admin_stream(self, scope, receive, send):
+        """Same stream as routes.admin.stream, served on the event loop"""
+        if not await asyncio.to_thread(self.session_user, scope, 'admin_logged_in'):
+            return await self.send_json(send, {'success': False, 'message': 'Unauthorized'}, 403)
+
+        config = self.flask_app.config
+        broker = self.flask_app.extensions['events']
+        subscription = broker.subscribe(AsyncSubscription(config['EVENTS_QUEUE_SIZE']))
+        disconnected = asyncio.ensure_future(self.wait_disconnect(receive))
+        loop = asyncio.get_running_loop()
+        ends_at = loop.time() + config['EVENTS_STREAM_LIFETIME']
+        try:
+            snapshot = await asyncio.to_thread(self.snapshot)
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')],
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 3000\n' + sse_frame('snapshot', snapshot),
+                        'more_body': True})
+            while not subscription.dropped and loop.time() < ends_at:
+                frame = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait({frame, disconnected}, timeout=config['EVENTS_HEARTBEAT'],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if disconnected in done:
+                    frame.cancel()
+                    return
+                if frame not in done:
+                    frame.cancel()
+                await send({'type': 'http.response.body', 'body': frame.result() if frame in done else KEEPALIVE_FRAME,
+                            'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            broker.unsubscribe(subscription)
+            disconnected.cancel()
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    def compress(self, scope, body):
+        """Same negotiation and thresholds as the Flask after_request hook"""
+        accept = next((v.decode('latin-1') for k, v in scope['headers'] if k == b'accept-encoding'), None)
+        with self.flask_app.app_context():
+            if not self.flask_app.config['COMPRESS_ENABLED']:
+                return body, None
+            return compress_payload(body, parse_accept_header(accept, Accept))
+
+    async def send_json(self, send, payload, status, scope=None):
+        body = json.dumps(payload).encode()
+        headers = [(b'content-type', b'application/json')]
+        if scope is not None and status == 200:
+            body, encoding = self.compress(scope, body)
+            if encoding:
+                headers += [(b'content-encoding', encoding.encode()), (b'vary', b'Accept-Encoding')]
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers + [(b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+flask_app = create_app()
+warm(flask_app)
+app = HybridApp(flask_app)
@@ -0,0 +1,163 @@
+"""Admin dashboard: N open event streams versus N dashboards refreshing by polling.
+
+    python benchmarks/admin_stream.py --streams 200 --users 500
+
+Starts `uvicorn asgi:app` as a separate process and opens --streams
+/admin/stream connections to it. The change is published from this
+process, so it reaches the server through the SQLite event bus as it
+would from another worker. Reported:
+
+  * idle     - server CPU seconds and thread count over --idle seconds
+               while the streams sit open
+  * fan_out  - time from one admin change to every stream receiving it
+  * polling  - cost of one dashboard refresh the old way (/admin-check
+               plus /admin/users), and the server CPU one refresh of
+               every dashboard would take
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def thread_count(pid):
+    with open(f'/proc/{pid}/status') as f:
+        return next(int(line.split()[1]) for line in f if line.startswith('Threads:'))
+
+
+def admin_cookie(flask_app):
+    from flask import session
+
+    with flask_app.test_request_context():
+        session['admin_logged_in'] = True
+        response = flask_app.response_class()
+        flask_app.session_interface.save_session(flask_app, session, response)
+        return response.headers['Set-Cookie'].split(';')[0]
+
+
+async def open_streams(base_url, cookie, count, marker, ready, received):
+    import httpx
+
+    limits = httpx.Limits(max_connections=count + 10)
+    async with httpx.AsyncClient(base_url=base_url, headers={'Cookie': cookie}, timeout=None,
+                                 limits=limits) as client:
+        async def one():
+            async with client.stream('GET', '/admin/stream') as response:
+                async for chunk in response.aiter_text():
+                    if 'snapshot' in chunk:
+                        ready.append(time.perf_counter())
+                    if marker in chunk:
+                        received.append(time.perf_counter())
+                        return
+
+        await asyncio.gather(*(one() for _ in range(count)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--streams', type=int, default=200)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--idle', type=float, default=5.0)
+    parser.add_argument('--port', type=int, default=None, help='Default: any free port')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-admin-stream-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING', FLASK_SESSION_BACKEND='cookie')
+    sys.path.insert(0, APP_ROOT)
+    import httpx
+
+    from app import create_app
+    from extensions import db
+    from models.user import User
+    from utils.events import publish_event
+
+    flask_app = create_app()
+    with flask_app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [{'username': f'user{i}', 'password_hash': 'x'} for i in range(args.users)])
+        db.session.commit()
+
+    port = args.port or free_port()
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'asgi:app', '--port', str(port),
+                               '--log-level', 'warning'], cwd=APP_ROOT, env=os.environ,
+                              stdout=subprocess.DEVNULL, stderr=open(os.path.join(workdir, 'server.log'), 'w'))
+    base_url = f'http://127.0.0.1:{port}'
+    cookie = admin_cookie(flask_app)
+    for _ in range(200):
+        try:
+            httpx.get(f'{base_url}/admin-check')
+            break
+        except httpx.TransportError:
+            if server.poll() is not None:
+                sys.exit(f"uvicorn exited, see {os.path.join(workdir, 'server.log')}")
+            time.sleep(0.1)
+
+    ready, received = [], []
+    client = threading.Thread(target=asyncio.run, daemon=True,
+                              args=(open_streams(base_url, cookie, args.streams, '"fan-out"', ready, received),))
+    client.start()
+    while len(ready) < args.streams:
+        time.sleep(0.05)
+
+    cpu_before = cpu_seconds(server.pid)
+    time.sleep(args.idle)
+    idle_cpu = cpu_seconds(server.pid) - cpu_before
+    idle_threads = thread_count(server.pid)
+
+    with flask_app.app_context():
+        published = time.perf_counter()
+        publish_event('user_added', {'id': 0, 'username': 'fan-out'})
+    client.join(30)
+    latencies = sorted(t - published for t in received)
+
+    with httpx.Client(base_url=base_url, headers={'Cookie': cookie}) as poller:
+        timings = []
+        cpu_before = cpu_seconds(server.pid)
+        for _ in range(20):
+            t = time.perf_counter()
+            poller.get('/admin-check').raise_for_status()
+            poller.get('/admin/users').raise_for_status()
+            timings.append(time.perf_counter() - t)
+        refresh_cpu = (cpu_seconds(server.pid) - cpu_before) / len(timings)
+    refresh = statistics.median(timings)
+
+    server.terminate()
+    server.wait()
+    report = {
+        'streams': args.streams,
+        'users': args.users,
+        'idle': {'seconds': args.idle, 'process_cpu_s': round(idle_cpu, 3), 'threads': idle_threads},
+        'fan_out': {'delivered': len(latencies),
+                    'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                    'max_ms': round(latencies[-1] * 1000, 1) if latencies else None},
+        'polling': {'refresh_ms': round(refresh * 1000, 2), 'refresh_server_cpu_ms': round(refresh_cpu * 1000, 2),
+                    'all_dashboards_once_cpu_s': round(refresh_cpu * args.streams, 2)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""Concurrent news fetches against a deliberately slow upstream.
+
+    python benchmarks/async_news.py --requests 200 --concurrency 100 --delay 0.5
+
+A local stub stands in for the news API and sleeps --delay seconds before
+answering. The same burst of /apps/news/fetch calls is sent to one
+single-process worker of each kind:
+
+  * wsgi - gunicorn gthread worker (wsgi:app), --threads threads
+  * asgi - uvicorn (asgi:app), news served natively on the event loop
+
+Wall time, throughput and latency percentiles are printed as JSON. With
+a slow upstream the WSGI worker is capped at threads / delay requests per
+second, while the ASGI worker overlaps every call that is in flight.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from http.server import ThreadingHTTPServer
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import StubUpstream, percentile, start_server  # noqa: E402
+
+
+class SlowUpstream(StubUpstream):
+    delay = 0.5
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        super().do_GET()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def burst(base_url, total, concurrency):
+    import httpx
+
+    latencies, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        async def one(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(base_url + '/apps/news/fetch',
+                                                params={'category': ('business', 'technology', 'world')[i % 3]})
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'wall_s': round(wall, 2),
+        'throughput_rps': round(total / wall, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def wait_until_up(base_url, process, timeout=60):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            httpx.get(base_url + '/about', timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError('Server did not start in time')
+
+
+def run(name, command, env, workdir, args):
+    port = free_port()
+    command = [part.format(port=port) for part in command]
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_up(base_url, process)
+        result = asyncio.run(burst(base_url, args.requests, args.concurrency))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    print(f'{name}: {result}', file=sys.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.5, help='Upstream latency in seconds')
+    parser.add_argument('--threads', type=int, default=4, help='Threads in the WSGI worker')
+    args = parser.parse_args()
+
+    SlowUpstream.delay = args.delay
+    stub_url = start_server(QuietServer(('127.0.0.1', 0), SlowUpstream))
+
+    workdir = tempfile.mkdtemp(prefix='boko-async-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+               LOG_LEVEL='WARNING', PYTHONPATH=APP_ROOT, FLASK_NEWS_API_BASE_URL=stub_url,
+               GUNICORN_WORKERS='1', GUNICORN_THREADS=str(args.threads))
+    env.pop('FLASK_RUN_FROM_CLI', None)
+
+    report = {
+        'config': vars(args),
+        'wsgi': run('wsgi', [sys.executable, '-m', 'gunicorn', '-c', os.path.join(APP_ROOT, 'gunicorn.conf.py'),
+                             '--bind', '127.0.0.1:{port}', 'wsgi:app'], env, workdir, args),
+        'asgi': run('asgi', [sys.executable, '-m', 'uvicorn', '--port', '{port}', '--workers', '1',
+                             '--no-access-log', 'asgi:app'], env, workdir, args),
+    }
+    report['speedup'] = round(report['asgi']['throughput_rps'] / report['wsgi']['throughput_rps'], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Registration captcha: local signed challenges versus the external siteverify call.
+
+    python benchmarks/captcha_verify.py --registrations 200 --upstream-ms 50
+
+Times CaptchaChallenges.verify on its own, then POST /register end to end
+(median, each with a fresh challenge and username) with CAPTCHA_BACKEND
+local and with recaptcha. For the latter, a local stub stands in for
+siteverify and answers after --upstream-ms, a stand-in for the round trip
+to the real provider. Both runs include the password hash and the insert.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def start_siteverify_stub(delay):
+    class Stub(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            body = b'{"success": true}'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_address[1]}/siteverify'
+
+
+def time_registrations(app, count, prefix):
+    challenges = app.extensions['captcha']
+    client = app.test_client()
+    timings = []
+    for i in range(count):
+        with app.app_context():
+            token = challenges.issue()
+            answer = challenges.text(token)
+        form = {'username': f'{prefix}{i}', 'password': 'Bench@1234', 'captcha': answer, 'captcha_token': token}
+        started = time.perf_counter()
+        response = client.post('/register', data=form)
+        timings.append(time.perf_counter() - started)
+        assert response.location.endswith('/login'), response.location
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--registrations', type=int, default=200)
+    parser.add_argument('--upstream-ms', type=float, default=50.0)
+    parser.add_argument('--verifications', type=int, default=100000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-captcha-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING', FLASK_SESSION_BACKEND='cookie')
+    sys.path.insert(0, APP_ROOT)
+    from app import create_app
+    from extensions import db
+
+    verify_url = start_siteverify_stub(args.upstream_ms / 1000)
+    local = create_app({'RATE_LIMIT_BACKEND': 'off'})
+    external = create_app({'RATE_LIMIT_BACKEND': 'off', 'CAPTCHA_BACKEND': 'recaptcha',
+                           'RECAPTCHA_VERIFY_URL': verify_url})
+    with local.app_context():
+        db.create_all()
+        challenges = local.extensions['captcha']
+        tokens = [challenges.issue() for _ in range(args.verifications)]
+        started = time.perf_counter()
+        for token in tokens:
+            challenges.verify(token, 'ABCDE')
+        verify_s = (time.perf_counter() - started) / args.verifications
+
+    report = {
+        'verify_us': round(verify_s * 1e6, 2),
+        'register_local_ms': round(time_registrations(local, args.registrations, 'local') * 1000, 2),
+        'register_recaptcha_ms': round(time_registrations(external, args.registrations, 'remote') * 1000, 2),
+        'upstream_ms': args.upstream_ms,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Hub summary: the summary row versus counting notes and files per request.
+
+    python benchmarks/hub_summary.py --users 200 --notes 100000 --files 20000
+
+Fills a file-backed SQLite database with --notes notes and --files file
+rows spread over --users users, then times (median of --repeat) reading
+one user's summary with utils.summary.get_summary against the four
+queries it replaces: the user row, a note count, a file count and a
+storage sum.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--files', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-hub-summary-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING', FLASK_SESSION_BACKEND='cookie')
+    sys.path.insert(0, APP_ROOT)
+    from sqlalchemy import func, select
+
+    from app import create_app
+    from extensions import db
+    from models.file import File
+    from models.note import Note
+    from models.user import User
+    from utils.summary import get_summary, rebuild_summaries
+
+    app = create_app()
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [{'username': f'user{i}', 'password_hash': 'x'}
+                                             for i in range(args.users)])
+        db.session.execute(db.insert(Note), [{'title': 't', 'content': 'c', 'created_at': now,
+                                              'user_id': rng.randint(1, args.users)} for _ in range(args.notes)])
+        db.session.execute(db.insert(File), [{'filename': 'f.pdf', 'file_path': f'/x/{i}', 'uploaded_at': now,
+                                              'size': rng.randint(1, 10 ** 6), 'user_id': rng.randint(1, args.users)}
+                                             for i in range(args.files)])
+        db.session.commit()
+        rebuild_summaries()
+
+        def counted():
+            user = db.session.execute(select(User.id, User.funds, User.balance_401k)
+                                      .where(User.username == 'user0')).first()
+            return (user, db.session.scalar(select(func.count()).where(Note.user_id == user.id)),
+                    db.session.scalar(select(func.count()).where(File.user_id == user.id)),
+                    db.session.scalar(select(func.coalesce(func.sum(File.size), 0)).where(File.user_id == user.id)))
+
+        user, notes, files, storage = counted()
+        summary = get_summary('user0')
+        assert (summary['notes'], summary['files'], summary['storage_bytes']) == (notes, files, storage)
+        summary_s = timed(lambda: get_summary('user0'), args.repeat)
+        counted_s = timed(counted, args.repeat)
+
+    report = {
+        'users': args.users,
+        'notes': args.notes,
+        'files': args.files,
+        'summary_row_ms': round(summary_s * 1000, 3),
+        'count_queries_ms': round(counted_s * 1000, 3),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Offline load test covering every blueprint.
+
+    python benchmarks/load_test.py --users 200 --notes 2000 --files 100 --clients 8 --duration 30
+    python benchmarks/load_test.py --output results/$(date +%F).json
+
+Seeds a throwaway SQLite database, starts the app on a local port together
+with a stub that stands in for the news API and the reCAPTCHA verifier, then
+drives a weighted mix of requests from --clients threads. Throughput and
+p50/p95/p99 latency per endpoint are printed (and optionally written) as
+JSON so runs can be diffed over time. Nothing leaves the machine.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'Bench@1234'
+ADMIN_USERNAME = 'benchadmin'
+
+# (name, weight) - roughly what a busy hub session looks like
+TRAFFIC_MIX = [
+    ('hub', 15),
+    ('notes_create', 10),
+    ('notes_search', 15),
+    ('files_upload', 5),
+    ('files_download', 10),
+    ('401k_contribute', 10),
+    ('admin_check', 10),
+    ('captcha', 5),
+    ('news_fetch', 15),
+    ('login', 5),
+]
+
+
+class StubUpstream(BaseHTTPRequestHandler):
+    """Local replacement for saurav.tech/NewsAPI and Google's siteverify"""
+
+    articles = json.dumps({'articles': [
+        {'title': f'Headline {i}', 'description': 'Lorem ipsum ' * 20, 'url': f'https://example.invalid/{i}',
+         'publishedAt': '2025-01-01T00:00:00Z', 'urlToImage': ''}
+        for i in range(20)
+    ]}).encode()
+
+    def do_GET(self):
+        self._reply(self.articles)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self._reply(b'{"success": true}')
+
+    def _reply(self, body):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def seed(app, n_users, n_notes, n_files, n_admins, upload_dir):
+    """Bulk-insert fixtures; every user shares one precomputed password hash"""
+    from werkzeug.security import generate_password_hash
+    from extensions import db
+    from models.admin import Admin
+    from models.file import File
+    from models.note import Note
+    from models.user import User
+
+    password_hash = generate_password_hash(PASSWORD, method='pbkdf2:sha256', salt_length=16)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(User), [
+            {'username': f'bench{i:06d}', 'password_hash': password_hash} for i in range(n_users)
+        ] + [{'username': ADMIN_USERNAME, 'password_hash': password_hash}] + [
+            {'username': f'benchadmin{i:03d}', 'password_hash': password_hash} for i in range(n_admins - 1)
+        ])
+        users = {u.username: u.id for u in User.query.all()}
+        admin_ids = [users[ADMIN_USERNAME]] + [users[f'benchadmin{i:03d}'] for i in range(n_admins - 1)]
+        db.session.execute(db.insert(Admin), [
+            {'user_id': uid, 'is_default': i == 0} for i, uid in enumerate(admin_ids)
+        ])
+
+        user_ids = [users[f'bench{i:06d}'] for i in range(n_users)]
+        rng = random.Random(1)
+        words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel']
+        db.session.execute(db.insert(Note), [
+            {'title': f'{rng.choice(words)} note {i}', 'content': ' '.join(rng.choices(words, k=30)),
+             'user_id': rng.choice(user_ids)}
+            for i in range(n_notes)
+        ])
+
+        rows = []
+        for i in range(n_files):
+            path = os.path.join(upload_dir, f'seed_{i}.pdf')
+            with open(path, 'wb') as f:
+                f.write(b'%PDF-1.4\n' + os.urandom(16 * 1024))
+            rows.append({'filename': f'seed_{i}.pdf', 'file_path': path, 'user_id': rng.choice(user_ids)})
+        if rows:
+            db.session.execute(db.insert(File), rows)
+        db.session.commit()
+
+        files_by_user = defaultdict(list)
+        for file in File.query.all():
+            files_by_user[file.user_id].append(file.id)
+    return user_ids, {uid: name for name, uid in users.items()}, files_by_user
+
+
+class Client(threading.Thread):
+    def __init__(self, base_url, username, file_ids, deadline, rng_seed, results):
+        super().__init__(daemon=True)
+        import requests
+
+        self.http = requests.Session()
+        self.base_url = base_url
+        self.username = username
+        self.file_ids = list(file_ids)
+        self.deadline = deadline
+        self.rng = random.Random(rng_seed)
+        self.results = results
+        self.names = [name for name, _ in TRAFFIC_MIX]
+        self.weights = [weight for _, weight in TRAFFIC_MIX]
+
+    def request(self, name, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.http.request(method, self.base_url + path, timeout=30, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        self.results[name].append((time.perf_counter() - started, ok))
+
+    def login(self):
+        self.request('login', 'POST', '/login', data={'username': self.username, 'password': PASSWORD},
+                     allow_redirects=False)
+
+    def run(self):
+        self.login()
+        admin = requests_session_admin(self.base_url) if self.rng.random() < 0.5 else None
+        while time.time() < self.deadline:
+            name = self.rng.choices(self.names, self.weights)[0]
+            if name == 'hub':
+                self.request(name, 'GET', '/hub')
+            elif name == 'notes_create':
+                self.request(name, 'POST', '/apps/notes/create',
+                             data={'title': f'load {self.rng.random():.6f}', 'content': 'generated by load test'})
+            elif name == 'notes_search':
+                self.request(name, 'GET', '/apps/notes/search', params={'q': self.rng.choice(['alpha', 'echo', 'load'])})
+            elif name == 'files_upload':
+                self.request(name, 'POST', '/apps/files/upload',
+                             files={'file': (f'up_{self.rng.getrandbits(48):x}.pdf', b'%PDF-1.4\n' + os.urandom(8192),
+                                             'application/pdf')})
+            elif name == 'files_download':
+                if self.file_ids:
+                    self.request(name, 'GET', f'/apps/files/download/{self.rng.choice(self.file_ids)}')
+            elif name == '401k_contribute':
+                self.request(name, 'POST', '/apps/401k/contribute', json={'amount': self.rng.randint(1, 100)})
+            elif name == 'admin_check':
+                if admin is not None:
+                    started = time.perf_counter()
+                    response = admin.get(self.base_url + '/admin-check', timeout=30)
+                    self.results[name].append((time.perf_counter() - started, response.status_code < 400))
+            elif name == 'captcha':
+                self.request(name, 'GET', '/captcha/generate')
+            elif name == 'news_fetch':
+                self.request(name, 'GET', '/apps/news/fetch',
+                             params={'category': self.rng.choice(['business', 'technology', 'world'])})
+            elif name == 'login':
+                self.login()
+
+
+def requests_session_admin(base_url):
+    import requests
+
+    session = requests.Session()
+    session.post(base_url + '/admin', data={'username': ADMIN_USERNAME, 'password': PASSWORD}, timeout=30)
+    return session
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    report = {}
+    for name, samples in sorted(results.items()):
+        latencies = sorted(s for s, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        report[name] = {
+            'requests': len(samples),
+            'errors': errors,
+            'throughput_rps': round(len(samples) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline mixed-traffic load test.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--notes', type=int, default=1000)
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--admins', type=int, default=3)
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent client threads')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of traffic')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Also write the JSON report to this file')
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix='boko-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)  # uploads/ and log files land in the scratch directory
+    sys.path.insert(0, APP_ROOT)
+
+    stub_url = start_server(ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream))
+
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    # Every client logs in from 127.0.0.1, so the per-IP attempt limits would throttle the mix
+    app = create_app({'NEWS_API_BASE_URL': stub_url, 'RECAPTCHA_VERIFY_URL': f'{stub_url}/recaptcha/api/siteverify',
+                      'RATE_LIMIT_BACKEND': 'off'})
+    os.makedirs('uploads', exist_ok=True)
+    user_ids, usernames, files_by_user = seed(app, args.users, args.notes, args.files, args.admins,
+                                              os.path.abspath('uploads'))
+    base_url = start_server(make_server('127.0.0.1', 0, app, threaded=True))
+
+    rng = random.Random(args.seed)
+    results = defaultdict(list)
+    started = time.time()
+    deadline = started + args.duration
+    clients = []
+    for i in range(args.clients):
+        uid = rng.choice(user_ids)
+        clients.append(Client(base_url, usernames[uid], files_by_user.get(uid, []), deadline, args.seed + i, results))
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.time() - started
+
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': vars(args),
+        'python': platform.python_version(),
+        'elapsed_s': round(elapsed, 2),
+        'total_requests': sum(len(v) for v in results.values()),
+        'endpoints': summarize(results, elapsed),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if output_path:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
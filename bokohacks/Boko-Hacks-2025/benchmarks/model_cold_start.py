@@ -0,0 +1,69 @@
+"""Cold-start time of the intrusion model: pickle vs native artifacts.
+
+    python benchmarks/model_cold_start.py --runs 10
+
+Every run is a fresh interpreter that imports what it needs, loads the
+artifacts and scores one row. Import time and artifact load time are
+reported separately: xgboost pulls in scikit-learn on import when it is
+installed, which otherwise hides the difference in deserialization cost.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOADERS = {
+    'pickle': "from utils.intrusion.artifacts import load_legacy as load",
+    'native': "from utils.intrusion.artifacts import registry; load = registry.get",
+}
+
+PROBE = """
+import time, warnings
+warnings.simplefilter('ignore')
+started = time.perf_counter()
+import xgboost
+{loader}
+imported = time.perf_counter()
+booster, encoder = load({model_dir!r})
+booster.inplace_predict(encoder.transform_rows([(0.3, 1, 0, 'Chrome')]))
+finished = time.perf_counter()
+print(imported - started, finished - imported)
+"""
+
+
+def measure(kind, model_dir, runs):
+    import_samples, load_samples = [], []
+    for _ in range(runs):
+        code = PROBE.format(loader=LOADERS[kind], model_dir=model_dir)
+        out = subprocess.run([sys.executable, '-c', code], cwd=APP_ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        import_s, load_s = out.strip().splitlines()[-1].split()
+        import_samples.append(float(import_s) * 1000.0)
+        load_samples.append(float(load_s) * 1000.0)
+    return {
+        'runs': runs,
+        'import_median_ms': round(statistics.median(import_samples), 2),
+        'load_median_ms': round(statistics.median(load_samples), 2),
+        'load_min_ms': round(min(load_samples), 2),
+        'load_max_ms': round(max(load_samples), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--model-dir', default=os.path.join(APP_ROOT, 'training model'))
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    results = {kind: measure(kind, args.model_dir, args.runs) for kind in LOADERS}
+    results['load_speedup'] = round(results['pickle']['load_median_ms'] / results['native']['load_median_ms'], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Notes per second: one request per note versus /apps/notes/batch.
+
+    python benchmarks/notes_batch.py --notes 2000 --batch-sizes 10 100 500
+
+Creates --notes notes for one logged-in user through the test client,
+first with a POST to /apps/notes/create per note (one commit each), then
+through /apps/notes/batch at each batch size. Each run starts from an
+empty notes table in a file-backed SQLite database, so every commit is a
+real write to disk, as in the app.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reset(app):
+    from extensions import db
+    from models.note import Note
+    from models.user import User
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.delete(Note))
+        if not User.query.filter_by(username='bench').first():
+            db.session.execute(db.insert(User), [{'username': 'bench', 'password_hash': 'x'}])
+        db.session.commit()
+
+
+def logged_in_client(app):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user'] = 'bench'
+    return client
+
+
+def single(app, n_notes):
+    client = logged_in_client(app)
+    started = time.perf_counter()
+    for i in range(n_notes):
+        response = client.post('/apps/notes/create', data={'title': f'note {i}', 'content': 'offline edit ' * 10})
+        assert response.status_code == 200, response.data
+    return time.perf_counter() - started
+
+
+def batched(app, n_notes, batch_size):
+    client = logged_in_client(app)
+    started = time.perf_counter()
+    for first in range(0, n_notes, batch_size):
+        operations = [{'op': 'create', 'title': f'note {i}', 'content': 'offline edit ' * 10}
+                      for i in range(first, min(first + batch_size, n_notes))]
+        response = client.post('/apps/notes/batch', json={'operations': operations})
+        assert response.status_code == 200 and response.json['failed'] == 0, response.data
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[10, 100, 500])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-notes-batch-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING')
+    os.chdir(workdir)
+    sys.path.insert(0, APP_ROOT)
+    from app import create_app
+
+    app = create_app()
+    runs = {}
+    reset(app)
+    runs['single'] = single(app, args.notes)
+    for batch_size in args.batch_sizes:
+        reset(app)
+        runs[f'batch_{batch_size}'] = batched(app, args.notes, batch_size)
+
+    baseline = args.notes / runs['single']
+    report = {'notes': args.notes}
+    for name, elapsed in runs.items():
+        rate = args.notes / elapsed
+        report[name] = {'elapsed_s': round(elapsed, 3), 'notes_per_s': round(rate, 1),
+                        'speedup': round(rate / baseline, 1)}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
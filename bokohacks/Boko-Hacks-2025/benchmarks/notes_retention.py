@@ -0,0 +1,134 @@
+"""Writer stalls during notes retention: one DELETE versus the batched worker.
+
+    python benchmarks/notes_retention.py --notes 300000 --expired 0.6
+
+The notes table is seeded with --notes rows, --expired of them past the
+retention window. While each strategy runs, a separate connection inserts
+a note and commits every few milliseconds, the way request threads do,
+and records how long each insert waited. Reported per strategy: rows
+removed per second, and the writer's p50/p99/max commit latency.
+
+  * single  - the old Note.delete_old_notes body: one DELETE, one commit
+  * batched - NotesRetentionWorker with the app's batch size and pause
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import percentile  # noqa: E402
+
+
+def seed(app, n_notes, expired_fraction, seed_value):
+    from extensions import db
+    from models.note import Note
+    from models.user import User
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.execute(db.insert(User), [{'username': f'user{i}', 'password_hash': 'x'} for i in range(100)])
+        rows = []
+        for i in range(n_notes):
+            age = rng.uniform(31, 365) if rng.random() < expired_fraction else rng.uniform(0, 29)
+            rows.append({'title': f'note {i}', 'content': 'x' * 200, 'user_id': rng.randint(1, 100),
+                         'created_at': now - timedelta(days=age)})
+        rows.sort(key=lambda r: r['created_at'])  # ids grow with time, as in production
+        db.session.execute(db.insert(Note), rows)
+        db.session.commit()
+
+
+class Writer(threading.Thread):
+    """Inserts one note per interval on its own connection and records commit latency"""
+
+    def __init__(self, db_path, interval=0.005):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.latencies = []
+        self.stop = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        while not self.stop.is_set():
+            started = time.perf_counter()
+            conn.execute("INSERT INTO notes (title, content, created_at, user_id) "
+                         "VALUES ('w', 'w', CURRENT_TIMESTAMP, 1)")
+            conn.commit()
+            self.latencies.append(time.perf_counter() - started)
+            time.sleep(self.interval)
+        conn.close()
+
+
+def measure(app, db_path, strategy):
+    from extensions import db
+    from models.note import Note
+    from utils.retention import get_retention_worker
+
+    writer = Writer(db_path)
+    writer.start()
+    time.sleep(0.2)
+    started = time.perf_counter()
+    with app.app_context():
+        if strategy == 'single':
+            cutoff = datetime.utcnow() - timedelta(days=app.config['NOTES_RETENTION_DAYS'])
+            removed = Note.query.filter(Note.created_at < cutoff).delete()
+            db.session.commit()
+        else:
+            removed = get_retention_worker(app).run()['removed']
+    elapsed = time.perf_counter() - started
+    time.sleep(0.2)
+    writer.stop.set()
+    writer.join()
+
+    latencies = sorted(writer.latencies)
+    return {
+        'removed': removed,
+        'elapsed_s': round(elapsed, 2),
+        'rows_per_s': round(removed / elapsed, 1),
+        'writer_commits': len(latencies),
+        'writer_p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'writer_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'writer_max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notes', type=int, default=300000)
+    parser.add_argument('--expired', type=float, default=0.6, help='Fraction of notes past retention')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--pause', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-retention-')
+    db_path = os.path.join(workdir, 'bench.db')
+    os.environ.update(DATABASE_URL=f'sqlite:///{db_path}', LOG_DIR=workdir, LOG_LEVEL='WARNING')
+    os.chdir(workdir)
+    sys.path.insert(0, APP_ROOT)
+    from app import create_app
+
+    app = create_app({'NOTES_RETENTION_BATCH_SIZE': args.batch_size, 'NOTES_RETENTION_PAUSE': args.pause})
+    report = {'config': vars(args)}
+    for strategy in ('single', 'batched'):
+        seed(app, args.notes, args.expired, args.seed)
+        report[strategy] = measure(app, db_path, strategy)
+        print(f'{strategy}: {report[strategy]}', file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
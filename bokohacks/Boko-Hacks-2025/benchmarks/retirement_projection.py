@@ -0,0 +1,96 @@
+"""Monte Carlo 401(k) projection: NumPy versus a per-path Python loop.
+
+    python benchmarks/retirement_projection.py --paths 10000 --years 40
+
+Times utils.projection.simulate on --paths x --years with a fixed seed
+(median of --repeat runs), the same simulation written as nested Python
+loops over paths and years (on --loop-paths paths, scaled up), and a
+cached request through /apps/401k/projection.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def loop_simulation(params, paths):
+    """Reference implementation: one path and one year at a time"""
+    import math
+    import random
+
+    from utils.projection import contribution_schedule
+
+    employee, employer = contribution_schedule(params)
+    growth_mean = 1.0 + params['mean_return']
+    sigma = math.sqrt(math.log1p((params['volatility'] / growth_mean) ** 2))
+    mu = math.log(growth_mean) - sigma ** 2 / 2
+    rng = random.Random(params['seed'])
+    finals = []
+    for _ in range(paths):
+        balance = params['start_balance']
+        for year in range(params['years']):
+            growth = math.exp(mu + sigma * rng.gauss(0, 1))
+            balance = balance * growth + (employee[year] + employer[year]) * math.sqrt(growth)
+        finals.append(balance)
+    return sorted(finals)[paths // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=40)
+    parser.add_argument('--loop-paths', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-projection-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING', FLASK_SESSION_BACKEND='cookie')
+    sys.path.insert(0, APP_ROOT)
+    from app import create_app
+    from extensions import db
+    from utils.projection import normalize_params, simulate
+
+    params = normalize_params({'paths': args.paths, 'years': args.years, 'seed': 1}, max_paths=args.paths)
+    numpy_s = timed(lambda: simulate(params), args.repeat)
+    loop_s = timed(lambda: loop_simulation(params, args.loop_paths), 1) * args.paths / args.loop_paths
+
+    app = create_app({'RETIREMENT_PROJECTION_MAX_PATHS': args.paths})
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user'] = 'bench'
+    body = {'paths': args.paths, 'years': args.years}
+    first = timed(lambda: client.post('/apps/401k/projection', json=body).get_json(), 1)
+    cached = timed(lambda: client.post('/apps/401k/projection', json=body).get_json(), args.repeat)
+
+    report = {
+        'paths': args.paths,
+        'years': args.years,
+        'numpy_ms': round(numpy_s * 1000, 1),
+        'python_loop_ms': round(loop_s * 1000, 1),
+        'speedup': round(loop_s / numpy_s, 1),
+        'request_uncached_ms': round(first * 1000, 1),
+        'request_cached_ms': round(cached * 1000, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
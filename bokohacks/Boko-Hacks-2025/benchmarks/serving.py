@@ -0,0 +1,157 @@
+"""Request throughput: Flask dev server vs gunicorn with gunicorn.conf.py.
+
+    python benchmarks/serving.py --clients 16 --duration 15
+    python benchmarks/serving.py --workers 4 --threads 8
+
+Seeds a throwaway database, then starts each server in turn as a separate
+process on a local port and drives the same mix from --clients threads:
+logged-in hub and note search pages, the about page and a correct login
+(pbkdf2). Throughput and p50/p99 latency are printed as JSON.
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import PASSWORD, percentile, seed  # noqa: E402
+
+DEV_SERVER = "from app import create_app; create_app().run(port={port}, debug=False, use_reloader=False)"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(base_url, process, timeout=60):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            requests.get(base_url + '/about', timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError('Server did not start in time')
+
+
+def drive(base_url, usernames, clients, duration, seed_value):
+    import requests
+
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def client(index):
+        rng = random.Random(seed_value + index)
+        http = requests.Session()
+        http.post(base_url + '/login', data={'username': rng.choice(usernames), 'password': PASSWORD}, timeout=30)
+        while time.time() < deadline:
+            roll = rng.random()
+            started = time.perf_counter()
+            try:
+                if roll < 0.35:
+                    response = http.get(base_url + '/hub', timeout=30)
+                elif roll < 0.7:
+                    response = http.get(base_url + '/apps/notes/search', params={'q': rng.choice(['alpha', 'echo'])},
+                                        timeout=30)
+                elif roll < 0.9:
+                    response = http.get(base_url + '/about', timeout=30)
+                else:
+                    response = http.post(base_url + '/login', allow_redirects=False, timeout=30,
+                                         data={'username': rng.choice(usernames), 'password': PASSWORD})
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def run_server(name, command, env, workdir, usernames, args):
+    port = free_port()
+    command = [part.format(port=port) for part in command]
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_until_up(base_url, process)
+        result = drive(base_url, usernames, args.clients, args.duration, args.seed)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    print(f'{name}: {result}', file=sys.stderr)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() * 2 + 1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--notes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-serving-')
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+               PYTHONPATH=APP_ROOT, LOG_LEVEL='WARNING', GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_THREADS=str(args.threads), FLASK_RATE_LIMIT_BACKEND='off')  # Every login comes from 127.0.0.1
+    env.pop('FLASK_RUN_FROM_CLI', None)
+
+    os.environ.update(DATABASE_URL=env['DATABASE_URL'], LOG_DIR=workdir, LOG_LEVEL='WARNING')
+    os.chdir(workdir)
+    sys.path.insert(0, APP_ROOT)
+    from app import create_app
+
+    os.makedirs('uploads', exist_ok=True)
+    user_ids, usernames, _ = seed(create_app(), args.users, args.notes, 0, 1, os.path.abspath('uploads'))
+    names = [usernames[uid] for uid in user_ids]
+
+    gunicorn = [sys.executable, '-m', 'gunicorn', '-c', os.path.join(APP_ROOT, 'gunicorn.conf.py'),
+                '--bind', '127.0.0.1:{port}', 'wsgi:app']
+    report = {
+        'config': vars(args),
+        'dev_server': run_server('dev_server', [sys.executable, '-c', DEV_SERVER], env, workdir, names, args),
+        'gunicorn': run_server('gunicorn', gunicorn, env, workdir, names, args),
+    }
+    report['speedup'] = round(report['gunicorn']['throughput_rps'] / report['dev_server']['throughput_rps'], 2)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Import-time and cold-start budgets for a fresh worker.
+
+    python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py --import-budget-ms 800 --boot-budget-ms 1200
+
+Each run is a new interpreter that imports app, calls create_app() and
+serves one request through the test client - what a recycled or newly
+scheduled worker pays before it can take traffic. Medians are checked
+against the budgets, and the run fails if any dependency that should only
+load on first use (requests, httpx, Pillow, numpy, xgboost, pandas,
+alembic) was imported during boot. Exit status is non-zero when a check fails.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that must stay out of the boot path
+DEFERRED_MODULES = ('requests', 'httpx', 'PIL', 'numpy', 'xgboost', 'pandas', 'sklearn', 'alembic', 'flask_migrate')
+
+PROBE = """
+import json, sys, time
+sys.path.insert(0, {app_root!r})
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+application.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000.0,
+    'create_ms': (created - imported) * 1000.0,
+    'first_request_ms': (served - created) * 1000.0,
+    'loaded': sorted(m for m in {deferred!r} if m in sys.modules),
+}}))
+"""
+
+
+def run_once(workdir):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}", LOG_DIR=workdir)
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    code = PROBE.format(app_root=APP_ROOT, deferred=DEFERRED_MODULES)
+    out = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget-ms', type=float, default=1000.0)
+    parser.add_argument('--boot-budget-ms', type=float, default=1500.0,
+                        help='Budget for import + create_app() + first request')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-startup-')
+    samples = [run_once(workdir) for _ in range(args.runs)]
+
+    def median(key):
+        return round(statistics.median(s[key] for s in samples), 2)
+
+    boot_ms = round(statistics.median(s['import_ms'] + s['create_ms'] + s['first_request_ms'] for s in samples), 2)
+    loaded = sorted({m for s in samples for m in s['loaded']})
+    report = {
+        'runs': args.runs,
+        'import_median_ms': median('import_ms'),
+        'create_app_median_ms': median('create_ms'),
+        'first_request_median_ms': median('first_request_ms'),
+        'boot_median_ms': boot_ms,
+        'deferred_modules_loaded': loaded,
+    }
+    failures = []
+    if report['import_median_ms'] > args.import_budget_ms:
+        failures.append(f"import {report['import_median_ms']} ms > {args.import_budget_ms} ms")
+    if boot_ms > args.boot_budget_ms:
+        failures.append(f"boot {boot_ms} ms > {args.boot_budget_ms} ms")
+    if loaded:
+        failures.append(f"loaded during boot: {', '.join(loaded)}")
+    report['failures'] = failures
+
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Render time saved by the template caches.
+
+    python benchmarks/template_render.py --iterations 2000
+
+Two measurements, both in-process:
+
+  * render - render each cached template (home, about, the news/401k/
+    notes/files/admin modals) inside a request context with
+    render_template() and with render_cached(), and report the mean time
+    per render and the difference. Timing the render rather than a full
+    test-client request keeps the WSGI overhead out of the comparison.
+  * cold compile - load every template into a fresh Jinja environment
+    with an empty and with a warm bytecode cache, which is what a newly
+    forked or recycled worker pays before its first render.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEMPLATES = ['home.html', 'about.html', 'news.html', '401k.html', 'notes.html', 'files.html', 'admin.html']
+
+
+def per_render(app, render, templates, iterations):
+    results = {}
+    with app.test_request_context('/'):
+        for name in templates:
+            render(name)  # compile + first fill
+            started = time.perf_counter()
+            for _ in range(iterations):
+                render(name)
+            results[name] = (time.perf_counter() - started) / iterations * 1e6
+    return results
+
+
+def cold_compile(bytecode_dir, rounds):
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    loader = FileSystemLoader(os.path.join(APP_ROOT, 'templates'))
+    samples = []
+    for _ in range(rounds):
+        cache = FileSystemBytecodeCache(bytecode_dir) if bytecode_dir else None
+        env = Environment(loader=loader, bytecode_cache=cache, autoescape=True)
+        started = time.perf_counter()
+        for name in env.list_templates():
+            env.get_template(name)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return round(statistics.median(samples), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=20, help='Cold compile repetitions')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='boko-templates-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}", LOG_DIR=workdir,
+                      LOG_LEVEL='WARNING')
+    os.chdir(workdir)
+    sys.path.insert(0, APP_ROOT)
+    from flask import render_template
+
+    from app import create_app
+    from utils.template_cache import render_cached
+
+    app = create_app()
+    templates = [t for t in TEMPLATES if app.extensions['template_cache'].is_cacheable(app.jinja_env, t)]
+    uncached = per_render(app, render_template, templates, args.iterations)
+    cached = per_render(app, render_cached, templates, args.iterations)
+
+    bytecode_dir = os.path.join(workdir, 'bytecode')
+    os.makedirs(bytecode_dir)
+    cold_compile(bytecode_dir, 1)  # populate
+
+    report = {
+        'iterations': args.iterations,
+        'per_render_us': {
+            name: {
+                'uncached': round(uncached[name], 1),
+                'cached': round(cached[name], 1),
+                'saved': round(uncached[name] - cached[name], 1),
+            }
+            for name in templates
+        },
+        'mean_saved_us': round(statistics.mean(uncached[t] - cached[t] for t in templates), 1),
+        'cold_compile_ms': {
+            'no_bytecode_cache': cold_compile(None, args.rounds),
+            'warm_bytecode_cache': cold_compile(bytecode_dir, args.rounds),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""gunicorn settings for serving wsgi:app.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (names below) or on
+the command line. The default bind is loopback only: this application is
+deliberately vulnerable and must not be exposed to a public network.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+# One OpenMP thread per worker; workers * threads already covers the cores
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+
+# Process x thread model: pbkdf2 and template rendering hold the GIL, so
+# processes give CPU parallelism while threads hide I/O waits (SQLite,
+# upstream HTTP calls).
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+
+# Import the app (templates, model) once in the master and fork from it
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+# Graceful recycling: each worker exits after ~max_requests requests, finishing
+# in-flight work within graceful_timeout; jitter keeps them from restarting together.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Heartbeat files on tmpfs so a slow disk cannot make the arbiter kill workers
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+# Workers share metrics through snapshot files so /metrics reports the whole server (utils/metrics.py);
+# set before the preloaded app reads its config
+os.environ.setdefault('FLASK_METRICS_MULTIPROC_DIR', tempfile.mkdtemp(prefix='bokohacks-metrics-'))
+
+# The app logs JSON through its own queue (utils/logging_setup.py). Every process appends to the
+# same files, so rotate them externally (logrotate) rather than by size from inside each process
+os.environ.setdefault('FLASK_LOG_ROTATION', 'external')
+errorlog = '-'
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master"""
+    from extensions import db
+
+    app = worker.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def child_exit(server, worker):
+    """Keep an exited worker's counters in the metrics totals"""
+    from utils.metrics import mark_process_dead
+
+    mark_process_dead(os.environ['FLASK_METRICS_MULTIPROC_DIR'], worker.pid)
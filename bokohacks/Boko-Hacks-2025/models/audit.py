@@ -0,0 +1,43 @@
+import json
+from extensions import db
+from datetime import datetime
+from sqlalchemy import event
+
+
+class AdminAuditEntry(db.Model):
+    """One admin action; rows are only ever inserted (see utils.audit)"""
+    __tablename__ = 'admin_audit_log'
+    __table_args__ = (
+        db.Index('ix_admin_audit_log_actor_created', 'actor', 'created_at'),
+        db.Index('ix_admin_audit_log_target_created', 'target', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)  # When it happened, not when it was written
+    actor = db.Column(db.String(150), nullable=False)
+    action = db.Column(db.String(50), nullable=False)
+    target = db.Column(db.String(150), nullable=True)
+    target_id = db.Column(db.Integer, nullable=True)
+    remote_addr = db.Column(db.String(45), nullable=True)
+    details = db.Column(db.Text, nullable=True)  # JSON
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S.%f'),
+            'actor': self.actor,
+            'action': self.action,
+            'target': self.target,
+            'target_id': self.target_id,
+            'remote_addr': self.remote_addr,
+            'details': json.loads(self.details) if self.details else None,
+        }
+
+    def __repr__(self):
+        return f'<AdminAuditEntry {self.actor} {self.action} {self.target}>'
+
+
+@event.listens_for(AdminAuditEntry, 'before_update')
+@event.listens_for(AdminAuditEntry, 'before_delete')
+def _append_only(mapper, connection, target):
+    raise ValueError("Audit log entries cannot be changed or deleted")
@@ -37,12 +37,16 @@ UPLOAD_FOLDER = '/secure/upload/directory'  # Set a safe directory for storing f
 
 class File(db.Model):
     __tablename__ = 'files'
+    __table_args__ = (db.Index('ix_files_user_revision', 'user_id', 'revision'),)
+    __sync_kind__ = 'file'  # Revisioned and tombstoned by utils.sync
 
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(200), nullable=False)
     file_path = db.Column(db.String(500), nullable=False, unique=True)  # Prevent duplicate file paths
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped on every change
+    size = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # Bytes on disk, for the hub summary
 
     def to_dict(self):
         return {
@@ -50,6 +54,7 @@ class File(db.Model):
             'filename': self.filename,
             'file_path': self.file_path,
             'uploaded_at': self.uploaded_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'size': self.size,
             'user_id': self.user_id
         }
 
@@ -21,19 +21,20 @@ Deletes notes older than 30 days automatically'''
 
 
 from extensions import db
-from datetime import datetime
 from sqlalchemy.sql import func
 from sqlalchemy.orm import validates
-from datetime import datetime, timedelta
 
 class Note(db.Model):
     __tablename__ = 'notes'
+    __table_args__ = (db.Index('ix_notes_user_revision', 'user_id', 'revision'),)
+    __sync_kind__ = 'note'  # Revisioned and tombstoned by utils.sync
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, server_default=func.now(), nullable=False, index=True)  # Efficient timestamp
     user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), nullable=False, index=True)
+    revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped on every change
 
     def to_dict(self):
         """Convert note object to dictionary securely"""
@@ -51,13 +52,21 @@ class Note(db.Model):
     @validates('title', 'content')
     def validate_fields(self, key, value):
         """Enforce title/content length and prevent empty values"""
+        error = self.field_error(key, value)
+        if error:
+            raise ValueError(error)
+        return value
+
+    @staticmethod
+    def field_error(key, value):
+        """Why a title/content value is invalid, or None; also used by bulk writes that skip @validates"""
         if not value or not value.strip():
-            raise ValueError(f"{key.capitalize()} cannot be empty.")
+            return f"{key.capitalize()} cannot be empty."
         
         if key == 'title' and len(value) > 200:
-            raise ValueError("Title length exceeds 200 characters.")
+            return "Title length exceeds 200 characters."
         
-        return value
+        return None
 
     @classmethod
     def get_user_notes(cls, user_id):
@@ -66,7 +75,6 @@ class Note(db.Model):
 
     @classmethod
     def delete_old_notes(cls, days=30):
-        """Automatically delete notes older than X days"""
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        cls.query.filter(cls.created_at < cutoff_date).delete()
-        db.session.commit()
+        """Delete notes older than X days (or the user's own window) in small committed batches"""
+        from utils.retention import NotesRetentionWorker
+        return NotesRetentionWorker(default_days=days).run()
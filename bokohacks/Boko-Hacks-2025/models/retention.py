@@ -0,0 +1,14 @@
+from extensions import db
+
+
+class RetentionCheckpoint(db.Model):
+    """Progress of an unfinished retention run, so the next run resumes where it stopped"""
+    __tablename__ = 'retention_checkpoints'
+
+    job = db.Column(db.String(50), primary_key=True)
+    reference_time = db.Column(db.DateTime, nullable=False)  # Cutoffs are computed from this, not "now"
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    removed = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<RetentionCheckpoint {self.job} @{self.last_id}>'
@@ -0,0 +1,16 @@
+from extensions import db
+from datetime import datetime
+
+
+class UserSummary(db.Model):
+    """Running totals shown on the hub, kept current by utils.summary on every write"""
+    __tablename__ = 'user_summaries'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete="CASCADE"), primary_key=True)
+    note_count = db.Column(db.Integer, nullable=False, default=0)
+    file_count = db.Column(db.Integer, nullable=False, default=0)
+    storage_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<UserSummary {self.user_id}: {self.note_count} notes, {self.file_count} files>'
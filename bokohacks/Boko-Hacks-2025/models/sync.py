@@ -0,0 +1,27 @@
+from extensions import db
+from datetime import datetime
+
+
+class SyncCounter(db.Model):
+    """Single-row source of change revisions shared by every synced table"""
+    __tablename__ = 'sync_counter'
+
+    id = db.Column(db.Integer, primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+    pruned_revision = db.Column(db.Integer, nullable=False, default=0)  # Tombstones at or below this are gone
+
+
+class SyncTombstone(db.Model):
+    """Marks a deleted note or file so change feeds can report the deletion"""
+    __tablename__ = 'sync_tombstones'
+    __table_args__ = (db.Index('ix_sync_tombstones_kind_user_revision', 'kind', 'user_id', 'revision'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(10), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    revision = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<SyncTombstone {self.kind} {self.entity_id} @{self.revision}>'
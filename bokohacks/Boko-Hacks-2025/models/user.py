@@ -43,6 +43,9 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False, index=True)  # Index for faster lookup
     password_hash = db.Column(db.String(256), nullable=False)  # Increased length for better security
+    note_retention_days = db.Column(db.Integer, nullable=True)  # None = NOTES_RETENTION_DAYS, 0 = keep forever
+    funds = db.Column(db.Float, nullable=False, default=10000, server_default='10000')  # 401k app: cash on hand
+    balance_401k = db.Column(db.Float, nullable=False, default=0, server_default='0')
 
     def set_password(self, password: str):
         """Hashes password securely with validation."""
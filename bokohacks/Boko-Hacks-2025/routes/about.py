@@ -1,13 +1,14 @@
 
-from flask import Blueprint, render_template, make_response, current_app
+from flask import Blueprint, make_response, current_app
 from datetime import datetime
+from utils.template_cache import render_cached
 
 about_bp = Blueprint("about", __name__)
 
 @about_bp.route("/about")
 def about():
     # Render the template
-    response = render_template("about.html")
+    response = render_cached("about.html")
 
     # Apply security headers
     response = make_response(response)
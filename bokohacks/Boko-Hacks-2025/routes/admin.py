@@ -24,6 +24,17 @@ from flask import Blueprint, render_template, request, flash, redirect, session,
 from models.user import User
 from models.admin import Admin
 from extensions import db
+from utils.intrusion import get_scorer, score_login_attempt, captcha_required, check_login_captcha, record_login_result
+from utils.login_stats import is_rate_limited
+from utils.profiler import profile_for
+from utils.rate_limit import check_rate_limit, retry_after_header
+from utils.sessions import revoke_user_sessions
+from utils.audit import audit, audit_entries
+from utils.events import KEEPALIVE_FRAME, StreamLimitReached, Subscription, get_broker, publish_event, sse_frame
+import json
+import os
+import time
+from datetime import datetime
 
 admin_bp = Blueprint("admin", __name__)
 
@@ -56,15 +67,21 @@ def init_admin_db():
 
 def get_admin_list():
     """Get list of all admin users"""
-    admin_roles = Admin.query.all()
-    admins = []
-    
-    for admin in admin_roles:
-        user = User.query.get(admin.user_id)
-        if user:
-            admins.append([admin.id, user.username, admin.is_default])
-    
-    return admins
+    rows = db.session.query(Admin.id, User.username, Admin.is_default).join(User, User.id == Admin.user_id) \
+        .order_by(Admin.id).all()
+    return [[admin_id, username, is_default] for admin_id, username, is_default in rows]
+
+def admin_roster():
+    """The admin list plus the user ids holding an admin role"""
+    return {
+        'admins': get_admin_list(),
+        'admin_user_ids': [user_id for user_id, in db.session.query(Admin.user_id).all()]
+    }
+
+def dashboard_snapshot():
+    """Everything the dashboard shows; the first event on every stream"""
+    users = db.session.query(User.id, User.username).order_by(User.id).all()
+    return {**admin_roster(), 'users': [{'id': user_id, 'username': username} for user_id, username in users]}
 
 def is_admin_logged_in():
     """Helper function to check if admin is logged in"""
@@ -74,16 +91,11 @@ def is_admin_logged_in():
 def check_admin():
     """Check admin login status - used for AJAX requests"""
     if is_admin_logged_in():
-        admins = get_admin_list()
-        admin_roles = Admin.query.all()
-        admin_user_ids = [admin.user_id for admin in admin_roles]
-        
         return jsonify({
             'logged_in': True,
             'is_default_admin': session.get('is_default_admin', False),
             'admin_username': session.get('admin_username', 'admin'),
-            'admins': admins,
-            'admin_user_ids': admin_user_ids
+            **admin_roster()
         })
     return jsonify({'logged_in': False})
 
@@ -93,6 +105,29 @@ def admin():
     if request.method == "POST":
         username = request.form.get("username")
         password = request.form.get("password")
+
+        retry_after = check_rate_limit("admin_login", username)
+        if retry_after is not None:
+            return jsonify({
+                'success': False,
+                'message': "Too many login attempts. Please try again later."
+            }), 429, retry_after_header(retry_after)
+        
+        if is_rate_limited(username):
+            return jsonify({
+                'success': False,
+                'message': "Too many failed login attempts. Please try again later."
+            }), 429
+        
+        # Score the attempt before touching the password hash
+        if captcha_required(score_login_attempt(username)):
+            if not check_login_captcha(request.form.get("captcha"), request.form.get("captcha_token")):
+                record_login_result(username, False)
+                return jsonify({
+                    'success': False,
+                    'captcha_required': True,
+                    'message': "Please complete the CAPTCHA to continue."
+                })
         
         # Use ORM method to fetch the user securely
         user = User.query.filter_by(username=username).first()
@@ -101,9 +136,11 @@ def admin():
             admin_role = Admin.query.filter_by(user_id=user.id).first()
             
             if admin_role:
+                record_login_result(username, True)
                 session['admin_logged_in'] = True
                 session['admin_username'] = username
                 session['is_default_admin'] = admin_role.is_default
+                audit('admin_login', actor=username)
                 
                 return jsonify({
                     'success': True,
@@ -111,8 +148,11 @@ def admin():
                     'admins': get_admin_list()
                 })
         
+        record_login_result(username, False)
+        audit('admin_login_failed', actor=username or 'unknown')
         return jsonify({
             'success': False,
+            'captcha_required': session.get('login_captcha_required', False),
             'message': "Invalid admin credentials."
         })
     
@@ -139,6 +179,8 @@ def add_admin():
         user.set_password(password)
         db.session.add(user)
         db.session.commit()
+        publish_event('user_added', {'id': user.id, 'username': user.username})
+        audit('user_added', target=user.username, target_id=user.id)
     
     existing_admin = Admin.query.filter_by(user_id=user.id).first()
     if existing_admin:
@@ -147,11 +189,14 @@ def add_admin():
     new_admin = Admin(user_id=user.id)
     db.session.add(new_admin)
     db.session.commit()
+    audit('admin_added', target=user.username, target_id=user.id)
     
+    roster = admin_roster()
+    publish_event('admins', roster)
     return jsonify({
         'success': True,
         'message': "Admin added successfully",
-        'admins': get_admin_list()
+        'admins': roster['admins']
     })
 
 @admin_bp.route("/admin/remove/<int:admin_id>", methods=["POST"])
@@ -168,13 +213,20 @@ def remove_admin(admin_id):
     if admin.is_default:
         return jsonify({'success': False, 'message': "Cannot remove default admin"})
     
+    removed = db.session.get(User, admin.user_id)
     db.session.delete(admin)
     db.session.commit()
+    if removed:
+        # Admin panel sessions opened while they were an admin must not outlive the role
+        revoke_user_sessions(removed.username)
+    audit('admin_removed', target=removed.username if removed else None, target_id=admin.user_id, admin_id=admin_id)
     
+    roster = admin_roster()
+    publish_event('admins', roster)
     return jsonify({
         'success': True,
         'message': "Admin removed successfully",
-        'admins': get_admin_list()
+        'admins': roster['admins']
     })
 
 @admin_bp.route("/admin/users", methods=["GET"])
@@ -200,8 +252,14 @@ def delete_user(user_id):
     try:
         user = User.query.get(user_id)
         if user:
+            was_admin = Admin.query.filter_by(user_id=user.id).first() is not None
             db.session.delete(user)
             db.session.commit()
+            revoke_user_sessions(user.username)
+            audit('user_deleted', target=user.username, target_id=user_id, was_admin=was_admin)
+            publish_event('user_deleted', {'id': user_id})
+            if was_admin:
+                publish_event('admins', admin_roster())
             return jsonify({'success': True, 'message': "User deleted successfully"})
         return jsonify({'success': False, 'message': "User not found"})
     except Exception as e:
@@ -223,6 +281,8 @@ def reset_password():
         if user:
             user.set_password(new_password)
             db.session.commit()
+            revoke_user_sessions(user.username)
+            audit('password_reset', target=user.username, target_id=user.id)
             return jsonify({'success': True, 'message': "Password reset successfully"})
         return jsonify({'success': False, 'message': "User not found"})
     except Exception as e:
@@ -247,6 +307,8 @@ def add_user():
         new_user.set_password(password)
         db.session.add(new_user)
         db.session.commit()
+        publish_event('user_added', {'id': new_user.id, 'username': new_user.username})
+        audit('user_added', target=new_user.username, target_id=new_user.id)
         
         return jsonify({
             'success': True, 
@@ -258,9 +320,111 @@ def add_user():
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
+@admin_bp.route("/admin/stream", methods=["GET"])
+def stream():
+    """Push roster and user directory changes to the dashboard as Server-Sent Events"""
+    if not is_admin_logged_in():
+        return jsonify({'success': False, 'message': "Unauthorized"}), 403
+    
+    broker = get_broker()
+    if broker is None:
+        return jsonify({'success': False, 'message': "Event stream is disabled"}), 404
+    
+    # Subscribe before reading the snapshot so no change falls between the two
+    try:
+        subscription = broker.subscribe(Subscription(current_app.config['EVENTS_QUEUE_SIZE']))
+    except StreamLimitReached:
+        return jsonify({'success': False, 'message': "Too many open streams"}), 503
+    snapshot = json.dumps(dashboard_snapshot())
+    heartbeat = current_app.config['EVENTS_HEARTBEAT']
+    # Streams end now and then so a reconnect re-checks the admin session
+    ends_at = time.monotonic() + current_app.config['EVENTS_STREAM_LIFETIME']
+    
+    def generate():
+        try:
+            yield b'retry: 3000\n' + sse_frame('snapshot', snapshot)
+            while not subscription.dropped and time.monotonic() < ends_at:
+                yield subscription.get(heartbeat) or KEEPALIVE_FRAME
+        finally:
+            broker.unsubscribe(subscription)
+    
+    response = current_app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@admin_bp.route("/admin/audit", methods=["GET"])
+def audit_log():
+    """Audit trail, newest first; filter by actor, target, action, since/until (ISO times)"""
+    if not is_admin_logged_in():
+        return jsonify({'success': False, 'message': "Unauthorized"}), 401
+
+    try:
+        since, until = (datetime.fromisoformat(request.args[key]) if request.args.get(key) else None
+                        for key in ('since', 'until'))
+        cursor = request.args.get('cursor')
+        if cursor:
+            created_at, entry_id = cursor.rsplit('|', 1)
+            cursor = (datetime.fromisoformat(created_at), int(entry_id))
+        limit = min(int(request.args.get('limit', 100)), 500)
+    except ValueError:
+        return jsonify({'success': False, 'message': "Invalid since, until, cursor or limit"}), 400
+
+    entries, next_cursor = audit_entries(request.args.get('actor'), request.args.get('target'),
+                                         request.args.get('action'), since, until, cursor, max(limit, 1))
+    return jsonify({
+        'success': True,
+        'entries': entries,
+        'cursor': f"{next_cursor[0].isoformat()}|{next_cursor[1]}" if next_cursor else None
+    })
+
+@admin_bp.route("/admin/intrusion/stats", methods=["GET"])
+def intrusion_stats():
+    """Report intrusion scorer batching and latency statistics"""
+    if not is_admin_logged_in():
+        return jsonify({'success': False, 'message': "Unauthorized"})
+    
+    scorer = get_scorer()
+    if scorer is None:
+        return jsonify({'success': False, 'message': "Intrusion scoring is disabled"})
+    
+    return jsonify({
+        'success': True,
+        'threshold': current_app.config['INTRUSION_SCORE_THRESHOLD'],
+        'stats': scorer.stats()
+    })
+
+@admin_bp.route("/admin/profile", methods=["GET"])
+def profile():
+    """Capture a time-boxed sampling profile of this worker as collapsed stacks or speedscope JSON"""
+    if not is_admin_logged_in():
+        return jsonify({'success': False, 'message': "Unauthorized"}), 403
+    
+    if not current_app.config['PROFILER_ENABLED']:
+        return jsonify({'success': False, 'message': "Profiling is disabled"}), 404
+    
+    seconds = request.args.get('seconds', 5, type=float)
+    rate_hz = request.args.get('rate', current_app.config['PROFILER_RATE_HZ'], type=int)
+    fmt = request.args.get('format', 'collapsed')
+    if seconds <= 0 or not 1 <= rate_hz <= 1000 or fmt not in ('collapsed', 'speedscope'):
+        return jsonify({'success': False, 'message': "Invalid seconds, rate or format"}), 400
+    
+    try:
+        profiler = profile_for(seconds, rate_hz=rate_hz)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    
+    audit('profile_captured', seconds=round(profiler.elapsed, 1), samples=profiler.sample_count)
+    current_app.logger.info(f"Profile captured by {session.get('admin_username')}: "
+                            f"{profiler.sample_count} samples over {profiler.elapsed:.1f}s")
+    body, mimetype = profiler.render(fmt, name=f'worker {os.getpid()}')
+    return current_app.response_class(body, mimetype=mimetype)
+
 @admin_bp.route('/admin/logout', methods=['POST'])
 def logout():
     """Logout admin"""
+    if is_admin_logged_in():
+        audit('admin_logout')
     session.pop('admin_logged_in', None)
     session.pop('admin_username', None)
     session.pop('is_default_admin', None)
@@ -1,4 +1,5 @@
 from flask import Blueprint, render_template, session, jsonify
+from utils.template_cache import render_cached
 import re
 
 apps_bp = Blueprint("apps", __name__)
@@ -25,7 +26,7 @@ def load_app(app_name):
     """Load a template for a specific app"""
     # Special handling for 'admin' app name
     if app_name == "admin":
-        return render_template(
+        return render_cached(
             "admin.html",
             is_logged_in=session.get('admin_logged_in', False),
             is_default_admin=session.get('is_default_admin', False)
@@ -34,7 +35,7 @@ def load_app(app_name):
     # Validate app_name and look up corresponding template
     template_name = get_template_for_app(app_name)
     if template_name:
-        return render_template(template_name)
+        return render_cached(template_name)
 
     # Return a generic error page if app not found
     return render_template("error.html", message="Application not found."), 404
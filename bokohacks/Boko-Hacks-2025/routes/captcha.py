@@ -1,22 +1,31 @@
-from flask import Blueprint, send_file, session
+from flask import Blueprint, abort, jsonify, request, send_file, url_for
 from io import BytesIO
-import random
-import string
 from utils.captcha import generate_captcha
+from utils.captcha.challenge import get_challenges
 
 captcha_bp = Blueprint("captcha", __name__)
 
 @captcha_bp.route("/captcha/generate", methods=["GET"])
 def get_captcha():
-    """Generate a new CAPTCHA image - intentionally simplified"""
-    
-    captcha_text = "12345"
-    
-    session['captcha_text'] = captcha_text
-    
+    """Draw the CAPTCHA image for a challenge token, or for a new one (sent back in X-Captcha-Token)"""
+    challenges = get_challenges()
+    token = request.args.get("token") or challenges.issue()
+    captcha_text = challenges.text(token)
+    if captcha_text is None:
+        abort(404)
+
     image = generate_captcha(captcha_text)
     img_io = BytesIO()
     image.save(img_io, 'PNG')
     img_io.seek(0)
     
-    return send_file(img_io, mimetype='image/png')
\ No newline at end of file
+    response = send_file(img_io, mimetype='image/png')
+    response.headers['X-Captcha-Token'] = token
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@captcha_bp.route("/captcha/challenge", methods=["GET"])
+def new_challenge():
+    """A new challenge token and the URL of its image, for forms built in JavaScript"""
+    token = get_challenges().issue()
+    return jsonify({'token': token, 'image': url_for('captcha.get_captcha', token=token)})
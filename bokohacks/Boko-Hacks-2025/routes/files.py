@@ -17,6 +17,7 @@ import mimetypes
 import re
 import logging
 from werkzeug.utils import secure_filename
+from utils.sync import change_feed
 
 # Constants
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'gif'}
@@ -24,9 +25,7 @@ UPLOAD_FOLDER = 'uploads'
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB max size
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Configure logging
-logging.basicConfig(level=logging.ERROR, filename='app_error.log', 
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 files_bp = Blueprint('files', __name__, url_prefix='/apps/files')
 
@@ -59,7 +58,7 @@ def secure_file_path(filename):
 
 def log_error(error):
     """Log detailed error messages"""
-    logging.error(f"Error occurred: {error}")
+    logger.error(f"Error occurred: {error}")
 
 @files_bp.route('/')
 def files():
@@ -74,6 +73,26 @@ def files():
     all_files = File.query.filter_by(user_id=current_user.id).order_by(File.uploaded_at.desc()).all()
     return render_template('files.html', files=all_files, current_user_id=current_user.id)
 
+@files_bp.route('/changes')
+def file_changes():
+    """Files uploaded or deleted since revision `since`"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not logged in'}), 401
+
+    current_user = User.query.filter_by(username=session['user']).first()
+    if not current_user:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'success': False, 'error': 'since must be a non-negative revision'}), 400
+
+    return jsonify({'success': True, **change_feed(File, current_user.id, int(since), file_summary)})
+
+def file_summary(file):
+    """File fields the client needs, without the server-side path"""
+    return {key: value for key, value in file.to_dict().items() if key != 'file_path'}
+
 @files_bp.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file upload securely"""
@@ -98,7 +117,8 @@ def upload_file():
     try:
         file.save(file_path)
 
-        new_file = File(filename=filename, file_path=file_path, user_id=current_user.id)
+        new_file = File(filename=filename, file_path=file_path, user_id=current_user.id,
+                        size=os.path.getsize(file_path))
         db.session.add(new_file)
         db.session.commit()
 
@@ -143,22 +163,35 @@ def delete_file(file_id):
 @files_bp.route('/download/<int:file_id>')
 def download_file(file_id):
     """Download a file securely"""
-    if 'user' not in session:
-        return jsonify({'success': False, 'error': 'Not logged in'}), 401
-    
-    current_user = User.query.filter_by(username=session['user']).first()
-    if not current_user:
-        return jsonify({'success': False, 'error': 'User not found'}), 404
+    file_path, error, status = find_download(session.get('user'), file_id)
+    if error:
+        return jsonify({'success': False, 'error': error}), status
 
-    file = File.query.get_or_404(file_id)
-    if file.user_id != current_user.id:
-        return jsonify({'success': False, 'error': 'Access denied'}), 403
-
-    directory = os.path.dirname(file.file_path)
-    filename = os.path.basename(file.file_path)
+    directory = os.path.dirname(file_path)
+    filename = os.path.basename(file_path)
     
     try:
         return send_from_directory(directory, filename, as_attachment=True)
     except Exception as e:
         log_error(str(e))
         return jsonify({'success': False, 'error': 'File download failed'}), 500
+
+def find_download(username, file_id):
+    """Authorize a download; returns (file_path, None, 200) or (None, error, status).
+
+    Shared with the native ASGI download handler in asgi.py.
+    """
+    if not username:
+        return None, 'Not logged in', 401
+    
+    current_user = User.query.filter_by(username=username).first()
+    if not current_user:
+        return None, 'User not found', 404
+
+    file = db.session.get(File, file_id)
+    if file is None:
+        return None, 'File not found', 404
+    if file.user_id != current_user.id:
+        return None, 'Access denied', 403
+    
+    return file.file_path, None, 200
@@ -1,11 +1,12 @@
 from flask import Blueprint, render_template, current_app
+from utils.template_cache import render_cached
 
 home_bp = Blueprint("home", __name__)
 
 @home_bp.route("/")
 def home():
     try:
-        return render_template("home.html")
+        return render_cached("home.html")
     except Exception as e:
         # Log any potential errors (optional, depending on your logging setup)
         current_app.logger.error(f"Error rendering home page: {str(e)}")
@@ -1,4 +1,5 @@
-from flask import Blueprint, render_template, session, redirect, url_for, current_app
+from flask import Blueprint, render_template, session, redirect, url_for, current_app, jsonify
+from utils.summary import get_summary
 
 hub_bp = Blueprint("hub", __name__)
 
@@ -6,7 +7,7 @@ hub_bp = Blueprint("hub", __name__)
 def hub():
     try:
         if "user" in session:
-            return render_template("hub.html", username=session["user"])
+            return render_template("hub.html", username=session["user"], summary=get_summary(session["user"]))
         else:
             current_app.logger.info("User not logged in, redirecting to login page.")
             return redirect(url_for("login.login"))
@@ -14,3 +15,14 @@ def hub():
         # Log the error if any exception occurs
         current_app.logger.error(f"Error accessing hub page: {str(e)}")
         return redirect(url_for("error_page"))  # Redirect to an error page or handle as you see fit
+
+@hub_bp.route("/hub/summary")
+def hub_summary():
+    """Note and file counts, storage used and 401k balance from the summary row"""
+    if "user" not in session:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+
+    summary = get_summary(session["user"])
+    if summary is None:
+        return jsonify({"success": False, "error": "User not found"}), 404
+    return jsonify({"success": True, "summary": summary})
@@ -2,6 +2,9 @@ from flask import Blueprint, render_template, request, flash, redirect, session,
 from models.user import User
 from extensions import db
 from werkzeug.security import check_password_hash  # Ensure password hash is checked securely
+from utils.intrusion import score_login_attempt, captcha_required, check_login_captcha, record_login_result
+from utils.login_stats import is_rate_limited
+from utils.rate_limit import check_rate_limit, retry_after_header
 
 login_bp = Blueprint("login", __name__)
 
@@ -10,21 +13,39 @@ def login():
     if request.method == "POST":
         username = request.form.get("username")
         password = request.form.get("password")
+
+        retry_after = check_rate_limit("login", username)
+        if retry_after is not None:
+            flash("Too many login attempts. Please try again later.", "error")
+            return render_template("login.html"), 429, retry_after_header(retry_after)
         
         # Ensure username and password are provided
         if not username or not password:
             flash("Username and password are required.", "error")
             return redirect(url_for("login.login"))
         
+        if is_rate_limited(username):
+            flash("Too many failed login attempts. Please try again later.", "error")
+            return render_template("login.html"), 429
+        
+        # Score the attempt before touching the password hash
+        if captcha_required(score_login_attempt(username)):
+            if not check_login_captcha(request.form.get("captcha"), request.form.get("captcha_token")):
+                record_login_result(username, False)
+                flash("Please complete the CAPTCHA to continue.", "error")
+                return render_template("login.html", captcha_required=True)
+        
         user = User.query.filter_by(username=username).first()
         if user and user.check_password(password):  # Assuming check_password is secure
+            record_login_result(username, True)
             session["user"] = user.username
             flash("Login successful!", "success")
             return redirect(url_for("hub.hub"))
         else:
+            record_login_result(username, False)
             flash("Invalid username or password.", "error")
 
-    return render_template("login.html")
+    return render_template("login.html", captcha_required=session.get("login_captcha_required", False))
 
 @login_bp.route("/logout")
 def logout():
@@ -0,0 +1,13 @@
+from flask import Blueprint, Response, request, session, current_app
+from utils.metrics import render_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """Prometheus exposition of request, SQL and payload metrics"""
+    # Scrapers run locally; admins can also look from the browser
+    if request.remote_addr not in current_app.config['METRICS_ALLOWED_IPS'] and not session.get('admin_logged_in'):
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
@@ -33,10 +33,10 @@ The filter_param is validated before being processed. If the filter is malformed
 
 
 
-from flask import Blueprint, render_template, jsonify, request
-import requests
+from flask import Blueprint, jsonify, request, session, current_app
 import json
 import logging
+from utils.template_cache import render_cached
 
 news_bp = Blueprint('news', __name__, url_prefix='/apps/news')
 
@@ -51,6 +51,7 @@ CATEGORY_MAPPING = {
 }
 
 DEFAULT_COUNTRY = 'us'
+NEWS_API_TIMEOUT = 10  # seconds
 
 # Internal news articles (Confidential)
 INTERNAL_NEWS = [
@@ -77,54 +78,64 @@ INTERNAL_NEWS = [
     }
 ]
 
-# Initialize logger
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+security_logger = logging.getLogger('security')
 
 @news_bp.route('/')
 def news_page():
     """Render the news page"""
-    return render_template('news.html')
+    return render_cached('news.html')
 
 @news_bp.route('/fetch', methods=['GET'])
-def fetch_news():
+async def fetch_news():
     """Fetch news from the News API with security enhancements"""
+    import httpx  # Deferred so app startup does not pay for httpx
+    
+    base_url = current_app.config.get('NEWS_API_BASE_URL', NEWS_API_BASE_URL)
+    async with httpx.AsyncClient(timeout=NEWS_API_TIMEOUT) as client:
+        payload, status = await load_news(client, base_url, request.args.get('category', 'business'),
+                                          request.args.get('filter', '{}'), session.get('user'))
+    return jsonify(payload), status
+
+async def load_news(client, base_url, category, filter_param, user):
+    """Fetch and shape one category of headlines; returns (payload, status).
+
+    Shared by the Flask view and the native ASGI handler in asgi.py, which
+    passes a long-lived client so connections are reused across requests.
+    """
+    import httpx
+    
     try:
-        # Get category from request, default to business
-        category = request.args.get('category', 'business')
-        
         # Map our category to API category
         api_category = CATEGORY_MAPPING.get(category, 'business')
-        api_url = f"{NEWS_API_BASE_URL}/top-headlines/category/{api_category}/{DEFAULT_COUNTRY}.json"
+        api_url = f"{base_url}/top-headlines/category/{api_category}/{DEFAULT_COUNTRY}.json"
         
-        logger.info(f"Fetching news from: {api_url}")
+        logger.debug(f"Fetching news from: {api_url}")
         
-        # Fetch news from external API with a timeout to avoid hanging the request
-        response = requests.get(api_url, timeout=10)
+        # Fetch news from external API without holding a thread while we wait
+        response = await client.get(api_url)
         
         # Ensure a valid response status code
         if response.status_code == 200:
             data = response.json()
             articles = data.get('articles', [])[:10]  # Limit to 10 articles
             
-            filter_param = request.args.get('filter', '{}')
-            
             try:
                 filter_options = json.loads(filter_param)
-                logger.info(f"Filter options: {filter_options}")
+                logger.debug(f"Filter options: {filter_options}")
                 
                 # Only show internal news if the flag is set and user is authorized
                 if filter_options.get('showInternal') == True:
                     # Add internal news to the results
-                    logger.warning("Adding internal news to results!")
                     # Ensure user is authorized to see internal news
-                    if not session.get('user') == 'admin':  # Example check
-                        logger.error("Unauthorized access to internal news")
-                        return jsonify({'success': False, 'error': 'Unauthorized access'}), 403
+                    if not user == 'admin':  # Example check
+                        security_logger.warning("Unauthorized access to internal news")
+                        return {'success': False, 'error': 'Unauthorized access'}, 403
+                    security_logger.info("Adding internal news to results")
                     articles = INTERNAL_NEWS + articles
             except json.JSONDecodeError:
-                logger.error(f"Invalid filter parameter: {filter_param}")
-                return jsonify({'success': False, 'error': 'Invalid filter parameter'}), 400
+                logger.warning(f"Invalid filter parameter: {filter_param[:200]}")
+                return {'success': False, 'error': 'Invalid filter parameter'}, 400
             
             # Transform the data to match our expected format
             transformed_data = {
@@ -143,16 +154,16 @@ def fetch_news():
                     'imageUrl': article.get('urlToImage', '')
                 })
             
-            return jsonify(transformed_data)
+            return transformed_data, 200
         else:
             logger.error(f"Failed to fetch news. Status code: {response.status_code}")
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Failed to fetch news. Status code: {response.status_code}'
-            }), response.status_code
-    except requests.RequestException as e:
+            }, response.status_code
+    except httpx.HTTPError as e:
         logger.error(f"Request error: {e}")
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return {'success': False, 'error': str(e)}, 500
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        return jsonify({'success': False, 'error': 'Internal Server Error'}), 500
+        return {'success': False, 'error': 'Internal Server Error'}, 500
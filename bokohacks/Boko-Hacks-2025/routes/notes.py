@@ -12,17 +12,21 @@
 
 
 
-from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, current_app
 from extensions import db
 from models.user import User
 from models.note import Note
 from datetime import datetime
-from sqlalchemy import text
+from sqlalchemy import text, select, insert, update, delete
 from werkzeug.utils import secure_filename
-from flask import Markup
+from markupsafe import Markup
+from utils.summary import adjust_summary
+from utils.sync import change_feed, claim_revisions, record_tombstones
 
 notes_bp = Blueprint('notes', __name__, url_prefix='/apps/notes')
 
+NOTES_BATCH_MAX_OPERATIONS = 500
+
 @notes_bp.route('/create', methods=['POST'])
 def create_note():
     """Create a new note - Secured against XSS"""
@@ -96,3 +100,154 @@ def search_notes():
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 500
+
+@notes_bp.route('/changes')
+def note_changes():
+    """Notes created, updated or deleted since revision `since`"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not logged in'}), 401
+
+    current_user = User.query.filter_by(username=session['user']).first()
+    if not current_user:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({'success': False, 'error': 'since must be a non-negative revision'}), 400
+
+    return jsonify({'success': True, **change_feed(Note, current_user.id, int(since), Note.to_dict)})
+
+@notes_bp.route('/delete/<int:note_id>', methods=['DELETE'])
+def delete_note(note_id):
+    """Delete one of the current user's notes"""
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not logged in'}), 401
+
+    current_user = User.query.filter_by(username=session['user']).first()
+    if not current_user:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+
+    note = db.session.get(Note, note_id)
+    if note is None or note.user_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Note not found'}), 404
+
+    try:
+        db.session.delete(note)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Note deleted successfully'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@notes_bp.route('/batch', methods=['POST'])
+def batch_notes():
+    """Apply many create/update/delete operations in one transaction
+
+    Body: {"operations": [{"op": "create", "title": ..., "content": ...},
+                          {"op": "update", "id": ..., "title"?: ..., "content"?: ...},
+                          {"op": "delete", "id": ...}], "atomic": false}
+
+    Every operation is validated up front without building ORM objects.
+    Invalid ones are reported and skipped (or, with "atomic": true, nothing
+    is applied); the valid ones are written with one bulk INSERT, one bulk
+    UPDATE and one DELETE, then a single commit.
+    """
+    if 'user' not in session:
+        return jsonify({'success': False, 'error': 'Not logged in'}), 401
+
+    current_user = User.query.filter_by(username=session['user']).first()
+    if not current_user:
+        return jsonify({'success': False, 'error': 'User not found'}), 404
+
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'success': False, 'error': 'Body must be a JSON object'}), 400
+    operations = payload.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'success': False, 'error': 'operations must be a non-empty list'}), 400
+    max_operations = current_app.config.get('NOTES_BATCH_MAX_OPERATIONS', NOTES_BATCH_MAX_OPERATIONS)
+    if len(operations) > max_operations:
+        return jsonify({'success': False, 'error': f'At most {max_operations} operations per batch'}), 413
+
+    # Ownership of every referenced note in one query
+    target_ids = {op.get('id') for op in operations
+                  if isinstance(op, dict) and op.get('op') in ('update', 'delete') and isinstance(op.get('id'), int)}
+    owned_ids = set(db.session.scalars(
+        select(Note.id).where(Note.id.in_(target_ids), Note.user_id == current_user.id))) if target_ids else set()
+
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+    for index, op in enumerate(operations):
+        kind = op.get('op') if isinstance(op, dict) else None
+        error = None
+        if kind not in ('create', 'update', 'delete'):
+            error = 'op must be create, update or delete'
+        elif kind == 'create':
+            fields = {key: Markup.escape(op.get(key) or '') for key in ('title', 'content')}
+            error = Note.field_error('title', fields['title']) or Note.field_error('content', fields['content'])
+            if not error:
+                creates.append((index, fields))
+        else:
+            note_id = op.get('id')
+            if note_id not in owned_ids:
+                error = 'Note not found'
+            elif note_id in seen_ids:
+                error = 'Note appears more than once in this batch'
+            elif kind == 'delete':
+                deletes.append((index, note_id))
+            else:
+                fields = {key: Markup.escape(op[key]) for key in ('title', 'content') if op.get(key) is not None}
+                error = (next(filter(None, (Note.field_error(k, v) for k, v in fields.items())), None)
+                         or (None if fields else 'Nothing to update'))
+                if not error:
+                    updates.append((index, note_id, fields))
+            seen_ids.add(note_id)
+        if error:
+            results[index] = {'index': index, 'op': kind, 'success': False, 'error': error}
+
+    failed = sum(1 for result in results if result is not None)
+    if failed and payload.get('atomic'):
+        results = [r or {'index': i, 'op': operations[i].get('op'), 'success': False, 'error': 'Batch not applied'}
+                   for i, r in enumerate(results)]
+        return jsonify({'success': False, 'applied': 0, 'failed': len(results), 'results': results}), 400
+
+    try:
+        now = datetime.now()
+        # Bulk statements skip the ORM flush hook, so take the change feed revisions here
+        if creates or updates:
+            revision = claim_revisions(db.session.connection(), len(creates) + len(updates))
+        if creates:
+            rows = [{'title': fields['title'], 'content': fields['content'], 'created_at': now,
+                     'user_id': current_user.id, 'revision': revision + i} for i, (_, fields) in enumerate(creates)]
+            revision += len(creates)
+            inserted = db.session.execute(
+                insert(Note).returning(Note.id, sort_by_parameter_order=True), rows).scalars().all()
+            for (index, fields), note_id in zip(creates, inserted):
+                results[index] = {'index': index, 'op': 'create', 'success': True, 'note': {
+                    'id': note_id, 'title': fields['title'], 'content': fields['content'],
+                    'created_at': now.strftime('%Y-%m-%d %H:%M:%S'), 'user_id': current_user.id}}
+        if updates:
+            db.session.execute(update(Note), [{'id': note_id, 'revision': revision + i, **fields}
+                                              for i, (_, note_id, fields) in enumerate(updates)])
+            for index, note_id, _ in updates:
+                results[index] = {'index': index, 'op': 'update', 'success': True, 'id': note_id}
+        deleted = 0
+        if deletes:
+            deleted = db.session.execute(delete(Note).where(Note.id.in_([note_id for _, note_id in deletes]),
+                                                            Note.user_id == current_user.id),
+                                         execution_options={'synchronize_session': False}).rowcount
+            record_tombstones(db.session.connection(), Note.__sync_kind__,
+                              [(note_id, current_user.id) for _, note_id in deletes])
+            for index, note_id in deletes:
+                results[index] = {'index': index, 'op': 'delete', 'success': True, 'id': note_id}
+        if creates or deleted:
+            adjust_summary(db.session.connection(), current_user.id, notes=len(creates) - deleted)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Batch note operation failed: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    applied = len(creates) + len(updates) + len(deletes)
+    return jsonify({'success': failed == 0, 'applied': applied, 'failed': failed, 'results': results})
@@ -31,6 +31,7 @@ from extensions import db
 from models.user import User
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy import text
+from utils.projection import project
 
 retirement_bp = Blueprint("retirement", __name__, url_prefix="/apps/401k")
 
@@ -133,3 +134,16 @@ def reset_account():
     except SQLAlchemyError:
         db.session.rollback()
         return jsonify({"error": "Failed to reset account. Please try again."}), 500
+
+@retirement_bp.route("/projection", methods=["POST"])
+def projection():
+    """Balance percentiles by year; any field left out takes its default"""
+    if "user" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+
+    user = User.query.filter_by(username=session["user"]).first()
+    try:
+        result = project(request.get_json(silent=True) or {}, start_balance=user.balance_401k if user else None)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, **result})
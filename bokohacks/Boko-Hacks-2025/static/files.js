@@ -1,78 +1,113 @@
 console.log('Files.js loaded');
 
+// Local copy of the user's files, kept current from /apps/files/changes
+window.filesSync = window.filesSync || { revision: 0, files: new Map() };
+
 function initializeFileApp() {
     console.log('Initializing file app...');
     
+    renderFiles();
     fetchCurrentFiles();
     
     attachFormHandler();
+    attachDeleteHandlers();
     
     console.log('File app initialized');
 }
 
 function fetchCurrentFiles() {
-    console.log('Fetching current files...');
+    const state = window.filesSync;
+    console.log('Fetching file changes since revision', state.revision);
     
-    fetch('/apps/files')
-        .then(response => response.text())
-        .then(html => {
-            const tempDiv = document.createElement('div');
-            tempDiv.innerHTML = html;
-            
-            const newFileList = tempDiv.querySelector('#file-list');
-            const noFilesMessage = tempDiv.querySelector('.no-files');
-            
-            const fileListContainer = document.querySelector('.file-list');
-            if (!fileListContainer) {
-                console.error('File list container not found!');
-                return;
+    return fetch(`/apps/files/changes?since=${state.revision}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error || 'Unknown error');
+            }
+            if (data.reset) {
+                console.log('Change feed reset, reloading all files');
+                state.files.clear();
+                state.revision = 0;
+                return fetchCurrentFiles();
             }
             
-            if (newFileList && newFileList.children.length > 0) {
-                console.log('Found', newFileList.children.length, 'files from server');
-                
-                let currentList = document.getElementById('file-list');
-                if (!currentList) {
-                    currentList = document.createElement('ul');
-                    currentList.id = 'file-list';
-                    
-                    const existingNoFiles = fileListContainer.querySelector('.no-files');
-                    if (existingNoFiles) {
-                        existingNoFiles.remove();
-                    }
-                    
-                    fileListContainer.appendChild(currentList);
+            data.changes.forEach(change => {
+                if (change.op === 'delete') {
+                    state.files.delete(change.id);
                 } else {
-                    currentList.innerHTML = '';
-                }
-                
-                Array.from(newFileList.children).forEach(item => {
-                    currentList.appendChild(item.cloneNode(true));
-                });
-            } else if (noFilesMessage) {
-                console.log('No files found');
-                
-                const existingList = document.getElementById('file-list');
-                if (existingList) {
-                    existingList.remove();
-                }
-                
-                const existingNoFiles = fileListContainer.querySelector('.no-files');
-                if (!existingNoFiles) {
-                    const noFiles = document.createElement('div');
-                    noFiles.className = 'no-files';
-                    noFiles.textContent = "You haven't uploaded any files yet.";
-                    fileListContainer.appendChild(noFiles);
+                    state.files.set(change.file.id, change.file);
                 }
-            }
+            });
+            state.revision = data.revision;
+            console.log(`Applied ${data.changes.length} file changes, now at revision ${state.revision}`);
             
-            attachDeleteHandlers();
+            if (data.has_more) {
+                return fetchCurrentFiles();
+            }
+            renderFiles();
         })
         .catch(error => {
             console.error('Error fetching file list:', error);
         });
 }
 
+function fileItem(file) {
+    const item = document.createElement('li');
+    item.dataset.fileId = file.id;
+    item.innerHTML = `
+        <div class="file-info">
+            <strong></strong>
+            <div></div>
+        </div>
+        <div class="file-actions">
+            <button class="download-btn">Download</button>
+            <button class="delete-file" data-file-id="${file.id}">Delete</button>
+        </div>
+    `;
+    item.querySelector('strong').textContent = file.filename;
+    item.querySelector('.file-info div').textContent = `Uploaded: ${file.uploaded_at}`;
+    item.querySelector('.download-btn').addEventListener('click', () => {
+        window.open(`/apps/files/download/${file.id}`, '_blank');
+    });
+    return item;
+}
+
+function renderFiles() {
+    const fileListContainer = document.querySelector('.file-list');
+    if (!fileListContainer) {
+        console.error('File list container not found!');
+        return;
+    }
+    
+    const files = Array.from(window.filesSync.files.values()).sort((a, b) => b.id - a.id);
+    let currentList = document.getElementById('file-list');
+    const existingNoFiles = fileListContainer.querySelector('.no-files');
+    
+    if (files.length > 0) {
+        if (existingNoFiles) {
+            existingNoFiles.remove();
+        }
+        if (!currentList) {
+            currentList = document.createElement('ul');
+            currentList.id = 'file-list';
+            fileListContainer.appendChild(currentList);
+        }
+        currentList.replaceChildren(...files.map(fileItem));
+    } else if (window.filesSync.revision > 0) {
+        // Only once synced; before that, keep whatever the server rendered
+        if (currentList) {
+            currentList.remove();
+        }
+        if (!existingNoFiles) {
+            const noFiles = document.createElement('div');
+            noFiles.className = 'no-files';
+            noFiles.textContent = "You haven't uploaded any files yet.";
+            fileListContainer.appendChild(noFiles);
+        }
+    }
+}
+
 function attachFormHandler() {
     const form = document.getElementById('file-upload-form');
     if (!form) {
@@ -143,11 +178,17 @@ function attachFormHandler() {
 }
 
 function attachDeleteHandlers() {
-    document.querySelectorAll('.delete-file').forEach(button => {
-        button.removeEventListener('click', handleDelete);
-        
-        button.addEventListener('click', handleDelete);
-        console.log(`Attached delete handler to button for file ${button.dataset.fileId}`);
+    // Delegated, so rows rendered after a sync need no handlers of their own
+    const fileListContainer = document.querySelector('.file-list');
+    if (!fileListContainer || fileListContainer.dataset.handlerAttached) {
+        return;
+    }
+    fileListContainer.dataset.handlerAttached = 'true';
+    fileListContainer.addEventListener('click', function(e) {
+        const button = e.target.closest('.delete-file');
+        if (button) {
+            handleDelete.call(button, e);
+        }
     });
 }
 
@@ -108,6 +108,57 @@ function resetAccount() {
     });
 }
 
+function formatDollars(value) {
+    return `$${Math.round(value).toLocaleString()}`;
+}
+
+function runProjection() {
+    const results = document.getElementById("projection-results");
+    const years = parseInt(document.getElementById("projection-years").value, 10);
+    const rate = parseFloat(document.getElementById("projection-rate").value);
+    const meanReturn = parseFloat(document.getElementById("projection-return").value);
+
+    if ([years, rate, meanReturn].some(isNaN)) {
+        showToast("Enter years, contribution and return!", "error");
+        return;
+    }
+
+    fetch('/apps/401k/projection', {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+            years: years,
+            contributions: [{ from_year: 0, rate: rate / 100 }],
+            mean_return: meanReturn / 100
+        })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (!data.success) {
+            showToast(data.error, "error");
+            return;
+        }
+
+        // One row per decade plus the final year
+        const table = document.createElement("table");
+        table.className = "projection-table";
+        table.innerHTML = "<tr><th>Year</th><th>Pessimistic (5%)</th><th>Median</th><th>Optimistic (95%)</th></tr>";
+        data.years.forEach((year, i) => {
+            if (year % 10 !== 0 && year !== data.years.length) return;
+            const row = table.insertRow();
+            [year, formatDollars(data.percentiles["5"][i]), formatDollars(data.percentiles["50"][i]),
+             formatDollars(data.percentiles["95"][i])].forEach(value => {
+                row.insertCell().textContent = value;
+            });
+        });
+        results.replaceChildren(table);
+    })
+    .catch(err => {
+        console.error("Error running projection:", err);
+        showToast("Projection failed!", "error");
+    });
+}
+
 function initializeApp() {
     console.log("401k app initialized");
     
@@ -127,6 +178,11 @@ function initializeApp() {
     } else {
         console.error("Reset button not found");
     }
+
+    const projectionBtn = document.getElementById("projection-btn");
+    if (projectionBtn) {
+        projectionBtn.addEventListener("click", runProjection);
+    }
     
     getBalance();
 }
@@ -143,6 +199,11 @@ function cleanupApp() {
     if (resetBtn) {
         resetBtn.removeEventListener("click", resetAccount);
     }
+
+    const projectionBtn = document.getElementById("projection-btn");
+    if (projectionBtn) {
+        projectionBtn.removeEventListener("click", runProjection);
+    }
 }
 
 window.initializeApp = initializeApp;
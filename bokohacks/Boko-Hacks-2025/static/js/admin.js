@@ -15,6 +15,12 @@ function initializeApp() {
                         <label for="password">Password</label>
                         <input type="password" id="password" name="password" required>
                     </div>
+                    <div class="form-group" id="captcha-group" style="display: none;">
+                        <label for="captcha">Enter CAPTCHA</label>
+                        <img id="captcha-image" alt="CAPTCHA" class="captcha-image">
+                        <input type="text" id="captcha" name="captcha">
+                        <input type="hidden" id="captcha-token" name="captcha_token">
+                    </div>
                     <button type="submit" class="admin-btn">Login</button>
                 </form>
             </div>
@@ -260,39 +266,99 @@ function initializeApp() {
         });
     }
 
+    // Dashboard state, kept current by the /admin/stream push channel
+    let eventSource = null;
+    const dashboard = { adminUserIds: [], users: new Map() };
+
+    function renderUsers() {
+        const userList = document.getElementById('user-list');
+        const regularUsers = Array.from(dashboard.users.values())
+            .filter(user => !dashboard.adminUserIds.includes(user.id));
+        
+        if (regularUsers.length === 0) {
+            userList.innerHTML = '<p style="text-align: center; color: #666;">No regular users found.</p>';
+            return;
+        }
+        
+        userList.innerHTML = '';
+        regularUsers.forEach(user => {
+            const userItem = document.createElement('div');
+            userItem.className = 'user-item';
+            userItem.innerHTML = `
+              <span>${user.username}</span>
+              <div>
+                  <button onclick="resetPassword(${user.id})" class="action-btn">Reset Password</button>
+                  <button onclick="deleteUser(${user.id})" class="action-btn">Delete</button>
+              </div>
+            `;
+            userList.appendChild(userItem);
+        });
+    }
+
+    function openStream() {
+        if (eventSource) return;
+        if (!window.EventSource) {
+            updateUserList();
+            return;
+        }
+        
+        eventSource = new EventSource('/admin/stream');
+        const on = (name, handler) => eventSource.addEventListener(name, event => handler(JSON.parse(event.data)));
+        
+        on('snapshot', data => {
+            updateAdminList(data.admins);
+            dashboard.adminUserIds = data.admin_user_ids;
+            dashboard.users = new Map(data.users.map(user => [user.id, user]));
+            renderUsers();
+        });
+        on('admins', data => {
+            updateAdminList(data.admins);
+            dashboard.adminUserIds = data.admin_user_ids;
+            renderUsers();
+        });
+        on('user_added', user => {
+            dashboard.users.set(user.id, user);
+            renderUsers();
+        });
+        on('user_deleted', user => {
+            dashboard.users.delete(user.id);
+            renderUsers();
+        });
+        
+        eventSource.onerror = () => {
+            // The browser retries dropped streams itself; it gives up on refusals (logged out, too many streams)
+            if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+                console.error('Admin event stream closed, falling back to a one-off refresh');
+                eventSource = null;
+                updateUserList();
+            }
+        };
+    }
+
+    function closeStream() {
+        if (eventSource) {
+            eventSource.close();
+            eventSource = null;
+        }
+    }
+
+    // Without a stream, refetch after our own changes
+    function refreshUsers() {
+        if (!eventSource) updateUserList();
+    }
+
     async function updateUserList() {
         try {
             const adminResponse = await fetch('/admin-check');
             const adminData = await adminResponse.json();
             
-            const adminUserIds = adminData.admin_user_ids || [];
-            
             const response = await fetch('/admin/users');
             const data = await response.json();
             
             if (data.success) {
-                const userList = document.getElementById('user-list');
-                userList.innerHTML = '';
-                
-                const regularUsers = data.users.filter(user => !adminUserIds.includes(user.id));
-                
-                if (regularUsers.length === 0) {
-                    userList.innerHTML = '<p style="text-align: center; color: #666;">No regular users found.</p>';
-                    return;
-                }
-                
-                regularUsers.forEach(user => {
-                    const userItem = document.createElement('div');
-                    userItem.className = 'user-item';
-                    userItem.innerHTML = `
-                      <span>${user.username}</span>
-                      <div>
-                          <button onclick="resetPassword(${user.id})" class="action-btn">Reset Password</button>
-                          <button onclick="deleteUser(${user.id})" class="action-btn">Delete</button>
-                      </div>
-                    `;
-                    userList.appendChild(userItem);
-                });
+                dashboard.adminUserIds = adminData.admin_user_ids || [];
+                dashboard.users = new Map(data.users.map(user => [user.id, user]));
+                renderUsers();
             } else {
                 console.error("User list did not return success:", data);
                 showMessage('Failed to load users: ' + (data.message || 'Unknown error'));
@@ -305,6 +371,16 @@ function initializeApp() {
 
 
     
+    async function showCaptcha() {
+        document.getElementById('captcha-group').style.display = 'block';
+        document.getElementById('captcha').required = true;
+        document.getElementById('captcha').value = '';
+        // Each challenge can be answered once, so every attempt gets a new one
+        const challenge = await (await fetch('/captcha/challenge')).json();
+        document.getElementById('captcha-token').value = challenge.token;
+        document.getElementById('captcha-image').src = challenge.image;
+    }
+
     async function handleLogin(event) {
         event.preventDefault();
         const form = event.target;
@@ -324,9 +400,12 @@ function initializeApp() {
                 document.getElementById('login-section').style.display = 'none';
                 document.getElementById('admin-panel').style.display = 'block';
                 updateAdminList(data.admins);
-                updateUserList(); 
+                openStream();
                 showMessage('Login successful', 'success');
             } else {
+                if (data.captcha_required) {
+                    showCaptcha();
+                }
                 showMessage(data.message || 'Invalid credentials');
             }
         } catch (error) {
@@ -359,7 +438,7 @@ function initializeApp() {
                 document.getElementById('new-password').value = '';
                 document.getElementById('add-user-form-container').style.display = 'none';
                 document.getElementById('show-add-user').style.display = 'inline-block';
-                updateUserList();
+                refreshUsers();
                 showMessage(data.message || 'User added successfully', 'success');
             } else {
                 showMessage(data.message || 'Failed to add user');
@@ -437,6 +516,7 @@ function initializeApp() {
             const data = await response.json();
     
             if (data.success) {
+                closeStream();
                 document.getElementById('login-section').style.display = 'block';
                 document.getElementById('admin-panel').style.display = 'none';
                 showMessage('Logged out successfully', 'success');
@@ -460,7 +540,7 @@ function initializeApp() {
 
             if (data.success) {
                 showMessage(data.message || 'User deleted successfully', 'success');
-                updateUserList();
+                refreshUsers();
             } else {
                 showMessage(data.message || 'Failed to delete user');
             }
@@ -527,6 +607,9 @@ function initializeApp() {
         document.getElementById('admin-password').value = '';
     });
 
+    // Closing the app closes its stream
+    window.cleanupApp = closeStream;
+
     // Check initial login status
     fetch('/admin-check')
         .then(response => response.json())
@@ -539,7 +622,7 @@ function initializeApp() {
                 document.getElementById('admin-username-display').textContent = data.admin_username || "admin";
                 
                 updateAdminList(data.admins);
-                updateUserList();
+                openStream();
             }
         })
         .catch(error => {
@@ -39,7 +39,9 @@ class AppModal {
 
     async loadAppScript(appName) {
         const scriptInfo = this.appScripts[appName];
-        const scriptPath = scriptInfo ? scriptInfo.path : `/static/js/${appName}.js`;
+        const plainPath = scriptInfo ? scriptInfo.path : `/static/js/${appName}.js`;
+        // Fingerprinted URL from the server when there is one
+        const scriptPath = (window.STATIC_URLS || {})[plainPath] || plainPath;
         
         const existingScripts = document.querySelectorAll(`script[data-app-name="${appName}"]`);
         existingScripts.forEach(script => script.remove());
@@ -104,6 +106,25 @@ class AppModal {
         this.appContainer.innerHTML = '';
         this.appContainer.dataset.currentApp = '';
         this.currentApp = null;
+
+        this.refreshSummary();
+    }
+
+    refreshSummary() {
+        // The app that just closed may have added notes, files or contributions
+        if (!document.getElementById('summary-notes')) return;
+
+        fetch('/hub/summary')
+            .then(res => res.json())
+            .then(data => {
+                if (!data.success) return;
+                const summary = data.summary;
+                document.getElementById('summary-notes').textContent = summary.notes;
+                document.getElementById('summary-files').textContent = summary.files;
+                document.getElementById('summary-storage').textContent = (summary.storage_bytes / 1024).toFixed(1);
+                document.getElementById('summary-balance').textContent = summary.balance_401k;
+            })
+            .catch(error => console.error('Error refreshing summary:', error));
     }
     
     cleanupPreviousApp() {
@@ -1,8 +1,13 @@
+// Local copy of the user's notes, kept current from /apps/notes/changes.
+// Kept on window so reopening the app only fetches what changed meanwhile.
+window.notesSync = window.notesSync || { revision: 0, notes: new Map() };
 
 function initializeApp() {
     console.log('Notes app initialization started');
     
     attachEventHandlers();
+    renderNotes();
+    syncNotes();
 }
 
 function attachEventHandlers() {
@@ -31,11 +36,84 @@ function attachEventHandlers() {
         console.error('Search button not found');
     }
 
-    document.querySelectorAll('.delete-note').forEach(button => {
-        button.addEventListener('click', function() {
-            const noteId = this.getAttribute('data-note-id');
-            deleteNote(noteId);
+    // One delegated handler covers cards rendered later
+    const notesList = document.getElementById('notes-list');
+    if (notesList) {
+        notesList.addEventListener('click', function(event) {
+            const button = event.target.closest('.delete-note');
+            if (button) {
+                deleteNote(button.getAttribute('data-note-id'));
+            }
+        });
+    }
+}
+
+function noteCardHtml(note) {
+    return `
+        <div class="note-card">
+            <h3>${note.title}</h3>
+            <div class="note-content">${note.content}</div>
+            <div class="note-meta">
+                ID: ${note.id} | Created: ${note.created_at}
+                <button type="button" class="delete-note" data-note-id="${note.id}">Delete</button>
+            </div>
+        </div>
+    `;
+}
+
+function renderNotes() {
+    const notesList = document.getElementById('notes-list');
+    if (!notesList) {
+        console.error('Notes list element not found');
+        return;
+    }
+
+    const notes = Array.from(window.notesSync.notes.values()).sort((a, b) => b.id - a.id);
+    if (notes.length === 0) {
+        notesList.innerHTML = '<div class="note-card"><p>No notes found. Create your first note above!</p></div>';
+        return;
+    }
+    notesList.innerHTML = notes.map(noteCardHtml).join('');
+}
+
+function syncNotes() {
+    const state = window.notesSync;
+    console.log('Syncing notes since revision', state.revision);
+
+    return fetch(`/apps/notes/changes?since=${state.revision}`)
+    .then(response => response.json())
+    .then(data => {
+        if (!data.success) {
+            throw new Error(data.error || 'Unknown error');
+        }
+        if (data.reset) {
+            // Deletions we missed are no longer recorded; start over
+            console.log('Change feed reset, reloading all notes');
+            state.notes.clear();
+            state.revision = 0;
+            return syncNotes();
+        }
+
+        data.changes.forEach(change => {
+            if (change.op === 'delete') {
+                state.notes.delete(change.id);
+            } else {
+                state.notes.set(change.note.id, change.note);
+            }
         });
+        state.revision = data.revision;
+        console.log(`Applied ${data.changes.length} note changes, now at revision ${state.revision}`);
+
+        if (data.has_more) {
+            return syncNotes();
+        }
+        const searchInput = document.getElementById('search');
+        if (!searchInput || !searchInput.value) {
+            renderNotes();
+        }
+    })
+    .catch(error => {
+        console.error('Sync error:', error);
     });
 }
 
@@ -76,26 +154,7 @@ function saveNote() {
             titleInput.value = '';
             contentInput.value = '';
             
-            const notesList = document.getElementById('notes-list');
-            const note = data.note;
-            const noteHtml = `
-                <div class="note-card">
-                    <h3>${note.title}</h3>
-                    <div class="note-content">${note.content}</div>
-                    <div class="note-meta">
-                        ID: ${note.id} | Created: ${note.created_at}
-                        <button type="button" class="delete-note" data-note-id="${note.id}">Delete</button>
-                    </div>
-                </div>
-            `;
-            notesList.insertAdjacentHTML('afterbegin', noteHtml);
-            
-            const newDeleteButton = notesList.querySelector(`.delete-note[data-note-id="${note.id}"]`);
-            if (newDeleteButton) {
-                newDeleteButton.addEventListener('click', function() {
-                    deleteNote(note.id);
-                });
-            }
+            syncNotes();
         } else {
             console.error('Error saving note:', data.error || 'Unknown error');
             alert('Error saving note. Please try again.');
@@ -110,6 +169,11 @@ function saveNote() {
 function searchNotes() {
     const query = document.getElementById('search').value;
     console.log('Searching for:', query);
+
+    if (!query) {
+        renderNotes();
+        return;
+    }
     
     fetch(`/apps/notes/search?q=${encodeURIComponent(query)}`)
     .then(response => {
@@ -133,27 +197,7 @@ function searchNotes() {
                 return;
             }
             
-            notesList.innerHTML = '';
-            data.notes.forEach(note => {
-                const noteElement = document.createElement('div');
-                noteElement.className = 'note-card';
-                noteElement.innerHTML = `
-                    <h3>${note.title}</h3>
-                    <div class="note-content">${note.content}</div>
-                    <div class="note-meta">
-                        ID: ${note.id} | Created: ${note.created_at}
-                        <button type="button" class="delete-note" data-note-id="${note.id}">Delete</button>
-                    </div>
-                `;
-                notesList.appendChild(noteElement);
-            });
-            
-            document.querySelectorAll('.delete-note').forEach(button => {
-                button.addEventListener('click', function() {
-                    const noteId = this.getAttribute('data-note-id');
-                    deleteNote(noteId);
-                });
-            });
+            notesList.innerHTML = data.notes.map(noteCardHtml).join('');
         } else {
             console.error('Search failed or returned invalid data');
             notesList.innerHTML = '<div class="note-card"><p>An error occurred while searching notes.</p></div>';
@@ -189,30 +233,7 @@ function deleteNote(noteId) {
             if (data.success) {
                 console.log('Note deleted successfully');
                 
-                const deleteBtn = document.querySelector(`.delete-btn[data-note-id="${noteId}"]`);
-                if (deleteBtn) {
-                    const noteElement = deleteBtn.closest('.note-card');
-                    if (noteElement) {
-                        noteElement.remove();
-                    } else {
-                        console.error('Note element not found');
-                    }
-                } else {
-                    const notes = document.querySelectorAll('.note-card');
-                    let found = false;
-                    for (let i = 0; i < notes.length; i++) {
-                        const button = notes[i].querySelector(`.delete-btn[onclick*="${noteId}"]`);
-                        if (button) {
-                            notes[i].remove();
-                            found = true;
-                            break;
-                        }
-                    }
-                    if (!found) {
-                        console.error('Could not find note element to remove');
-                        window.location.reload();
-                    }
-                }
+                syncNotes();
             } else {
                 console.error('Delete failed:', data.error || 'Unknown error');
                 alert('Error deleting note: ' + (data.error || 'Unknown error'));
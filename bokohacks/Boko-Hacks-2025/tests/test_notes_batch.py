@@ -0,0 +1,53 @@
+"""POST /apps/notes/batch request body validation."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('LOG_DIR', str(tmp_path))
+    monkeypatch.setenv('LOG_LEVEL', 'WARNING')
+    from app import create_app
+    from extensions import db
+    from models.user import User
+
+    app = create_app({'TESTING': True, 'SESSION_BACKEND': 'cookie', 'RATE_LIMIT_BACKEND': 'off',
+                      'TEMPLATE_BYTECODE_CACHE_DIR': str(tmp_path / 'jinja')})
+    with app.app_context():
+        db.create_all()
+        user = User(username='alice')
+        user.set_password('Pass@1234')
+        db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = 'alice'
+    yield client
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('body', ['[]', '"x"', '42', 'null', '[{"op": "create"}]'])
+def test_batch_rejects_json_that_is_not_an_object(client, body):
+    response = client.post('/apps/notes/batch', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Body must be a JSON object'}
+
+
+def test_batch_rejects_an_object_without_operations(client):
+    response = client.post('/apps/notes/batch', json={})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'operations must be a non-empty list'
+
+
+def test_batch_applies_operations(client):
+    response = client.post('/apps/notes/batch', json={'operations': [{'op': 'create', 'title': 't', 'content': 'c'}]})
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
@@ -0,0 +1,179 @@
+"""Append-only audit trail of admin actions.
+
+Admin routes call audit() once an action has succeeded. The entry is
+stamped with the time, the acting admin and their address, then appended
+to an in-memory buffer, so the request never waits for an insert. A
+background writer (one per worker process, started on first use) drains
+the buffer into admin_audit_log with one multi-row INSERT when
+AUDIT_BATCH_SIZE entries are waiting or every AUDIT_FLUSH_INTERVAL
+seconds, whichever comes first.
+
+Entries are never dropped. A failed write puts its batch back at the
+front of the buffer and is retried on the next flush. If the buffer
+reaches AUDIT_MAX_BUFFERED, the request that adds the next entry writes
+the buffer itself. The buffer is also flushed at interpreter exit and
+before the trail is read, so /admin/audit always shows the latest
+entries. A worker killed outright loses at most one flush interval of
+entries.
+
+Rows are only ever inserted: the model refuses ORM updates and deletes.
+Reads go through the (actor, created_at), (target, created_at) and
+created_at indexes.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from flask import current_app, has_request_context, request, session
+from sqlalchemy import and_, insert, or_, select
+
+from extensions import db
+from models.audit import AdminAuditEntry
+from utils.metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+AUDIT_PAGE_SIZE = 100
+
+audit_entries_total = Counter('admin_audit_entries_total', 'Admin audit entries by stage', ('stage',))
+REGISTRY.append(audit_entries_total)
+
+
+class AuditWriter:
+    """Buffers audit entries and writes them in batches from a background thread"""
+
+    def __init__(self, app, batch_size=100, flush_interval=1.0, max_buffered=10000):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self._buffer = deque()
+        self._ready = threading.Condition()
+        self._write_lock = threading.Lock()  # Keeps batches in order
+        self._thread = None
+        self._pid = None
+        atexit.register(self.flush)
+        if hasattr(os, 'register_at_fork'):
+            # The parent writes what it buffered before forking; the child starts empty
+            os.register_at_fork(after_in_child=self._buffer.clear)
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._ready:
+            if self._pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def record(self, entry):
+        """Queue one entry (a dict of AdminAuditEntry columns)"""
+        self._ensure_thread()
+        with self._ready:
+            self._buffer.append(entry)
+            buffered = len(self._buffer)
+            if buffered >= self.batch_size:
+                self._ready.notify()
+        audit_entries_total.inc(('buffered',))
+        if buffered >= self.max_buffered:
+            # The writer is falling behind or failing; write from this thread instead of growing without bound
+            self.flush()
+
+    def pending(self):
+        with self._ready:
+            return len(self._buffer)
+
+    def _run(self):
+        while True:
+            with self._ready:
+                if len(self._buffer) < self.batch_size:
+                    self._ready.wait(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of entries written"""
+        written = 0
+        with self._write_lock:
+            while True:
+                with self._ready:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                try:
+                    with self.app.app_context():
+                        db.session.execute(insert(AdminAuditEntry), batch)
+                        db.session.commit()
+                except Exception as e:
+                    with self._ready:
+                        self._buffer.extendleft(reversed(batch))
+                    audit_entries_total.inc(('failed',), len(batch))
+                    logger.error(f"Could not write {len(batch)} audit entries, will retry: {e}")
+                    return written
+                written += len(batch)
+                audit_entries_total.inc(('written',), len(batch))
+
+
+def get_audit_writer():
+    return current_app.extensions.get('audit')
+
+
+def audit(action, target=None, target_id=None, actor=None, **details):
+    """Record an admin action; `details` must be JSON-serializable and never hold secrets"""
+    writer = get_audit_writer()
+    if writer is None:
+        return
+    in_request = has_request_context()
+    writer.record({
+        'created_at': datetime.utcnow(),
+        'actor': actor or (session.get('admin_username') if in_request else None) or 'unknown',
+        'action': action,
+        'target': target,
+        'target_id': target_id,
+        'remote_addr': request.remote_addr if in_request else None,
+        'details': json.dumps(details, sort_keys=True) if details else None,
+    })
+
+
+def audit_entries(actor=None, target=None, action=None, since=None, until=None, cursor=None, limit=AUDIT_PAGE_SIZE):
+    """Newest entries first, filtered; returns (entries, cursor for the next page or None)"""
+    writer = get_audit_writer()
+    if writer is not None:
+        writer.flush()
+
+    query = select(AdminAuditEntry)
+    if actor:
+        query = query.where(AdminAuditEntry.actor == actor)
+    if target:
+        query = query.where(AdminAuditEntry.target == target)
+    if action:
+        query = query.where(AdminAuditEntry.action == action)
+    if since:
+        query = query.where(AdminAuditEntry.created_at >= since)
+    if until:
+        query = query.where(AdminAuditEntry.created_at < until)
+    if cursor:
+        # Keyset paging: strictly older than the last entry of the previous page
+        created_at, entry_id = cursor
+        query = query.where(or_(AdminAuditEntry.created_at < created_at,
+                                and_(AdminAuditEntry.created_at == created_at, AdminAuditEntry.id < entry_id)))
+    rows = db.session.scalars(
+        query.order_by(AdminAuditEntry.created_at.desc(), AdminAuditEntry.id.desc()).limit(limit + 1)
+    ).all()
+    next_cursor = (rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return [row.to_dict() for row in rows[:limit]], next_cursor
+
+
+def init_audit(app):
+    """Set up this worker's buffered audit writer"""
+    app.config.setdefault('AUDIT_BATCH_SIZE', 100)
+    app.config.setdefault('AUDIT_FLUSH_INTERVAL', 1.0)
+    app.config.setdefault('AUDIT_MAX_BUFFERED', 10000)
+    writer = AuditWriter(app, app.config['AUDIT_BATCH_SIZE'], app.config['AUDIT_FLUSH_INTERVAL'],
+                         app.config['AUDIT_MAX_BUFFERED'])
+    app.extensions['audit'] = writer
+    return writer
@@ -1,6 +1,6 @@
-from PIL import Image, ImageDraw, ImageFont
-
-def generate_captcha(text: str = None, width: int = 200, height: int = 80) -> Image:
+def generate_captcha(text: str = None, width: int = 200, height: int = 80):
+    # Pillow is only loaded once a captcha image is drawn
+    from PIL import Image, ImageDraw, ImageFont
 
     image = Image.new('RGB', (width, height), (255, 255, 255))
     draw = ImageDraw.Draw(image)
@@ -0,0 +1,177 @@
+"""Self-contained captcha challenges: signed tokens, verified locally.
+
+A challenge is a token "<nonce>.<expires>.<signature>". The signature is
+an HMAC-SHA256 over the nonce and expiry, keyed from the app's secret
+key. The answer text is derived from a second HMAC over the nonce and is
+never stored anywhere: the image route recomputes it to draw the
+picture, and verification recomputes it to compare. The server keeps no
+per-challenge state, so nothing is written to the session and any
+worker can check a token that another worker issued.
+
+A token can be checked once. Its nonce is recorded in a spent-token
+cache before the answer is compared, so a solved (or mistyped) challenge
+cannot be replayed. Spent nonces only need to be kept until their
+challenge expires. CAPTCHA_SPENT_BACKEND selects where they are kept:
+
+  * local - a per-process dict, expired nonces dropped lazily and at most
+    CAPTCHA_SPENT_CACHE_SIZE kept; a token could be replayed once per
+    worker
+  * redis - SET NX with the challenge's remaining lifetime at
+    CAPTCHA_REDIS_URL, shared by every worker, or the local cache as a
+    stand-in when no URL is set
+
+With CAPTCHA_BACKEND=recaptcha, registration also confirms the answer
+with the external siteverify endpoint after the local check (the old
+behaviour). The default, local, makes no network call.
+"""
+
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from utils.metrics import REGISTRY, Counter
+
+# No 0/O or 1/I; 32 symbols, so each HMAC byte maps onto one without bias
+ALPHABET = '23456789ABCDEFGHJKLMNPQRSTUVWXYZ'
+
+captcha_checks = Counter('captcha_checks_total', 'Captcha verifications by result', ('result',))
+REGISTRY.append(captcha_checks)
+
+
+class SpentTokens:
+    """Nonces of challenges already checked, kept until the challenge would have expired"""
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._expiries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def spend(self, nonce, expires):
+        """True the first time a nonce is spent, False on any replay"""
+        now = time.time()
+        with self._lock:
+            if nonce in self._expiries:
+                return False
+            self._expiries[nonce] = expires
+            while self._expiries:
+                oldest, oldest_expires = next(iter(self._expiries.items()))
+                if oldest_expires >= now and len(self._expiries) <= self.max_entries:
+                    break
+                del self._expiries[oldest]
+            return True
+
+    def __len__(self):
+        return len(self._expiries)
+
+
+class RedisSpentTokens:
+    """Spent nonces in Redis, shared by every worker"""
+
+    def __init__(self, client, prefix='captcha-spent:'):
+        self.client = client
+        self.prefix = prefix
+
+    def spend(self, nonce, expires):
+        return bool(self.client.set(self.prefix + nonce, 1, nx=True, exat=int(expires) + 1))
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+class CaptchaChallenges:
+    """Issues and checks signed challenges"""
+
+    def __init__(self, secret, spent, ttl=300, length=5):
+        self._key = hmac.new(secret, b'captcha-challenge', hashlib.sha256).digest()
+        self.spent = spent
+        self.ttl = ttl
+        self.length = length
+
+    def _sign(self, payload):
+        return _b64(hmac.new(self._key, b'sign:' + payload.encode(), hashlib.sha256).digest())
+
+    def _text(self, nonce):
+        digest = hmac.new(self._key, b'text:' + nonce.encode(), hashlib.sha256).digest()
+        return ''.join(ALPHABET[byte % len(ALPHABET)] for byte in digest[:self.length])
+
+    def issue(self):
+        """A new challenge token, valid for `ttl` seconds"""
+        payload = f'{secrets.token_urlsafe(12)}.{int(time.time()) + self.ttl}'
+        return f'{payload}.{self._sign(payload)}'
+
+    def _open(self, token):
+        """(nonce, expires) of a genuine, unexpired token, else None"""
+        try:
+            nonce, expires, signature = (token or '').split('.')
+            expires = int(expires)
+        except ValueError:
+            return None
+        if not hmac.compare_digest(signature.encode(), self._sign(f'{nonce}.{expires}').encode()):
+            return None
+        if expires < time.time():
+            return None
+        return nonce, expires
+
+    def text(self, token):
+        """The answer to draw for `token`, or None if the token is forged or expired"""
+        opened = self._open(token)
+        return self._text(opened[0]) if opened else None
+
+    def verify(self, token, answer):
+        """Check an answer; the token is spent either way"""
+        opened = self._open(token)
+        if opened is None:
+            captcha_checks.inc(('invalid',))
+            return False
+        nonce, expires = opened
+        if not self.spent.spend(nonce, expires):
+            captcha_checks.inc(('replayed',))
+            return False
+        correct = hmac.compare_digest(self._text(nonce).encode(), (answer or '').strip().upper().encode())
+        captcha_checks.inc(('passed' if correct else 'failed',))
+        return correct
+
+
+def get_challenges():
+    return current_app.extensions['captcha']
+
+
+def new_captcha_challenge():
+    """Template global: a fresh challenge token for a form"""
+    return get_challenges().issue()
+
+
+def verify_captcha_answer(token, answer):
+    return get_challenges().verify(token, answer)
+
+
+def init_captcha(app):
+    """Challenge signing, the spent-token cache and the new_captcha_challenge() template global"""
+    app.config.setdefault('CAPTCHA_BACKEND', 'local')
+    app.config.setdefault('CAPTCHA_TTL', 300)
+    app.config.setdefault('CAPTCHA_LENGTH', 5)
+    app.config.setdefault('CAPTCHA_SPENT_BACKEND', 'local')
+    app.config.setdefault('CAPTCHA_REDIS_URL', None)
+    app.config.setdefault('CAPTCHA_SPENT_CACHE_SIZE', 100000)
+
+    backend = app.config['CAPTCHA_SPENT_BACKEND']
+    if backend == 'redis' and app.config['CAPTCHA_REDIS_URL']:
+        import redis
+        spent = RedisSpentTokens(redis.Redis.from_url(app.config['CAPTCHA_REDIS_URL']))
+    elif backend in ('redis', 'local'):
+        spent = SpentTokens(app.config['CAPTCHA_SPENT_CACHE_SIZE'])
+    else:
+        raise ValueError(f"Unknown CAPTCHA_SPENT_BACKEND {backend!r}")
+
+    secret = app.secret_key.encode() if isinstance(app.secret_key, str) else app.secret_key
+    challenges = CaptchaChallenges(secret, spent, app.config['CAPTCHA_TTL'], app.config['CAPTCHA_LENGTH'])
+    app.extensions['captcha'] = challenges
+    app.jinja_env.globals['new_captcha_challenge'] = new_captcha_challenge
+    return challenges
@@ -0,0 +1,190 @@
+"""Response compression: pre-built static variants and on-the-fly gzip/brotli.
+
+    python -m utils.compression
+    python -m utils.compression --gzip-level 9 --brotli-quality 11
+
+The command writes a .gz and (when the brotli package is installed) a .br
+copy of every compressible static file into static_compressed/, named after
+the file's fingerprinted name, so a variant can never outlive the content
+it was built from. The static view picks one by Accept-Encoding.
+
+Dynamic responses at least COMPRESS_MIN_SIZE bytes long are compressed in
+an after_request hook at COMPRESS_GZIP_LEVEL / COMPRESS_BROTLI_QUALITY.
+Responses that carry an ETag identify their content, so their compressed
+bodies are kept in a bounded LRU keyed by (ETag, encoding) and each page is
+only compressed once.
+"""
+
+import argparse
+import gzip
+import os
+import threading
+from collections import OrderedDict
+
+from flask import current_app, request
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STATIC_DIR = os.path.join(APP_ROOT, 'static')
+DEFAULT_COMPRESSED_DIR = os.path.join(APP_ROOT, 'static_compressed')
+
+# Server preference order when the client accepts both equally
+VARIANT_EXTENSIONS = (('br', '.br'), ('gzip', '.gz'))
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+
+def brotli_module():
+    """The brotli package, or None when it is not installed"""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def is_compressible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encodings, offered):
+    """Best of the offered encodings for a parsed Accept-Encoding header, or None"""
+    return accept_encodings.best_match([name for name, _ in VARIANT_EXTENSIONS if name in offered])
+
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli_module().compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class CompressedCache:
+    """Bounded LRU of compressed bodies keyed by (etag, encoding)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def compress_payload(data, accept_encodings, etag=None):
+    """Compress a body for the client if it is worth it; returns (body, encoding or None)"""
+    config = current_app.config
+    if len(data) < config['COMPRESS_MIN_SIZE']:
+        return data, None
+    encoding = choose_encoding(accept_encodings, current_app.extensions['compression_encodings'])
+    if encoding is None:
+        return data, None
+
+    cache = current_app.extensions.get('compressed_cache')
+    key = (etag, encoding)
+    body = cache.get(key) if cache is not None and etag else None
+    if body is None:
+        level = config['COMPRESS_BROTLI_QUALITY'] if encoding == 'br' else config['COMPRESS_GZIP_LEVEL']
+        body = compress(data, encoding, level)
+        if cache is not None and etag:
+            cache.put(key, body)
+    return body, encoding
+
+
+def _compress_response(response):
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code != 200 or not is_compressible(response.mimetype):
+        return response
+
+    data = response.get_data()
+    if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    response.vary.add('Accept-Encoding')
+
+    etag, weak = response.get_etag()
+    body, encoding = compress_payload(data, request.accept_encodings, etag)
+    if encoding is None:
+        return response
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag and not weak:
+        # A strong ETag must change with the bytes; the weak form stays valid across encodings
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Compress large dynamic responses; register before init_http_cache so ETags/304s run first"""
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+    app.config.setdefault('COMPRESS_CACHE_MAX_ENTRIES', 256)
+
+    app.extensions['compression_encodings'] = ('br', 'gzip') if brotli_module() else ('gzip',)
+    app.extensions['compressed_cache'] = None
+    if app.config['COMPRESS_ENABLED']:
+        app.extensions['compressed_cache'] = CompressedCache(app.config['COMPRESS_CACHE_MAX_ENTRIES'])
+        app.after_request(_compress_response)
+
+
+def build_static_variants(static_dir=DEFAULT_STATIC_DIR, output_dir=DEFAULT_COMPRESSED_DIR,
+                          gzip_level=9, brotli_quality=11):
+    """Write .gz/.br copies of compressible static files; returns {variant path: (original, compressed) sizes}"""
+    import mimetypes
+
+    from utils.http_cache import StaticManifest
+
+    manifest = StaticManifest(static_dir)
+    encodings = [(name, ext) for name, ext in VARIANT_EXTENSIONS if name == 'gzip' or brotli_module()]
+    written = {}
+    for filename, hashed in manifest.hashed.items():
+        if not is_compressible(mimetypes.guess_type(filename)[0]):
+            continue
+        with open(os.path.join(static_dir, filename), 'rb') as f:
+            data = f.read()
+        for encoding, ext in encodings:
+            body = compress(data, encoding, brotli_quality if encoding == 'br' else gzip_level)
+            if len(body) >= len(data):
+                continue
+            path = os.path.join(output_dir, hashed + ext)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(body)
+            written[path] = (len(data), len(body))
+
+    # Variants of earlier versions of a file are never served again
+    for root, _, files in os.walk(output_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if path not in written:
+                os.remove(path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build pre-compressed variants of the static assets.')
+    parser.add_argument('--static-dir', default=DEFAULT_STATIC_DIR)
+    parser.add_argument('--output-dir', default=DEFAULT_COMPRESSED_DIR)
+    parser.add_argument('--gzip-level', type=int, default=9)
+    parser.add_argument('--brotli-quality', type=int, default=11)
+    args = parser.parse_args(argv)
+
+    if brotli_module() is None:
+        print('brotli is not installed; building gzip variants only')
+    written = build_static_variants(args.static_dir, args.output_dir, args.gzip_level, args.brotli_quality)
+    for path, (original, compressed) in sorted(written.items()):
+        print(f'{os.path.relpath(path, args.output_dir)}: {original} -> {compressed} bytes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""Push channel for the admin dashboard (Server-Sent Events).
+
+Admin routes publish an event once their change is committed (the admin
+roster changed, a user was added or deleted) and every open dashboard
+receives it on its /admin/stream EventSource, instead of polling
+/admin-check and /admin/users.
+
+Events cross workers on a bus selected by EVENTS_BACKEND:
+
+  * sqlite - an append-only table in a WAL-mode SQLite file shared by every
+    worker on the host (EVENTS_SQLITE_PATH, next to the app database by
+    default); listeners read new rows every EVENTS_POLL_INTERVAL seconds
+  * redis  - Redis pub/sub at EVENTS_REDIS_URL, or an in-process LocalBus
+    stand-in when no URL is set (single process only)
+  * local  - the in-process LocalBus
+
+Each worker has one Broker with a single listener thread, started when the
+first stream subscribes and idle while there are none. It decodes each
+event once, formats the SSE frame once and appends that frame to every
+local subscription's queue, so the bus costs the same for one dashboard as
+for a thousand. An idle stream is a short queue plus a waiter that wakes
+every EVENTS_HEARTBEAT seconds to send a keepalive comment. A stream that
+falls EVENTS_QUEUE_SIZE frames behind is closed; the browser reconnects and
+starts again from a fresh snapshot.
+
+Under the ASGI entry point streams are coroutines (asgi.py). Under a
+threaded WSGI server each stream holds a worker thread, so at most
+EVENTS_MAX_BLOCKING_STREAMS are served per process.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from flask import current_app
+
+from utils.metrics import REGISTRY, Counter
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_FRAME = b': keepalive\n\n'
+
+admin_events = Counter('admin_events_total', 'Admin dashboard events by event and stage', ('event', 'stage'))
+REGISTRY.append(admin_events)
+
+
+def sse_frame(event, data):
+    """One Server-Sent Events message; `data` is already JSON text"""
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+class StreamLimitReached(Exception):
+    pass
+
+
+class LocalBus:
+    """In-process bus; publishers and the listener share one deque"""
+
+    def __init__(self, backlog=1000):
+        self._messages = deque(maxlen=backlog)
+        self._ready = threading.Condition()
+
+    def publish(self, message):
+        with self._ready:
+            self._messages.append(message)
+            self._ready.notify()
+
+    def listen(self, wait_active):
+        while True:
+            waited = wait_active()
+            with self._ready:
+                if waited:
+                    self._messages.clear()
+                while not self._messages:
+                    self._ready.wait()
+                message = self._messages.popleft()
+            yield message
+
+
+class SQLiteBus:
+    """Events as rows in a shared SQLite file; every worker tails the table"""
+
+    def __init__(self, path, poll_interval=0.25, retention=300):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "created REAL NOT NULL, message TEXT NOT NULL)")
+
+    def _conn(self):
+        # One connection per thread, reopened after a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def publish(self, message):
+        now = time.time()
+        conn = self._conn()
+        conn.execute("INSERT INTO events (created, message) VALUES (?, ?)", (now, message))
+        if now - self._last_cleanup > self.retention:
+            self._last_cleanup = now
+            conn.execute("DELETE FROM events WHERE created < ?", (now - self.retention,))
+
+    def listen(self, wait_active):
+        last_id = None
+        while True:
+            if wait_active() or last_id is None:
+                # Nobody was listening; new streams start from a snapshot, so skip the backlog
+                last_id = self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            rows = self._conn().execute("SELECT id, message FROM events WHERE id > ? ORDER BY id",
+                                        (last_id,)).fetchall()
+            for last_id, message in rows:
+                yield message
+            time.sleep(self.poll_interval)
+
+
+class RedisBus:
+    """Redis pub/sub on one channel"""
+
+    def __init__(self, client, channel='admin-events'):
+        self.client = client
+        self.channel = channel
+
+    def publish(self, message):
+        self.client.publish(self.channel, message)
+
+    def listen(self, wait_active):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        for message in pubsub.listen():
+            data = message['data']
+            yield data.decode() if isinstance(data, bytes) else data
+
+
+class Subscription:
+    """Pending frames for a stream served on a WSGI thread"""
+
+    blocking = True
+
+    def __init__(self, max_frames=100):
+        self.max_frames = max_frames
+        self.dropped = False
+        self._frames = deque()
+        self._ready = threading.Condition()
+
+    def put(self, frame):
+        with self._ready:
+            if len(self._frames) >= self.max_frames:
+                self.dropped = True
+            else:
+                self._frames.append(frame)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """The next frame, or None after `timeout` seconds without one"""
+        with self._ready:
+            if not self._frames and not self.dropped:
+                self._ready.wait(timeout)
+            return self._frames.popleft() if self._frames and not self.dropped else None
+
+
+class AsyncSubscription:
+    """Pending frames for a stream served on an event loop"""
+
+    blocking = False
+
+    def __init__(self, max_frames=100, loop=None):
+        self.dropped = False
+        self._loop = loop or asyncio.get_running_loop()
+        self._frames = asyncio.Queue(max_frames)
+
+    def put(self, frame):
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, frame)
+        except RuntimeError:
+            # The loop has shut down
+            self.dropped = True
+
+    def _deliver(self, frame):
+        try:
+            self._frames.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped = True
+
+    async def get(self):
+        return await self._frames.get()
+
+
+class Broker:
+    """Publishes to the bus and fans bus messages out to this worker's streams"""
+
+    def __init__(self, bus, max_blocking_streams=None):
+        self.bus = bus
+        self.max_blocking_streams = max_blocking_streams
+        self._subscriptions = set()
+        self._active = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def publish(self, event, data):
+        self.bus.publish(json.dumps({'event': event, 'data': data}))
+        admin_events.inc((event, 'published'))
+
+    def subscribe(self, subscription):
+        with self._active:
+            if subscription.blocking and self.max_blocking_streams is not None:
+                blocking = sum(1 for s in self._subscriptions if s.blocking)
+                if blocking >= self.max_blocking_streams:
+                    raise StreamLimitReached(f"{blocking} streams already open in this worker")
+            self._subscriptions.add(subscription)
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='events-broker', daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+            self._active.notify()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._active:
+            self._subscriptions.discard(subscription)
+
+    def stream_count(self):
+        with self._active:
+            return len(self._subscriptions)
+
+    def _wait_active(self):
+        """Block while nobody is subscribed; True if it had to wait"""
+        with self._active:
+            waited = False
+            while not self._subscriptions:
+                waited = True
+                self._active.wait()
+            return waited
+
+    def _run(self):
+        while True:
+            try:
+                for message in self.bus.listen(self._wait_active):
+                    self._fan_out(message)
+            except Exception as e:
+                logger.error(f"Event listener failed, restarting: {e}")
+                time.sleep(1)
+
+    def _fan_out(self, message):
+        decoded = json.loads(message)
+        event = decoded['event']
+        frame = sse_frame(event, json.dumps(decoded['data']))
+        with self._active:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(frame)
+        admin_events.inc((event, 'delivered'), len(subscriptions))
+
+
+def default_sqlite_path(app):
+    """events.db beside the app's SQLite database, else in the instance folder"""
+    from utils.sessions import default_sqlite_path as sessions_path
+
+    return os.path.join(os.path.dirname(sessions_path(app)), 'events.db')
+
+
+def get_broker():
+    return current_app.extensions.get('events')
+
+
+def publish_event(event, data):
+    """Publish to every dashboard; never fails the request that made the change"""
+    broker = get_broker()
+    if broker is None:
+        return
+    try:
+        broker.publish(event, data)
+    except Exception as e:
+        current_app.logger.warning(f"Could not publish {event} event: {e}")
+
+
+def init_events(app):
+    """Set up this worker's broker on the configured bus"""
+    app.config.setdefault('EVENTS_BACKEND', 'sqlite')
+    app.config.setdefault('EVENTS_SQLITE_PATH', default_sqlite_path(app))
+    app.config.setdefault('EVENTS_REDIS_URL', None)
+    app.config.setdefault('EVENTS_POLL_INTERVAL', 0.25)
+    app.config.setdefault('EVENTS_HEARTBEAT', 15)
+    app.config.setdefault('EVENTS_QUEUE_SIZE', 100)
+    app.config.setdefault('EVENTS_STREAM_LIFETIME', 600)
+    app.config.setdefault('EVENTS_MAX_BLOCKING_STREAMS', 2)
+
+    backend = app.config['EVENTS_BACKEND']
+    if backend == 'sqlite':
+        bus = SQLiteBus(app.config['EVENTS_SQLITE_PATH'], app.config['EVENTS_POLL_INTERVAL'])
+    elif backend == 'redis' and app.config['EVENTS_REDIS_URL']:
+        import redis
+        bus = RedisBus(redis.Redis.from_url(app.config['EVENTS_REDIS_URL']))
+    elif backend in ('redis', 'local'):
+        bus = LocalBus()
+    else:
+        raise ValueError(f"Unknown EVENTS_BACKEND {backend!r}")
+
+    broker = Broker(bus, app.config['EVENTS_MAX_BLOCKING_STREAMS'])
+    app.extensions['events'] = broker
+    return broker
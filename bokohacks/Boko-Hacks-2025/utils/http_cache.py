@@ -0,0 +1,125 @@
+"""HTTP caching: weak ETags for rendered pages and fingerprinted static assets.
+
+Every 200 HTML response to a GET gets a weak ETag (unless the view already
+set one) and is answered with 304 when it matches If-None-Match. Pages
+rendered through render_cached() carry an ETag derived from their cache
+key, so they can be answered with 304 before anything is rendered.
+
+Static files are fingerprinted at startup: url_for('static', filename=
+'js/401k.js') produces /static/js/401k.<hash>.js, which is served with a
+year-long immutable Cache-Control. The plain file names keep working and
+are revalidated with ETags as before. static_urls() gives templates the
+same mapping for scripts that build static paths in JavaScript.
+
+When `python -m utils.compression` has built .br/.gz variants into
+STATIC_COMPRESSED_DIR, both kinds of name are served from the variant the
+client's Accept-Encoding prefers.
+"""
+
+import hashlib
+import mimetypes
+import os
+
+from flask import current_app, request, send_file, send_from_directory, url_for
+
+from utils.compression import DEFAULT_COMPRESSED_DIR, VARIANT_EXTENSIONS, choose_encoding
+
+STATIC_HASH_LENGTH = 10
+
+
+class StaticManifest:
+    """Content-hashed names for every file under the static folder, and their compressed variants"""
+
+    def __init__(self, static_folder, compressed_dir=None):
+        self.hashed = {}
+        self.original = {}
+        self.variants = {}
+        digest = hashlib.sha1()
+        for root, _, files in os.walk(static_folder):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    file_hash = hashlib.sha256(f.read()).hexdigest()[:STATIC_HASH_LENGTH]
+                stem, ext = os.path.splitext(filename)
+                hashed = f'{stem}.{file_hash}{ext}'
+                self.hashed[filename] = hashed
+                self.original[hashed] = filename
+                digest.update(hashed.encode())
+                if compressed_dir:
+                    variants = {encoding: os.path.join(compressed_dir, hashed + suffix)
+                                for encoding, suffix in VARIANT_EXTENSIONS}
+                    variants = {encoding: v for encoding, v in variants.items() if os.path.isfile(v)}
+                    if variants:
+                        self.variants[filename] = variants
+        # Changes whenever any asset does; part of the rendered-page cache key and ETag
+        self.version = digest.hexdigest()[:12]
+
+
+def _fingerprint_url(endpoint, values):
+    if endpoint != 'static' or current_app.debug:
+        return
+    manifest = current_app.extensions['static_manifest']
+    values['filename'] = manifest.hashed.get(values.get('filename'), values.get('filename'))
+
+
+def _serve_static(filename):
+    manifest = current_app.extensions['static_manifest']
+    original = manifest.original.get(filename)
+    immutable = original is not None
+    original = original or filename
+    max_age = current_app.config['STATIC_MAX_AGE'] if immutable else None
+
+    variants = manifest.variants.get(original)
+    encoding = choose_encoding(request.accept_encodings, variants) if variants else None
+    if encoding:
+        response = send_file(variants[encoding], mimetype=mimetypes.guess_type(original)[0], max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(current_app.static_folder, original, max_age=max_age)
+    if variants:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+
+def static_urls():
+    """Map of /static/<name> paths to their fingerprinted URLs, for use from JavaScript"""
+    manifest = current_app.extensions.get('static_manifest')
+    if manifest is None:
+        return {}
+    return {f'{current_app.static_url_path}/{name}': url_for('static', filename=name) for name in manifest.hashed}
+
+
+def _conditional_page(response):
+    if request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.get_etag()[0] is None:
+        if response.mimetype != 'text/html':
+            return response
+        response.add_etag(weak=True)
+    return response.make_conditional(request)
+
+
+def init_http_cache(app):
+    """Add page ETags/304s and serve fingerprinted static files"""
+    app.config.setdefault('HTTP_CACHE_ETAGS', True)
+    app.config.setdefault('STATIC_FINGERPRINT', True)
+    app.config.setdefault('STATIC_MAX_AGE', 365 * 24 * 3600)
+    app.config.setdefault('STATIC_COMPRESSED_DIR', DEFAULT_COMPRESSED_DIR)
+
+    if app.config['HTTP_CACHE_ETAGS']:
+        app.after_request(_conditional_page)
+
+    app.extensions['static_manifest'] = None
+    if app.static_folder and os.path.isdir(app.static_folder):
+        app.extensions['static_manifest'] = StaticManifest(app.static_folder, app.config['STATIC_COMPRESSED_DIR'])
+        app.view_functions['static'] = _serve_static
+        if app.config['STATIC_FINGERPRINT']:
+            app.url_defaults(_fingerprint_url)
+
+    app.jinja_env.globals['static_urls'] = static_urls
@@ -0,0 +1,94 @@
+import logging
+import os
+
+from flask import current_app, g, request, session
+
+from utils.captcha.challenge import verify_captcha_answer
+from utils.intrusion.artifacts import LEGACY_MODEL_FILENAME, MANIFEST_FILENAME
+from utils.intrusion.features import DEFAULT_IP_REPUTATION, browser_type_from_user_agent
+from utils.intrusion.scorer import DEFAULT_MODEL_DIR, IntrusionScorer
+from utils.login_stats import client_ip, get_login_stats, normalize_username
+
+security_logger = logging.getLogger('security')
+
+
+def init_scorer(app):
+    """Attach the intrusion scorer to the app; the model itself loads on first use"""
+    app.config.setdefault('INTRUSION_MODEL_DIR', os.environ.get('INTRUSION_MODEL_DIR', DEFAULT_MODEL_DIR))
+    app.config.setdefault('INTRUSION_SCORE_THRESHOLD', 0.5)
+    app.config.setdefault('INTRUSION_BATCH_SIZE', 64)
+    app.config.setdefault('INTRUSION_BATCH_WAIT_MS', 2.0)
+    app.config.setdefault('INTRUSION_DEFAULT_IP_REPUTATION', DEFAULT_IP_REPUTATION)
+
+    model_dir = app.config['INTRUSION_MODEL_DIR']
+    scorer = None
+    if any(os.path.exists(os.path.join(model_dir, name)) for name in (MANIFEST_FILENAME, LEGACY_MODEL_FILENAME)):
+        scorer = IntrusionScorer(
+            model_dir,
+            max_batch_size=app.config['INTRUSION_BATCH_SIZE'],
+            max_wait_ms=app.config['INTRUSION_BATCH_WAIT_MS'],
+        )
+    else:
+        # Scoring is advisory: a missing model must not stop the app
+        app.logger.warning(f"Intrusion scoring disabled: no model artifacts in {model_dir}")
+
+    app.extensions['intrusion_scorer'] = scorer
+    app.after_request(_add_server_timing)
+    return scorer
+
+
+def get_scorer():
+    return current_app.extensions.get('intrusion_scorer')
+
+
+def score_login_attempt(username):
+    """Score the current login request, returning None when scoring is unavailable"""
+    scorer = get_scorer()
+    if scorer is None:
+        return None
+
+    login_attempts, failed_logins = get_login_stats().feature_counts(normalize_username(username), client_ip())
+    try:
+        result = scorer.score(
+            current_app.config['INTRUSION_DEFAULT_IP_REPUTATION'],
+            login_attempts,
+            failed_logins,
+            browser_type_from_user_agent(request.headers.get('User-Agent', '')),
+        )
+    except Exception as e:
+        current_app.logger.error(f"Intrusion scoring failed: {e}")
+        return None
+
+    g.intrusion_score = result
+    return result
+
+
+def captcha_required(result):
+    """Gate a login behind the captcha once the model score crosses the threshold"""
+    if result is not None and result.score >= current_app.config['INTRUSION_SCORE_THRESHOLD']:
+        session['login_captcha_required'] = True
+    return session.get('login_captcha_required', False)
+
+
+def check_login_captcha(captcha_response, captcha_token):
+    """Validate and spend the captcha challenge for a gated login"""
+    return verify_captcha_answer(captcha_token, captcha_response)
+
+
+def record_login_result(username, success):
+    """Feed the outcome back into the per-user and per-IP counters"""
+    username = normalize_username(username)
+    get_login_stats().record(username, client_ip(), failed=not success)
+    result = g.get('intrusion_score')
+    security_logger.info(f"Login {'succeeded' if success else 'failed'} for {username!r} from {client_ip()}"
+                         + (f" (intrusion score {result.score:.3f})" if result is not None else ''))
+    if success:
+        get_login_stats().clear('user', username)
+        session.pop('login_captcha_required', None)
+
+
+def _add_server_timing(response):
+    result = g.get('intrusion_score')
+    if result is not None:
+        response.headers.add('Server-Timing', f'intrusion;dur={result.latency_ms:.3f}')
+    return response
@@ -0,0 +1,152 @@
+"""Native model artifacts and a shared, checksum-verified model registry.
+
+    python -m utils.intrusion.artifacts export "training model"
+
+Export turns the legacy xgb_model.pkl / encoder.pkl pair into XGBoost's own
+UBJSON (or JSON) booster format plus a plain JSON manifest holding the
+preprocessing parameters and the booster's sha256. Loading a manifest never
+unpickles anything and does not import scikit-learn.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import threading
+from datetime import datetime, timezone
+
+from utils.intrusion.features import FeatureEncoder
+
+MANIFEST_FILENAME = 'manifest.json'
+MANIFEST_FORMAT_VERSION = 1
+LEGACY_MODEL_FILENAME = 'xgb_model.pkl'
+LEGACY_ENCODER_FILENAME = 'encoder.pkl'
+
+
+def write_artifacts(output_dir, booster, categories, drop_first=True, fmt='ubj', extra=None):
+    """Save a booster in native format next to a manifest describing it"""
+    import xgboost
+
+    os.makedirs(output_dir, exist_ok=True)
+    model_file = f'intrusion_model.{fmt}'
+    model_path = os.path.join(output_dir, model_file)
+    booster.save_model(model_path)
+
+    with open(model_path, 'rb') as f:
+        checksum = hashlib.sha256(f.read()).hexdigest()
+
+    encoder = FeatureEncoder(categories, drop_first=drop_first)
+    manifest = {
+        'format_version': MANIFEST_FORMAT_VERSION,
+        'model_file': model_file,
+        'sha256': checksum,
+        'feature_names': encoder.feature_names,
+        'preprocessing': {'browser_categories': encoder.categories, 'drop_first': drop_first},
+        'xgboost_version': xgboost.__version__,
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+    manifest.update(extra or {})
+    with open(os.path.join(output_dir, MANIFEST_FILENAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_legacy(model_dir):
+    """Unpickle xgb_model.pkl / encoder.pkl (trusted local files only)"""
+    import joblib  # encoder.pkl was written with joblib
+
+    with open(os.path.join(model_dir, LEGACY_MODEL_FILENAME), 'rb') as f:
+        model = pickle.load(f)
+    encoder = joblib.load(os.path.join(model_dir, LEGACY_ENCODER_FILENAME))
+
+    booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    return booster, FeatureEncoder.from_sklearn(encoder)
+
+
+def export_legacy(model_dir, output_dir=None, fmt='ubj'):
+    """Convert the pickled artifacts in model_dir into native format"""
+    booster, encoder = load_legacy(model_dir)
+    return write_artifacts(output_dir or model_dir, booster, encoder.categories, encoder.drop_first, fmt=fmt,
+                           extra={'source': LEGACY_MODEL_FILENAME})
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded boosters keyed by artifact checksum.
+
+    The first caller for a model directory reads the manifest, verifies the
+    booster file against its sha256 and loads it; every later caller (other
+    app instances, the batch CLI, forked workers when the app is preloaded)
+    gets the same Booster object back.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_checksum = {}
+        self._by_dir = {}
+
+    def get(self, model_dir):
+        """Return (booster, FeatureEncoder) for model_dir, loading it on first use"""
+        key = os.path.realpath(model_dir)
+        entry = self._by_dir.get(key)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            entry = self._by_dir.get(key)
+            if entry is None:
+                entry = self._load(key)
+                self._by_dir[key] = entry
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._by_checksum.clear()
+            self._by_dir.clear()
+
+    def _load(self, model_dir):
+        manifest_path = os.path.join(model_dir, MANIFEST_FILENAME)
+        if not os.path.exists(manifest_path):
+            return load_legacy(model_dir)
+
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != MANIFEST_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model manifest version: {manifest.get('format_version')}")
+
+        with open(os.path.join(model_dir, manifest['model_file']), 'rb') as f:
+            raw = f.read()
+        checksum = hashlib.sha256(raw).hexdigest()
+        if checksum != manifest['sha256']:
+            raise ValueError(f"Checksum mismatch for {manifest['model_file']}: refusing to load")
+
+        preprocessing = manifest['preprocessing']
+        encoder = FeatureEncoder(preprocessing['browser_categories'], drop_first=preprocessing['drop_first'])
+        booster = self._by_checksum.get(checksum)
+        if booster is None:
+            import xgboost
+
+            booster = xgboost.Booster()
+            booster.load_model(bytearray(raw))
+            self._by_checksum[checksum] = booster
+        return booster, encoder
+
+
+registry = ModelRegistry()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage intrusion model artifacts.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export = subparsers.add_parser('export', help='Convert xgb_model.pkl/encoder.pkl to native format')
+    export.add_argument('model_dir', help='Directory holding the pickled artifacts')
+    export.add_argument('--output-dir', default=None, help='Defaults to model_dir')
+    export.add_argument('--format', choices=['ubj', 'json'], default='ubj')
+    args = parser.parse_args(argv)
+
+    manifest = export_legacy(args.model_dir, args.output_dir, fmt=args.format)
+    print(f"Wrote {manifest['model_file']} (sha256 {manifest['sha256'][:12]}) and {MANIFEST_FILENAME}")
+
+
+if __name__ == '__main__':
+    main()
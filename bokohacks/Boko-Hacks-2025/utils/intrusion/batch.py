@@ -0,0 +1,167 @@
+"""Stream-score intrusion session logs with the trained model.
+
+    python -m utils.intrusion.batch sessions.csv -o scores.csv
+    python -m utils.intrusion.batch sessions.parquet -o scores.parquet --workers 8
+
+Input is read in fixed-size chunks, encoded with NumPy and scored on a
+thread pool (XGBoost releases the GIL while predicting). At most
+2 * workers chunks are in flight, so memory stays bounded regardless of
+input size, and results are appended to the output in input order.
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.intrusion.features import CATEGORICAL_FEATURE, DEFAULT_IP_REPUTATION, NUMERIC_FEATURES
+from utils.intrusion.scorer import DEFAULT_MODEL_DIR, load_model
+
+INPUT_COLUMNS = NUMERIC_FEATURES + [CATEGORICAL_FEATURE]
+
+
+def _is_parquet(path):
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def iter_chunks(path, chunk_size, id_column):
+    """Yield dicts of column -> NumPy array, chunk_size rows at a time"""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        columns = [c for c in INPUT_COLUMNS + [id_column] if c in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield {name: batch.column(name).to_numpy(zero_copy_only=False) for name in batch.schema.names}
+        return
+
+    import pandas as pd
+
+    wanted = set(INPUT_COLUMNS + [id_column])
+    reader = pd.read_csv(path, chunksize=chunk_size, usecols=lambda c: c in wanted)
+    for frame in reader:
+        yield {name: frame[name].to_numpy() for name in frame.columns}
+
+
+def encode_chunk(encoder, chunk):
+    """Vectorized preprocessing of one chunk into the model's feature matrix"""
+    n_rows = len(next(iter(chunk.values())))
+    browser = chunk.get(CATEGORICAL_FEATURE)
+    if browser is None:
+        browser = np.full(n_rows, 'Unknown', dtype=object)
+    return encoder.transform(
+        np.nan_to_num(chunk.get('ip_reputation_score', np.full(n_rows, DEFAULT_IP_REPUTATION)).astype(np.float32),
+                      nan=DEFAULT_IP_REPUTATION),
+        np.nan_to_num(chunk['login_attempts'].astype(np.float32)),
+        np.nan_to_num(chunk['failed_logins'].astype(np.float32)),
+        browser,
+    )
+
+
+class ResultWriter:
+    """Append scored chunks to CSV or Parquet without holding earlier chunks"""
+
+    def __init__(self, path, id_column):
+        self.path = path
+        self.id_column = id_column
+        self._parquet_writer = None
+        self._csv_file = None
+
+    def write(self, ids, scores):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table({self.id_column: ids, 'attack_score': scores})
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+            return
+
+        if self._csv_file is None:
+            self._csv_file = open(self.path, 'w', newline='')
+            self._csv_file.write(f'{self.id_column},attack_score\n')
+        self._csv_file.writelines(f'{i},{s:.6f}\n' for i, s in zip(ids, scores))
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+
+def score_file(input_path, output_path, model_dir=DEFAULT_MODEL_DIR, chunk_size=100_000,
+               workers=None, id_column='session_id', progress=sys.stderr):
+    """Score input_path into output_path, returning (rows, seconds)"""
+    workers = workers or os.cpu_count() or 1
+    shared_booster, encoder = load_model(model_dir)
+    # One predict thread per chunk; keep XGBoost itself single-threaded to avoid oversubscription.
+    # The registry's booster is shared with online scoring, so change a private copy.
+    booster = shared_booster.copy()
+    booster.set_param({'nthread': 1})
+
+    def score(chunk):
+        matrix = encode_chunk(encoder, chunk)
+        ids = chunk.get(id_column)
+        if ids is None:
+            ids = np.arange(len(matrix))
+        return ids, np.clip(booster.inplace_predict(matrix), 0.0, 1.0)
+
+    writer = ResultWriter(output_path, id_column)
+    rows = 0
+    started = time.perf_counter()
+    in_flight = deque()
+
+    def drain_one():
+        nonlocal rows
+        ids, scores = in_flight.popleft().result()
+        writer.write(ids, scores)
+        rows += len(scores)
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress.write(f'\r{rows:,} rows  {rows / elapsed:,.0f} rows/s')
+            progress.flush()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            offset = 0
+            for chunk in iter_chunks(input_path, chunk_size, id_column):
+                if id_column not in chunk:
+                    n_rows = len(next(iter(chunk.values())))
+                    chunk[id_column] = np.arange(offset, offset + n_rows)
+                    offset += n_rows
+                in_flight.append(pool.submit(score, chunk))
+                if len(in_flight) >= 2 * workers:
+                    drain_one()
+            while in_flight:
+                drain_one()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    if progress is not None:
+        progress.write('\n')
+    return rows, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batch-score intrusion session logs (CSV or Parquet).')
+    parser.add_argument('input', help='CSV or Parquet file in cybersecurity_intrusion_data.csv layout')
+    parser.add_argument('-o', '--output', required=True, help='Destination .csv or .parquet file')
+    parser.add_argument('--model-dir', default=DEFAULT_MODEL_DIR, help='Directory holding the model artifacts')
+    parser.add_argument('--chunk-size', type=int, default=100_000, help='Rows per chunk (bounds memory use)')
+    parser.add_argument('--workers', type=int, default=None, help='Scoring threads (default: all cores)')
+    parser.add_argument('--id-column', default='session_id', help='Column copied to the output for joining')
+    args = parser.parse_args(argv)
+
+    rows, elapsed = score_file(args.input, args.output, model_dir=args.model_dir, chunk_size=args.chunk_size,
+                               workers=args.workers, id_column=args.id_column)
+    print(f'Scored {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
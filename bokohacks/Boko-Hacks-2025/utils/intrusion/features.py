@@ -0,0 +1,76 @@
+# numpy is imported inside the encoder methods so the app can boot without loading it
+
+# Column order the shipped XGBoost model was trained on
+NUMERIC_FEATURES = ['ip_reputation_score', 'login_attempts', 'failed_logins']
+CATEGORICAL_FEATURE = 'browser_type'
+
+# Categories seen by encoder.pkl (OneHotEncoder(drop='first', handle_unknown='ignore'))
+DEFAULT_BROWSER_CATEGORIES = ['Chrome', 'Edge', 'Firefox', 'Safari', 'Unknown']
+
+# Neutral reputation when nothing is known about an address (dataset mean)
+DEFAULT_IP_REPUTATION = 0.33
+
+
+def browser_type_from_user_agent(user_agent):
+    """Map a raw User-Agent string onto the browser categories used in training"""
+    if not user_agent:
+        return 'Unknown'
+    # Order matters: Edge and Chrome UAs also advertise Chrome/Safari
+    if 'Edg/' in user_agent or 'Edge/' in user_agent:
+        return 'Edge'
+    if 'Firefox/' in user_agent:
+        return 'Firefox'
+    if 'Chrome/' in user_agent or 'CriOS/' in user_agent:
+        return 'Chrome'
+    if 'Safari/' in user_agent:
+        return 'Safari'
+    return 'Unknown'
+
+
+class FeatureEncoder:
+    """Vectorized replacement for the pickled OneHotEncoder + raw numeric columns"""
+
+    def __init__(self, categories=None, drop_first=True):
+        self.categories = list(categories or DEFAULT_BROWSER_CATEGORIES)
+        self.drop_first = drop_first
+        encoded = self.categories[1:] if drop_first else self.categories
+        self.one_hot_columns = [f'{CATEGORICAL_FEATURE}_{c}' for c in encoded]
+        self.feature_names = NUMERIC_FEATURES + self.one_hot_columns
+        # Category -> output column; dropped and unknown categories map to -1 (all zeros)
+        offset = 1 if drop_first else 0
+        self._column_index = {c: i - offset for i, c in enumerate(self.categories)}
+
+    @classmethod
+    def from_sklearn(cls, encoder):
+        """Build from a fitted sklearn OneHotEncoder (as stored in encoder.pkl)"""
+        drop = getattr(encoder, 'drop', None)
+        return cls(categories=list(encoder.categories_[0]), drop_first=drop == 'first')
+
+    def transform(self, ip_reputation_score, login_attempts, failed_logins, browser_type):
+        """Encode equally sized columns into a float32 matrix in model column order"""
+        import numpy as np
+
+        browser_type = np.asarray(browser_type, dtype=object)
+        n_rows = len(browser_type)
+        matrix = np.zeros((n_rows, len(self.feature_names)), dtype=np.float32)
+        matrix[:, 0] = ip_reputation_score
+        matrix[:, 1] = login_attempts
+        matrix[:, 2] = failed_logins
+
+        if self.one_hot_columns and n_rows:
+            # Factorize once, then scatter ones with a single fancy-index assignment
+            uniques, inverse = np.unique(browser_type.astype(str), return_inverse=True)
+            lookup = np.array([self._column_index.get(u, -1) for u in uniques], dtype=np.intp)
+            columns = lookup[inverse]
+            hit = columns >= 0
+            matrix[np.nonzero(hit)[0], len(NUMERIC_FEATURES) + columns[hit]] = 1.0
+
+        return matrix
+
+    def transform_rows(self, rows):
+        """Encode a list of (ip_reputation_score, login_attempts, failed_logins, browser_type)"""
+        if not rows:
+            import numpy as np
+            return np.zeros((0, len(self.feature_names)), dtype=np.float32)
+        ip_rep, attempts, failed, browser = zip(*rows)
+        return self.transform(ip_rep, attempts, failed, browser)
@@ -0,0 +1,158 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from utils.intrusion.artifacts import LEGACY_ENCODER_FILENAME, LEGACY_MODEL_FILENAME, registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'training model')
+# Kept for callers that still write the legacy pickle pair
+MODEL_FILENAME = LEGACY_MODEL_FILENAME
+ENCODER_FILENAME = LEGACY_ENCODER_FILENAME
+
+
+def load_model(model_dir):
+    """Return (booster, FeatureEncoder) for model_dir via the shared registry"""
+    return registry.get(model_dir)
+
+
+class ScoreResult(NamedTuple):
+    score: float
+    latency_ms: float
+    batch_size: int
+
+
+class _Pending:
+    __slots__ = ('row', 'enqueued_at', 'done', 'result', 'error')
+
+    def __init__(self, row):
+        self.row = row
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class IntrusionScorer:
+    """Micro-batching wrapper around the trained XGBoost booster.
+
+    Request threads call score(); a single worker thread drains whatever is
+    queued (up to max_batch_size, waiting at most max_wait_ms for stragglers)
+    and runs one vectorized predict for the whole batch.
+    """
+
+    def __init__(self, model_dir, max_batch_size=64, max_wait_ms=2.0, latency_window=1024):
+        self.model_dir = model_dir
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._latencies = deque(maxlen=latency_window)
+        self._scored = 0
+        self._batches = 0
+        self._lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+    @property
+    def model(self):
+        """(booster, encoder), loaded lazily on first use and shared process-wide"""
+        return load_model(self.model_dir)
+
+    def warm(self):
+        """Load the model now, e.g. in a server master process before forking workers"""
+        self.model
+
+    def _ensure_worker(self):
+        # Threads do not survive fork, so each worker process starts its own batcher
+        if self._worker_pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker_pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._worker = threading.Thread(target=self._run, name='intrusion-scorer', daemon=True)
+                self._worker.start()
+                self._worker_pid = os.getpid()
+
+    def score(self, ip_reputation_score, login_attempts, failed_logins, browser_type, timeout=1.0):
+        """Score a single login attempt; blocks until its batch has been predicted"""
+        # Resolve the lazy model here so a cold load does not eat into the batching timeout
+        self.model
+        self._ensure_worker()
+        pending = _Pending((ip_reputation_score, login_attempts, failed_logins, browser_type))
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError('Intrusion scoring timed out')
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def predict_matrix(self, matrix):
+        """Score an already encoded feature matrix in one call"""
+        import numpy as np
+
+        if not len(matrix):
+            return np.zeros(0, dtype=np.float32)
+        booster, _ = self.model
+        return np.clip(booster.inplace_predict(matrix), 0.0, 1.0)
+
+    def stats(self):
+        """Latency percentiles over the most recent scored requests"""
+        import numpy as np
+
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            scored, batches = self._scored, self._batches
+
+        if not len(latencies):
+            return {'scored': scored, 'batches': batches}
+
+        p50, p95, p99 = (float(p) for p in np.percentile(latencies, [50, 95, 99]))
+        return {
+            'scored': scored,
+            'batches': batches,
+            'avg_batch_size': round(scored / batches, 2) if batches else 0,
+            'latency_ms': {'p50': round(p50, 3), 'p95': round(p95, 3), 'p99': round(p99, 3)},
+        }
+
+    def _collect_batch(self, work_queue):
+        batch = [work_queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(work_queue.get(timeout=remaining) if remaining > 0 else work_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        work_queue = self._queue
+        while True:
+            batch = self._collect_batch(work_queue)
+            try:
+                _, encoder = self.model
+                scores = self.predict_matrix(encoder.transform_rows([p.row for p in batch]))
+            except Exception as e:
+                logger.error(f"Intrusion scoring batch failed: {e}")
+                for pending in batch:
+                    pending.error = e
+                    pending.done.set()
+                continue
+
+            finished = time.perf_counter()
+            latencies = []
+            for pending, score in zip(batch, scores):
+                latency_ms = (finished - pending.enqueued_at) * 1000.0
+                pending.result = ScoreResult(float(score), latency_ms, len(batch))
+                latencies.append(latency_ms)
+                pending.done.set()
+
+            with self._lock:
+                self._latencies.extend(latencies)
+                self._scored += len(batch)
+                self._batches += 1
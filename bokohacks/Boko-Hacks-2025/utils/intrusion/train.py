@@ -0,0 +1,213 @@
+"""Reproducible training for the intrusion model (replaces dataanalysis.ipynb).
+
+    python -m utils.intrusion.train cybersecurity_intrusion_data.csv
+    python -m utils.intrusion.train data.csv --seed 7 --candidates 48 --promote
+
+The preprocessed feature matrix is cached by a hash of the input file, trees
+are built with the hist method, and the hyperparameter search is successive
+halving over boosting rounds (HalvingRandomSearchCV) on all cores. Every
+fit, whether a search candidate on one CV fold or the final refit, holds out
+part of its own training data and stops early against it, so candidates
+are ranked the same way the saved model is trained. The halving resource,
+n_estimators, is the cap on boosting rounds at each stage.
+
+Each run writes <output-dir>/<version>/ with the booster in native UBJSON
+format, its manifest.json and metrics.json; --promote also copies the
+booster and manifest over the ones the app loads.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import random
+import shutil
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from xgboost import XGBRegressor
+
+from utils.intrusion.artifacts import MANIFEST_FILENAME, write_artifacts
+from utils.intrusion.features import CATEGORICAL_FEATURE, NUMERIC_FEATURES, FeatureEncoder
+from utils.intrusion.scorer import DEFAULT_MODEL_DIR
+
+TARGET = 'attack_detected'
+# Bump when the feature layout changes so stale caches are not reused
+FEATURE_SPEC_VERSION = 1
+
+PARAM_DISTRIBUTIONS = {
+    'learning_rate': [0.01, 0.02, 0.05, 0.1],
+    'max_depth': [3, 5, 7, 9],
+    'subsample': [0.6, 0.8, 1.0],
+    'colsample_bytree': [0.6, 0.8, 1.0],
+    'min_child_weight': [1, 3, 5],
+}
+
+
+class EarlyStoppingRegressor(XGBRegressor):
+    """XGBRegressor that holds out validation_fraction of whatever it is fit on and stops early against it"""
+
+    def __init__(self, *, validation_fraction=0.1, **kwargs):
+        super().__init__(**kwargs)
+        self.validation_fraction = validation_fraction
+
+    def get_xgb_params(self):
+        params = super().get_xgb_params()
+        params.pop('validation_fraction', None)
+        return params
+
+    def fit(self, X, y, **kwargs):
+        from sklearn.model_selection import train_test_split
+
+        X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=self.validation_fraction,
+                                                      random_state=self.random_state, stratify=y)
+        return super().fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False, **kwargs)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_features(csv_path, cache_dir, data_hash):
+    """Return (X, y, browser_categories), reusing the cached matrix when the input is unchanged"""
+    import pandas as pd
+
+    cache_path = os.path.join(cache_dir, f'features-v{FEATURE_SPEC_VERSION}-{data_hash[:16]}.npz')
+    if os.path.exists(cache_path):
+        cached = np.load(cache_path, allow_pickle=False)
+        return cached['X'], cached['y'], cached['categories'].tolist()
+
+    frame = pd.read_csv(csv_path, usecols=NUMERIC_FEATURES + [CATEGORICAL_FEATURE, TARGET])
+    browser = frame[CATEGORICAL_FEATURE].fillna('Unknown').astype(str).to_numpy()
+
+    # Same category order OneHotEncoder(drop='first') would learn: sorted uniques
+    categories = np.unique(browser).tolist()
+    X = FeatureEncoder(categories, drop_first=True).transform(
+        frame['ip_reputation_score'].to_numpy(),
+        frame['login_attempts'].to_numpy(),
+        frame['failed_logins'].to_numpy(),
+        browser,
+    )
+    y = frame[TARGET].to_numpy(dtype=np.float32)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    np.savez(cache_path, X=X, y=y, categories=np.array(categories))
+    return X, y, categories
+
+
+def train(csv_path, output_dir=None, cache_dir=None, seed=42, candidates=32, n_jobs=-1,
+          max_rounds=1000, early_stopping_rounds=50, promote=False):
+    """Run the full pipeline and return (version_dir, metrics)"""
+    import xgboost
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.metrics import accuracy_score, mean_absolute_error, roc_auc_score
+    from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
+
+    output_dir = output_dir or os.path.join(DEFAULT_MODEL_DIR, 'versions')
+    cache_dir = cache_dir or os.path.join(DEFAULT_MODEL_DIR, '.cache')
+    random.seed(seed)
+    np.random.seed(seed)
+
+    timings = {}
+    started = time.perf_counter()
+    data_hash = file_digest(csv_path)
+    X, y, categories = load_features(csv_path, cache_dir, data_hash)
+    timings['features_s'] = time.perf_counter() - started
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed, stratify=y)
+
+    # Each candidate trains single-threaded; the search fans candidates out over every core
+    base_params = dict(tree_method='hist', random_state=seed, n_jobs=1, validation_fraction=0.1,
+                       early_stopping_rounds=early_stopping_rounds, eval_metric='mae')
+    search = HalvingRandomSearchCV(
+        EarlyStoppingRegressor(**base_params),
+        PARAM_DISTRIBUTIONS,
+        n_candidates=candidates,
+        resource='n_estimators',
+        min_resources=25,
+        max_resources=max_rounds,
+        factor=3,
+        cv=5,
+        scoring='neg_mean_absolute_error',
+        n_jobs=n_jobs,
+        random_state=seed,
+        refit=False,
+    )
+    stage = time.perf_counter()
+    search.fit(X_train, y_train)
+    timings['search_s'] = time.perf_counter() - stage
+
+    best_params = {k: v for k, v in search.best_params_.items() if k != 'n_estimators'}
+    model = EarlyStoppingRegressor(**base_params, **best_params, n_estimators=max_rounds)
+    model.set_params(n_jobs=n_jobs if n_jobs > 0 else os.cpu_count())
+    stage = time.perf_counter()
+    model.fit(X_train, y_train)
+    timings['refit_s'] = time.perf_counter() - stage
+    timings['total_s'] = time.perf_counter() - started
+
+    predictions = np.clip(model.predict(X_test), 0.0, 1.0)
+    baseline = np.full_like(y_test, y_train.mean())
+    metrics = {
+        'mae': float(mean_absolute_error(y_test, predictions)),
+        'baseline_mae': float(mean_absolute_error(y_test, baseline)),
+        'roc_auc': float(roc_auc_score(y_test, predictions)),
+        'accuracy_at_0_5': float(accuracy_score(y_test, predictions >= 0.5)),
+        'best_iteration': int(model.best_iteration),
+        'best_params': {k: (v.item() if hasattr(v, 'item') else v) for k, v in best_params.items()},
+        'search_candidates': candidates,
+        'cv_best_score': float(search.best_score_),
+    }
+
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{data_hash[:8]}"
+    version_dir = os.path.join(output_dir, version)
+    manifest = write_artifacts(version_dir, model.get_booster(), categories, drop_first=True,
+                               extra={'version': version})
+
+    report = {
+        'version': version,
+        'data': {'path': os.path.abspath(csv_path), 'sha256': data_hash, 'rows': int(len(y))},
+        'features': manifest['feature_names'],
+        'seed': seed,
+        'metrics': metrics,
+        'timings': {k: round(v, 3) for k, v in timings.items()},
+        'environment': {'python': platform.python_version(), 'xgboost': xgboost.__version__},
+    }
+    with open(os.path.join(version_dir, 'metrics.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if promote:
+        for name in (manifest['model_file'], MANIFEST_FILENAME):
+            shutil.copyfile(os.path.join(version_dir, name), os.path.join(DEFAULT_MODEL_DIR, name))
+
+    return version_dir, report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Train the intrusion scoring model.')
+    parser.add_argument('csv', help='Training data in cybersecurity_intrusion_data.csv layout')
+    parser.add_argument('--output-dir', default=None, help='Where versioned artifacts are written')
+    parser.add_argument('--cache-dir', default=None, help='Cache for the preprocessed feature matrix')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--candidates', type=int, default=32, help='Configurations entering successive halving')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='Parallel search workers (-1 = all cores)')
+    parser.add_argument('--max-rounds', type=int, default=1000, help='Upper bound on boosting rounds')
+    parser.add_argument('--early-stopping-rounds', type=int, default=50)
+    parser.add_argument('--promote', action='store_true', help='Install the new model as the one the app serves')
+    args = parser.parse_args(argv)
+
+    version_dir, report = train(args.csv, output_dir=args.output_dir, cache_dir=args.cache_dir, seed=args.seed,
+                                candidates=args.candidates, n_jobs=args.n_jobs, max_rounds=args.max_rounds,
+                                early_stopping_rounds=args.early_stopping_rounds, promote=args.promote)
+    metrics = report['metrics']
+    print(f"Model {report['version']}: MAE {metrics['mae']:.4f} (baseline {metrics['baseline_mae']:.4f}), "
+          f"AUC {metrics['roc_auc']:.4f} in {report['timings']['total_s']:.1f}s -> {version_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""Process-wide logging: JSON lines written off the request thread.
+
+Every logger propagates to a single QueueHandler on the root logger. The
+handler only snapshots the record (message, traceback text and the current
+request's method/path/endpoint/IP) and puts it on an in-memory queue; a
+QueueListener thread does the JSON encoding and the disk/console writes.
+
+Outputs, each with its own level:
+  * stderr                       - everything at LOG_LEVEL and above
+  * LOG_DIR/app_error.log        - ERROR and above
+  * LOG_DIR/app_security.log     - the 'security' logger
+
+LOG_ROTATION picks how the two files are rotated:
+  * size     - RotatingFileHandler at LOG_MAX_BYTES, LOG_BACKUP_COUNT kept.
+               Only safe while a single process writes the files
+  * external - WatchedFileHandler; every process appends and reopens the
+               file once logrotate (or similar) has moved it away
+
+Several processes rolling over the same file race and lose lines, so a
+forked worker always switches its file handlers to external rotation, and
+gunicorn.conf.py selects external rotation for the master as well.
+
+LOG_LEVELS sets per-logger levels ({'werkzeug': 'WARNING', ...}) and
+LOG_SAMPLE_RATES keeps only a fraction of the below-WARNING records emitted
+while serving hot endpoints ({'news.fetch_news': 0.1}).
+"""
+
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+
+from flask import has_request_context, request, session
+from flask.logging import default_handler
+
+SECURITY_LOGGER = 'security'
+
+_listener = None
+_queue_handler = None
+
+# Set on the record by RequestContextFilter, emitted as-is by JsonFormatter
+REQUEST_FIELDS = ('method', 'path', 'endpoint', 'remote_addr', 'user')
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies request details onto the record while still on the request thread"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.method = request.method
+            record.path = request.path
+            record.endpoint = request.endpoint
+            record.remote_addr = request.remote_addr
+            record.user = self._loaded_user()
+        return True
+
+    @staticmethod
+    def _loaded_user():
+        # Never load a server-side session just to log; requests that do not use it stay free
+        current = session._get_current_object()
+        if not getattr(current, 'loaded', True):
+            return None
+        # dict.get on cookie sessions avoids marking them accessed (which adds Vary: Cookie)
+        return dict.get(current, 'user') if isinstance(current, dict) else current.get('user')
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the INFO/DEBUG records logged by the given endpoints"""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rates.get(getattr(record, 'endpoint', None))
+        return rate is None or random.random() < rate
+
+
+class NameFilter(logging.Filter):
+    """Accepts one logger and its children, or (exclude=True) everything else"""
+
+    def __init__(self, name, exclude=False):
+        super().__init__(name)
+        self.exclude = exclude
+
+    def filter(self, record):
+        return super().filter(record) != self.exclude
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SnapshotQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener's handlers"""
+
+    def prepare(self, record):
+        # Resolve everything that could change or not pickle once we leave this thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler(path, level, rotation, max_bytes, backup_count):
+    if rotation == 'size':
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8',
+                                      delay=True)
+    elif rotation == 'external':
+        handler = WatchedFileHandler(path, encoding='utf-8', delay=True)
+    else:
+        raise ValueError(f"Unknown LOG_ROTATION {rotation!r}")
+    handler.setLevel(level)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def _watched(handler):
+    """A WatchedFileHandler writing where a RotatingFileHandler did, same level and filters"""
+    watched = _file_handler(handler.baseFilename, handler.level, 'external', 0, 0)
+    for log_filter in handler.filters:
+        watched.addFilter(log_filter)
+    return watched
+
+
+def _build_handlers(config):
+    log_dir = config['LOG_DIR']
+    os.makedirs(log_dir, exist_ok=True)
+    rotation, max_bytes, backups = config['LOG_ROTATION'], config['LOG_MAX_BYTES'], config['LOG_BACKUP_COUNT']
+
+    console = logging.StreamHandler()
+    console.setFormatter(JsonFormatter())
+    console.addFilter(NameFilter(SECURITY_LOGGER, exclude=True))
+
+    errors = _file_handler(os.path.join(log_dir, 'app_error.log'), logging.ERROR, rotation, max_bytes, backups)
+
+    security = _file_handler(os.path.join(log_dir, 'app_security.log'), logging.INFO, rotation, max_bytes, backups)
+    security.addFilter(NameFilter(SECURITY_LOGGER))
+
+    return console, errors, security
+
+
+def _start_listener(handlers):
+    global _listener
+    _listener = QueueListener(_queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # The listener thread does not survive fork(); pre-fork servers need a fresh one per worker.
+    # Sibling workers share the log files, so none of them may rotate by size.
+    if _listener is not None:
+        _start_listener([_watched(h) if isinstance(h, RotatingFileHandler) else h for h in _listener.handlers])
+
+
+def stop_logging():
+    """Drain the queue and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def init_logging(app):
+    """Route all logging through a queue to JSON console and rotating file handlers"""
+    global _queue_handler
+    app.config.setdefault('LOG_LEVEL', os.environ.get('LOG_LEVEL', 'INFO'))
+    app.config.setdefault('LOG_LEVELS', {'werkzeug': 'WARNING', 'sqlalchemy.engine': 'WARNING'})
+    app.config.setdefault('LOG_SAMPLE_RATES', {'news.fetch_news': 0.1})
+    app.config.setdefault('LOG_DIR', os.environ.get('LOG_DIR', '.'))
+    app.config.setdefault('LOG_ROTATION', 'size')
+    app.config.setdefault('LOG_MAX_BYTES', 10 * 1024 * 1024)
+    app.config.setdefault('LOG_BACKUP_COUNT', 5)
+
+    root = logging.getLogger()
+    if _queue_handler is not None:
+        # Re-initialising (e.g. a second app in the same process) replaces the previous pipeline
+        stop_logging()
+        root.removeHandler(_queue_handler)
+    else:
+        atexit.register(stop_logging)
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=_restart_listener_after_fork)
+
+    _queue_handler = SnapshotQueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(RequestContextFilter())
+    _queue_handler.addFilter(SamplingFilter(app.config['LOG_SAMPLE_RATES']))
+    root.addHandler(_queue_handler)
+    root.setLevel(app.config['LOG_LEVEL'])
+    for name, level in app.config['LOG_LEVELS'].items():
+        logging.getLogger(name).setLevel(level)
+
+    # app.logger propagates to the root queue instead of writing to stderr itself
+    app.logger.removeHandler(default_handler)
+    app.logger.setLevel(logging.NOTSET)
+
+    _start_listener(_build_handlers(app.config))
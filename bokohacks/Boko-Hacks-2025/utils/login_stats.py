@@ -0,0 +1,262 @@
+"""Sliding-window login counters keyed by username and client IP.
+
+Each key keeps a small ring of time buckets for attempts and failures, so
+recording is O(1), reading a window total is a sum over a fixed number of
+buckets and stale buckets are simply overwritten when the ring wraps. Idle
+keys are evicted from the front of an LRU-ordered dict.
+
+With LOGIN_STATS_PERSIST_PATH set, counters are shared through SQLite so
+a restart does not reset them and every worker process sees the others'
+attempts. Each process keeps the increments it has recorded since its
+last flush. A flush adds them onto the stored rows (one row per kind, key
+and bucket) and then reloads the merged totals, so workers converge
+within one flush interval and no worker overwrites another's counts.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, request
+
+security_logger = logging.getLogger('security')
+
+
+class _WindowCounter:
+    __slots__ = ('epochs', 'attempts', 'failures', 'last_seen')
+
+    def __init__(self, n_buckets):
+        self.epochs = [-1] * n_buckets
+        self.attempts = [0] * n_buckets
+        self.failures = [0] * n_buckets
+        self.last_seen = 0.0
+
+    def add(self, epoch, n_buckets, attempts, failures):
+        slot = epoch % n_buckets
+        if self.epochs[slot] != epoch:
+            self.epochs[slot] = epoch
+            self.attempts[slot] = 0
+            self.failures[slot] = 0
+        self.attempts[slot] += attempts
+        self.failures[slot] += failures
+
+    def totals(self, epoch, n_buckets):
+        oldest = epoch - n_buckets + 1
+        attempts = failures = 0
+        for slot in range(n_buckets):
+            if self.epochs[slot] >= oldest:
+                attempts += self.attempts[slot]
+                failures += self.failures[slot]
+        return attempts, failures
+
+
+class LoginStatsStore:
+    """In-memory login attempt/failure counters with optional SQLite persistence"""
+
+    def __init__(self, window_seconds=900, n_buckets=15, persist_path=None, flush_interval=30.0):
+        self.window_seconds = window_seconds
+        self.n_buckets = n_buckets
+        self.bucket_seconds = window_seconds / n_buckets
+        self.persist_path = persist_path
+        self._counters = {'user': OrderedDict(), 'ip': OrderedDict()}
+        self._pending = {}  # (kind, key) -> {epoch: [attempts, failures]} not yet flushed
+        self._cleared = set()
+        self._lock = threading.Lock()
+
+        self.flush_interval = flush_interval
+
+        if persist_path:
+            self._load()
+            self._start_flusher()
+            if hasattr(os, 'register_at_fork'):
+                # Pre-fork servers: the flush thread does not survive into worker processes, and
+                # increments the parent still holds are its own to flush
+                os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._pending.clear()
+        self._cleared.clear()
+        self._start_flusher()
+
+    def _start_flusher(self):
+        flusher = threading.Thread(target=self._flush_loop, args=(self.flush_interval,), name='login-stats-flush',
+                                   daemon=True)
+        flusher.start()
+
+    def _epoch(self, now=None):
+        return int((now if now is not None else time.time()) // self.bucket_seconds)
+
+    def _counter(self, kind, key, now):
+        counters = self._counters[kind]
+        counter = counters.get(key)
+        if counter is None:
+            counter = counters[key] = _WindowCounter(self.n_buckets)
+        else:
+            counters.move_to_end(key)
+        counter.last_seen = now
+        return counter
+
+    def _evict_idle(self, now):
+        cutoff = now - self.window_seconds
+        for counters in self._counters.values():
+            while counters:
+                key, counter = next(iter(counters.items()))
+                if counter.last_seen >= cutoff:
+                    break
+                del counters[key]
+
+    def record(self, username, ip, failed):
+        """Record one login attempt for both the username and the client IP"""
+        now = time.time()
+        epoch = self._epoch(now)
+        with self._lock:
+            for kind, key in (('user', username), ('ip', ip)):
+                if key:
+                    self._counter(kind, key, now).add(epoch, self.n_buckets, 1, 1 if failed else 0)
+                    if self.persist_path:
+                        pending = self._pending.setdefault((kind, key), {}).setdefault(epoch, [0, 0])
+                        pending[0] += 1
+                        pending[1] += 1 if failed else 0
+            self._evict_idle(now)
+
+    def totals(self, kind, key):
+        """(attempts, failures) for a key within the sliding window"""
+        counter = self._counters[kind].get(key)
+        if counter is None:
+            return 0, 0
+        return counter.totals(self._epoch(), self.n_buckets)
+
+    def feature_counts(self, username, ip):
+        """Model inputs for the attempt about to be made: (login_attempts, failed_logins)"""
+        user_attempts, user_failures = self.totals('user', username)
+        ip_attempts, ip_failures = self.totals('ip', ip)
+        return max(user_attempts, ip_attempts) + 1, max(user_failures, ip_failures)
+
+    def clear(self, kind, key):
+        with self._lock:
+            self._counters[kind].pop(key, None)
+            if self.persist_path:
+                self._pending.pop((kind, key), None)
+                self._cleared.add((kind, key))
+
+    def flush(self):
+        """Add this process's increments to SQLite, then reload the totals every process has written"""
+        if not self.persist_path:
+            return
+        oldest = self._epoch() - self.n_buckets + 1
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            cleared, self._cleared = self._cleared, set()
+        rows = [
+            (kind, key, epoch, attempts, failures)
+            for (kind, key), buckets in pending.items()
+            for epoch, (attempts, failures) in buckets.items()
+            if epoch >= oldest
+        ]
+        try:
+            with sqlite3.connect(self.persist_path, timeout=10) as conn:
+                conn.execute('DELETE FROM login_stats WHERE epoch < ?', (oldest,))
+                conn.executemany('DELETE FROM login_stats WHERE kind = ? AND key = ?', cleared)
+                conn.executemany('INSERT INTO login_stats VALUES (?, ?, ?, ?, ?) '
+                                 'ON CONFLICT (kind, key, epoch) DO UPDATE SET '
+                                 'attempts = attempts + excluded.attempts, failures = failures + excluded.failures',
+                                 rows)
+        except sqlite3.Error:
+            # Keep the increments for the next flush rather than lose them
+            with self._lock:
+                for (kind, key), buckets in pending.items():
+                    if (kind, key) in self._cleared:
+                        continue  # Cleared since; these increments no longer count
+                    merged = self._pending.setdefault((kind, key), {})
+                    for epoch, (attempts, failures) in buckets.items():
+                        counts = merged.setdefault(epoch, [0, 0])
+                        counts[0] += attempts
+                        counts[1] += failures
+                self._cleared |= cleared
+            raise
+        self._load()
+
+    def _load(self):
+        """Replace the in-memory counters with the stored totals plus anything not yet flushed"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+        with sqlite3.connect(self.persist_path, timeout=10) as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS login_stats '
+                         '(kind TEXT, key TEXT, epoch INTEGER, attempts INTEGER, failures INTEGER)')
+            conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS login_stats_bucket ON login_stats (kind, key, epoch)')
+            rows = conn.execute('SELECT kind, key, epoch, attempts, failures FROM login_stats '
+                                'WHERE epoch >= ? ORDER BY epoch', (self._epoch() - self.n_buckets + 1,)).fetchall()
+        now = time.time()
+        with self._lock:
+            counters = {kind: OrderedDict() for kind in self._counters}
+            for kind, key, epoch, attempts, failures in rows:
+                if kind in counters and (kind, key) not in self._cleared:
+                    counter = counters[kind].get(key) or counters[kind].setdefault(key, _WindowCounter(self.n_buckets))
+                    counter.add(epoch, self.n_buckets, attempts, failures)
+            for (kind, key), buckets in self._pending.items():
+                counter = counters[kind].get(key) or counters[kind].setdefault(key, _WindowCounter(self.n_buckets))
+                for epoch, (attempts, failures) in sorted(buckets.items()):
+                    counter.add(epoch, self.n_buckets, attempts, failures)
+            # Keep the LRU order and last-seen times of keys this process already knew
+            for kind, known in self._counters.items():
+                merged = OrderedDict()
+                for key, old in known.items():
+                    if key in counters[kind]:
+                        counters[kind][key].last_seen = old.last_seen
+                        merged[key] = counters[kind][key]
+                for key, counter in counters[kind].items():
+                    if key not in merged:
+                        counter.last_seen = now
+                        merged[key] = counter
+                self._counters[kind] = merged
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+
+def init_login_stats(app):
+    """Attach the login counter store and its rate-limit thresholds to the app"""
+    app.config.setdefault('LOGIN_STATS_WINDOW_SECONDS', 900)
+    app.config.setdefault('LOGIN_STATS_PERSIST_PATH', os.environ.get('LOGIN_STATS_PERSIST_PATH'))
+    app.config.setdefault('LOGIN_MAX_FAILURES_PER_USER', 10)
+    app.config.setdefault('LOGIN_MAX_FAILURES_PER_IP', 50)
+
+    store = LoginStatsStore(
+        window_seconds=app.config['LOGIN_STATS_WINDOW_SECONDS'],
+        persist_path=app.config['LOGIN_STATS_PERSIST_PATH'],
+    )
+    app.extensions['login_stats'] = store
+    return store
+
+
+def get_login_stats():
+    return current_app.extensions['login_stats']
+
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def normalize_username(username):
+    # Mirrors User.validate_username so 'Admin ' and 'admin' share a counter
+    return (username or '').strip().lower()
+
+
+def is_rate_limited(username):
+    """True once the username or the client IP has too many recent failures"""
+    store = get_login_stats()
+    _, user_failures = store.totals('user', normalize_username(username))
+    _, ip_failures = store.totals('ip', client_ip())
+    limited = (user_failures >= current_app.config['LOGIN_MAX_FAILURES_PER_USER']
+               or ip_failures >= current_app.config['LOGIN_MAX_FAILURES_PER_IP'])
+    if limited:
+        security_logger.warning(f"Login rate limit hit for {normalize_username(username)!r} from {client_ip()} "
+                                f"({user_failures} user / {ip_failures} IP failures)")
+    return limited
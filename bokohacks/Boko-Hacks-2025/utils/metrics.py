@@ -0,0 +1,327 @@
+"""Per-request latency, SQL and payload instrumentation.
+
+A before/after_request pair times every request, SQLAlchemy cursor events
+count statements and DB time for the request that issued them, and the
+results land in Prometheus-style histograms labelled by blueprint and
+endpoint. Requests slower than SLOW_REQUEST_MS are logged with their queries.
+
+Values live in the memory of the process that recorded them. Under a
+multi-process server (gunicorn), set METRICS_MULTIPROC_DIR to a directory
+shared by the workers; gunicorn.conf.py does this. Each worker then writes
+a snapshot of its values to metrics-<pid>.json at most every
+METRICS_SYNC_INTERVAL seconds (and at exit), and /metrics sums the
+snapshots of every worker, so a scrape sees the whole server whichever
+worker answers it. When a worker exits, the master folds its last
+snapshot into metrics-archive.json (mark_process_dead), so counters keep
+growing across worker recycling. A worker killed outright loses at most
+one sync interval of observations.
+"""
+
+import atexit
+import bisect
+import glob
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+slow_logger = logging.getLogger('slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with one series per label tuple"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: [list(counts), total, count] for labels, (counts, total, count) in self._series.items()}
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    @staticmethod
+    def merge(a, b):
+        return [[x + y for x, y in zip(a[0], b[0])], a[1] + b[1], a[2] + b[2]]
+
+    def render(self, series=None):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        if series is None:
+            series = self.snapshot()
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = ','.join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+
+
+class Counter:
+    type_name = 'counter'
+
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    @staticmethod
+    def merge(a, b):
+        return a + b
+
+    def render(self, series=None):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        if series is None:
+            series = self.snapshot()
+        for labels, value in sorted(series.items()):
+            label_text = ','.join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{label_text}}} {value}')
+        return lines
+
+
+ENDPOINT_LABELS = ('blueprint', 'endpoint')
+
+request_latency = Histogram('http_request_duration_seconds', 'Request latency', ENDPOINT_LABELS, LATENCY_BUCKETS)
+sql_statements = Histogram('http_request_sql_statements', 'SQL statements per request', ENDPOINT_LABELS,
+                           SQL_COUNT_BUCKETS)
+sql_duration = Histogram('http_request_sql_duration_seconds', 'DB time per request', ENDPOINT_LABELS,
+                         LATENCY_BUCKETS)
+response_size = Histogram('http_response_size_bytes', 'Response body size', ENDPOINT_LABELS, SIZE_BUCKETS)
+requests_total = Counter('http_requests_total', 'Requests by status code', ENDPOINT_LABELS + ('status',))
+
+# Other modules register their own counters/histograms here to be exported on /metrics
+REGISTRY = [request_latency, sql_statements, sql_duration, response_size, requests_total]
+
+
+ARCHIVE_FILENAME = 'metrics-archive.json'
+LOCK_FILENAME = 'metrics.lock'
+
+
+def _snapshot_all():
+    return {metric.name: [[list(labels), value] for labels, value in metric.snapshot().items()]
+            for metric in REGISTRY}
+
+
+def _merge_into(totals, snapshot):
+    """Add a JSON snapshot ({name: [[labels, value]]}) into totals ({name: {labels: value}})"""
+    metrics = {metric.name: metric for metric in REGISTRY}
+    for name, series in snapshot.items():
+        metric = metrics.get(name)
+        if metric is None:
+            continue
+        merged = totals.setdefault(name, {})
+        for labels, value in series:
+            labels = tuple(labels)
+            merged[labels] = metric.merge(merged[labels], value) if labels in merged else value
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class _DirectoryLock:
+    """flock on a file in the metrics directory: shared for scrapes, exclusive for folding a dead worker"""
+
+    def __init__(self, directory, exclusive=False):
+        self.path = os.path.join(directory, LOCK_FILENAME)
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        import fcntl
+
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc):
+        self._file.close()  # Releases the lock
+
+
+class MultiprocessStore:
+    """Per-worker snapshots in a shared directory, summed on scrape"""
+
+    def __init__(self, directory, sync_interval=5.0):
+        self.directory = directory
+        self.sync_interval = sync_interval
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.sync, True)
+        if hasattr(os, 'register_at_fork'):
+            # A forked worker starts from zero; whatever the parent recorded is the parent's to report
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self._last_sync = 0.0
+        for metric in REGISTRY:
+            metric.reset()
+
+    def sync(self, force=False):
+        """Write this process's snapshot if the last one is older than sync_interval"""
+        now = time.monotonic()
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+        with self._lock:
+            self._last_sync = now
+            _write_json(os.path.join(self.directory, f'metrics-{os.getpid()}.json'), _snapshot_all())
+
+    def collect(self):
+        """{name: {labels: value}} summed over every live and exited worker"""
+        self.sync(force=True)
+        totals = {}
+        with _DirectoryLock(self.directory):
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                _merge_into(totals, _read_json(path))
+        return totals
+
+
+def mark_process_dead(directory, pid):
+    """Fold an exited worker's last snapshot into the archive (gunicorn child_exit)"""
+    path = os.path.join(directory, f'metrics-{pid}.json')
+    if not os.path.exists(path):
+        return
+    archive_path = os.path.join(directory, ARCHIVE_FILENAME)
+    with _DirectoryLock(directory, exclusive=True):
+        totals = {}
+        _merge_into(totals, _read_json(archive_path))
+        _merge_into(totals, _read_json(path))
+        _write_json(archive_path, {name: [[list(labels), value] for labels, value in series.items()]
+                                   for name, series in totals.items()})
+        os.remove(path)
+
+
+def render_metrics():
+    store = current_app.extensions.get('metrics_store')
+    totals = store.collect() if store is not None else {}
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render(totals.get(metric.name, {}) if store is not None else None))
+    return '\n'.join(lines) + '\n'
+
+
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_statements = []
+
+
+def _after_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+
+    elapsed = time.perf_counter() - started
+    labels = (request.blueprint or '', request.endpoint or 'unmatched')
+    request_latency.observe(labels, elapsed)
+    sql_statements.observe(labels, g.sql_count)
+    sql_duration.observe(labels, g.sql_time)
+    requests_total.inc(labels + (str(response.status_code),))
+    if not response.is_streamed:
+        response_size.observe(labels, response.calculate_content_length() or 0)
+
+    if elapsed * 1000.0 >= current_app.config['SLOW_REQUEST_MS']:
+        queries = '\n'.join(f'  {ms:8.2f} ms  {statement}' for ms, statement in g.sql_statements)
+        slow_logger.warning(f"Slow request {request.method} {request.path} ({labels[1]}): "
+                            f"{elapsed * 1000.0:.1f} ms, {g.sql_count} queries, {g.sql_time * 1000.0:.1f} ms in DB"
+                            + (f"\n{queries}" if queries else ''))
+
+    store = current_app.extensions.get('metrics_store')
+    if store is not None:
+        store.sync()
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_count' in g:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'sql_count' in g):
+        return
+    starts = conn.info.get('query_started')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    g.sql_count += 1
+    g.sql_time += elapsed
+    if len(g.sql_statements) < current_app.config['SLOW_REQUEST_MAX_QUERIES']:
+        g.sql_statements.append((elapsed * 1000.0, ' '.join(statement.split())))
+
+
+def init_metrics(app):
+    """Install request timing middleware and SQLAlchemy statement counters"""
+    app.config.setdefault('SLOW_REQUEST_MS', 500)
+    app.config.setdefault('SLOW_REQUEST_MAX_QUERIES', 50)
+    app.config.setdefault('METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    app.config.setdefault('METRICS_MULTIPROC_DIR', None)
+    app.config.setdefault('METRICS_SYNC_INTERVAL', 5.0)
+
+    if app.config['METRICS_MULTIPROC_DIR']:
+        app.extensions['metrics_store'] = MultiprocessStore(app.config['METRICS_MULTIPROC_DIR'],
+                                                            app.config['METRICS_SYNC_INTERVAL'])
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,178 @@
+"""Low-overhead statistical profiler for the running process.
+
+A daemon thread wakes every 1/rate seconds, grabs sys._current_frames() and
+counts the stack of every other thread (or of one thread, when profiling a
+single request). Nothing is installed on the interpreter's hot path, so the
+cost is one stack walk per thread per sample; at the default 100 Hz that
+stays well under 2% of a core.
+
+Both entry points are opt-in (PROFILER_ENABLED) and admin-only: a
+time-boxed capture of the whole process from /admin/profile, or a single
+request profiled by sending the X-Profile header, in which case the
+profile replaces the response body.
+
+Output is either collapsed stacks ("a;b;c 42", the flamegraph.pl /
+speedscope import format) or a speedscope "sampled" JSON document.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, current_app, g, request, session
+
+DEFAULT_RATE_HZ = 100
+MAX_DURATION_S = 60
+
+
+def _code_label(code):
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _stack_of(frame):
+    # Code objects only; labels are formatted once per distinct stack at render time
+    stack = []
+    while frame is not None:
+        stack.append(frame.f_code)
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """Collects stack samples from a background thread until stopped"""
+
+    def __init__(self, rate_hz=DEFAULT_RATE_HZ, thread_id=None):
+        self.interval = 1.0 / rate_hz
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self.sample_count = 0
+        self.started_at = None
+        self.elapsed = 0.0
+        self.sampling_time = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            started = time.perf_counter()
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is not None:
+                    self.samples[_stack_of(frame)] += 1
+            else:
+                for thread_id, frame in frames.items():
+                    if thread_id != own_id:
+                        self.samples[_stack_of(frame)] += 1
+            self.sample_count += 1
+            self.sampling_time += time.perf_counter() - started
+
+    def collapsed(self):
+        """flamegraph.pl-style collapsed stacks, heaviest first"""
+        return '\n'.join(f"{';'.join(map(_code_label, stack))} {count}"
+                         for stack, count in self.samples.most_common()) + '\n'
+
+    def speedscope(self, name='bokohacks'):
+        """speedscope file-format document with one sampled profile"""
+        frames, frame_index, samples, weights = [], {}, [], []
+        for stack, count in self.samples.items():
+            indices = []
+            for code in stack:
+                if code not in frame_index:
+                    frame_index[code] = len(frames)
+                    frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+                indices.append(frame_index[code])
+            samples.append(indices)
+            weights.append(count * self.interval)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': self.elapsed,
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'exporter': 'bokohacks-sampling-profiler',
+        }
+
+    def render(self, fmt, name='bokohacks'):
+        """(body, mimetype) in the requested output format"""
+        if fmt == 'speedscope':
+            return json.dumps(self.speedscope(name)), 'application/json'
+        return self.collapsed(), 'text/plain'
+
+
+_capture_lock = threading.Lock()
+
+
+def profile_for(seconds, rate_hz=DEFAULT_RATE_HZ):
+    """Sample every thread for a bounded time; one capture at a time per process"""
+    if not _capture_lock.acquire(blocking=False):
+        raise RuntimeError('A profile capture is already running')
+    try:
+        profiler = SamplingProfiler(rate_hz=rate_hz).start()
+        time.sleep(min(seconds, MAX_DURATION_S))
+        return profiler.stop()
+    finally:
+        _capture_lock.release()
+
+
+def _request_profiling_allowed():
+    return (current_app.config['PROFILER_ENABLED']
+            and current_app.config['PROFILER_HEADER'] in request.headers
+            and session.get('admin_logged_in', False))
+
+
+def _before_request():
+    if _request_profiling_allowed():
+        g.request_profiler = SamplingProfiler(rate_hz=current_app.config['PROFILER_REQUEST_RATE_HZ'],
+                                              thread_id=threading.get_ident()).start()
+
+
+def _after_request(response):
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+
+    profiler.stop()
+    fmt = request.headers[current_app.config['PROFILER_HEADER']].strip().lower()
+    body, mimetype = profiler.render(fmt, name=f'{request.method} {request.path}')
+    profiled = Response(body, mimetype=mimetype)
+    profiled.headers['X-Profiled-Status'] = str(response.status_code)
+    profiled.headers['X-Profile-Samples'] = str(profiler.sample_count)
+    return profiled
+
+
+def init_profiler(app):
+    """Register the per-request profiling hooks; everything stays off unless PROFILER_ENABLED"""
+    app.config.setdefault('PROFILER_ENABLED', os.environ.get('PROFILER_ENABLED', '').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('PROFILER_RATE_HZ', DEFAULT_RATE_HZ)
+    # A single request only samples its own thread, so it can afford a finer interval
+    app.config.setdefault('PROFILER_REQUEST_RATE_HZ', 1000)
+    app.config.setdefault('PROFILER_HEADER', 'X-Profile')
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,230 @@
+"""401(k) balance projections, deterministic and Monte Carlo.
+
+A projection runs `years` years from a starting balance. Each year the
+employee contributes a share of salary, set by a schedule of
+{"from_year", "rate"} steps and capped at `contribution_limit`. The
+employer matches through tiers of {"rate", "up_to"}: the default,
+[{"rate": 1.0, "up_to": 0.03}, {"rate": 0.5, "up_to": 0.05}], matches 100%
+of the first 3% of salary and 50% of the next 2%. Salary grows by
+`salary_growth` a year. Contributions arrive evenly through the year, so
+on average they earn half of that year's return.
+
+Annual returns are lognormal with arithmetic mean `mean_return` and
+standard deviation `volatility`; `paths` market paths are drawn at once.
+A path's balances then follow from cumulative products and sums over the
+whole (paths x years) matrix, with no Python loop over paths or years.
+
+Results are cached by a hash of the normalized parameters. Without an
+explicit `seed` the random draws are seeded from that hash, so the same
+question always gets the same answer on every worker.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from flask import current_app
+
+from utils.metrics import REGISTRY, Counter
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+DEFAULTS = {
+    'years': 40,
+    'start_balance': 0.0,
+    'salary': 60000.0,
+    'salary_growth': 0.03,
+    'contributions': [{'from_year': 0, 'rate': 0.06}],
+    'contribution_limit': 23000.0,
+    'match': [{'rate': 1.0, 'up_to': 0.03}, {'rate': 0.5, 'up_to': 0.05}],
+    'mean_return': 0.07,
+    'volatility': 0.15,
+    'inflation': 0.0,
+    'paths': 10000,
+    'goal': None,
+    'seed': None,
+}
+
+projection_cache_lookups = Counter('retirement_projection_cache_lookups_total', 'Projection cache lookups',
+                                   ('result',))
+REGISTRY.append(projection_cache_lookups)
+
+
+def _number(params, key, low, high):
+    value = params[key]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+        raise ValueError(f"{key} must be a number between {low} and {high}")
+    return float(value)
+
+
+def _integer(params, key, low, high):
+    value = params[key]
+    if isinstance(value, bool) or not isinstance(value, int) or not low <= value <= high:
+        raise ValueError(f"{key} must be a whole number between {low} and {high}")
+    return value
+
+
+def _steps(params, key, fields):
+    steps = params[key]
+    if not isinstance(steps, list) or not steps or len(steps) > 20:
+        raise ValueError(f"{key} must be a list of 1 to 20 steps")
+    if not all(isinstance(step, dict) and set(step) == set(fields) for step in steps):
+        raise ValueError(f"each {key} step must be an object with {' and '.join(fields)}")
+    return [{field: _number(step, field, low, high) for field, (low, high) in fields.items()} for step in steps]
+
+
+def normalize_params(raw, max_years=60, max_paths=20000):
+    """Validated parameters with defaults filled in; raises ValueError"""
+    if not isinstance(raw, dict):
+        raise ValueError("Parameters must be a JSON object")
+    unknown = set(raw) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    params = {**DEFAULTS, **{key: value for key, value in raw.items() if value is not None}}
+
+    normalized = {
+        'years': _integer(params, 'years', 1, max_years),
+        'start_balance': _number(params, 'start_balance', 0, 1e10),
+        'salary': _number(params, 'salary', 0, 1e8),
+        'salary_growth': _number(params, 'salary_growth', -0.5, 0.5),
+        'contribution_limit': _number(params, 'contribution_limit', 0, 1e8),
+        'mean_return': _number(params, 'mean_return', -0.5, 0.5),
+        'volatility': _number(params, 'volatility', 0, 1),
+        'inflation': _number(params, 'inflation', -0.1, 0.2),
+        'paths': _integer(params, 'paths', 0, max_paths),
+        'goal': _number(params, 'goal', 0, 1e12) if params['goal'] is not None else None,
+    }
+    normalized['contributions'] = sorted(
+        _steps(params, 'contributions', {'from_year': (0, max_years), 'rate': (0, 1)}),
+        key=lambda step: step['from_year'])
+    normalized['match'] = sorted(_steps(params, 'match', {'rate': (0, 10), 'up_to': (0, 1)}),
+                                 key=lambda tier: tier['up_to'])
+    normalized['seed'] = _integer(params, 'seed', 0, 2 ** 63 - 1) if params['seed'] is not None else None
+    return normalized
+
+
+def params_hash(params):
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def contribution_schedule(params):
+    """Employee and employer contributions for each year, shape (years,)"""
+    years = np.arange(params['years'])
+    salary = params['salary'] * (1.0 + params['salary_growth']) ** years
+
+    rate = np.zeros(params['years'])
+    for step in params['contributions']:
+        rate[int(step['from_year']):] = step['rate']
+    employee = np.minimum(salary * rate, params['contribution_limit'])
+
+    # Each tier matches the slice of salary between the previous tier's cap and its own
+    contributed_rate = np.divide(employee, salary, out=np.zeros_like(salary), where=salary > 0)
+    employer = np.zeros(params['years'])
+    lower = 0.0
+    for tier in params['match']:
+        band = np.clip(contributed_rate - lower, 0.0, max(tier['up_to'] - lower, 0.0))
+        employer += band * salary * tier['rate']
+        lower = max(lower, tier['up_to'])
+    return employee, employer
+
+
+def grow(start_balance, contributions, growth):
+    """Year-end balances for every path: growth is (paths, years) of 1 + return"""
+    cumulative = np.cumprod(growth, axis=1)
+    # A contribution in year k earns half of year k's return, then every later year's in full
+    deposits = contributions * np.sqrt(growth) / cumulative
+    return cumulative * (start_balance + np.cumsum(deposits, axis=1))
+
+
+def simulate(params):
+    """Run one projection; `params` must come from normalize_params"""
+    years = params['years']
+    employee, employer = contribution_schedule(params)
+    contributions = employee + employer
+    deflator = (1.0 + params['inflation']) ** np.arange(1, years + 1)
+
+    expected = grow(params['start_balance'], contributions, np.full((1, years), 1.0 + params['mean_return']))[0]
+    result = {
+        'years': list(range(1, years + 1)),
+        'employee_contributions': np.round(np.cumsum(employee), 2).tolist(),
+        'employer_contributions': np.round(np.cumsum(employer), 2).tolist(),
+        'expected': np.round(expected / deflator, 2).tolist(),
+        'paths': params['paths'],
+    }
+
+    if params['paths']:
+        # Lognormal annual returns with the requested arithmetic mean and standard deviation
+        growth_mean = 1.0 + params['mean_return']
+        sigma = np.sqrt(np.log1p((params['volatility'] / growth_mean) ** 2))
+        mu = np.log(growth_mean) - sigma ** 2 / 2
+        rng = np.random.default_rng(params['seed'])
+        growth = np.exp(mu + sigma * rng.standard_normal((params['paths'], years)))
+
+        balances = grow(params['start_balance'], contributions, growth) / deflator
+        bands = np.percentile(balances, PERCENTILES, axis=0)
+        result['percentiles'] = {str(q): np.round(band, 2).tolist() for q, band in zip(PERCENTILES, bands)}
+        final = balances[:, -1]
+        result['final'] = {'mean': round(float(final.mean()), 2),
+                           **{f'p{q}': round(float(band[-1]), 2) for q, band in zip(PERCENTILES, bands)}}
+        if params['goal'] is not None:
+            result['goal_probability'] = round(float((final >= params['goal']).mean()), 4)
+    return result
+
+
+class ProjectionCache:
+    """Bounded LRU of projection results keyed by parameter hash"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def project(raw_params, start_balance=None):
+    """Normalize, then serve from the cache or simulate; raises ValueError on bad input"""
+    config = current_app.config
+    if start_balance is not None and isinstance(raw_params, dict) and raw_params.get('start_balance') is None:
+        raw_params = {**raw_params, 'start_balance': start_balance}
+    params = normalize_params(raw_params, config['RETIREMENT_PROJECTION_MAX_YEARS'],
+                              config['RETIREMENT_PROJECTION_MAX_PATHS'])
+
+    key = params_hash(params)
+    cache = current_app.extensions['projection_cache']
+    result = cache.get(key)
+    if result is not None:
+        projection_cache_lookups.inc(('hit',))
+        return {**result, 'cached': True}
+
+    projection_cache_lookups.inc(('miss',))
+    if params['seed'] is None:
+        params = {**params, 'seed': int(key[:16], 16)}
+    started = time.perf_counter()
+    result = simulate(params)
+    result.update(params_hash=key, seed=params['seed'], elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+    cache.put(key, result)
+    return {**result, 'cached': False}
+
+
+def init_projection(app):
+    """Limits and the result cache for /apps/401k/projection"""
+    app.config.setdefault('RETIREMENT_PROJECTION_MAX_YEARS', 60)
+    app.config.setdefault('RETIREMENT_PROJECTION_MAX_PATHS', 20000)
+    app.config.setdefault('RETIREMENT_PROJECTION_CACHE_SIZE', 256)
+    app.extensions['projection_cache'] = ProjectionCache(app.config['RETIREMENT_PROJECTION_CACHE_SIZE'])
@@ -0,0 +1,193 @@
+"""Attempt rate limiting for login, registration and admin login (GCRA).
+
+utils.login_stats slows down a username or IP after repeated failures;
+this limits how many attempts arrive at all. It is checked first thing
+in each POST handler, before captcha verification, any database lookup
+or the password hash. A credential-stuffing burst is then turned away
+for the cost of a dictionary lookup.
+
+Limits come from RATE_LIMITS as {endpoint: {scope: (count, period)}}:
+`count` attempts per `period` seconds. Scopes are 'ip' (the client
+address), 'user' (the normalized username in the form) and 'global'
+(the endpoint as a whole). Every scope of an endpoint must allow an
+attempt for it to go through, and a refused attempt consumes nothing.
+
+Each key holds one number, its theoretical arrival time (TAT), as in the
+generic cell rate algorithm. An attempt is allowed while
+TAT - now <= period - period/count, which admits a burst of `count`
+followed by one attempt every period/count seconds. Each allowed attempt
+moves the TAT forward by period/count. Once the TAT is in the past, the
+key is equivalent to a fresh one.
+
+RATE_LIMIT_BACKEND selects the store:
+
+  * local - a per-process dict in LRU order. Expired keys are dropped
+    lazily from the front as keys are touched, and at most
+    RATE_LIMIT_MAX_KEYS are kept
+  * redis - one Lua script per check at RATE_LIMIT_REDIS_URL, shared by
+    every worker and host, or the local store as a stand-in when no URL
+    is set
+  * off   - no attempt limits (benchmarks, tests)
+
+If the shared store errors, the attempt is allowed and a warning is
+logged; the failure-based limits still apply.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from utils.login_stats import client_ip, normalize_username
+from utils.metrics import REGISTRY, Counter
+
+security_logger = logging.getLogger('security')
+
+DEFAULT_RATE_LIMITS = {
+    'login': {'ip': (20, 60), 'user': (10, 60)},
+    'register': {'ip': (5, 3600), 'global': (120, 60)},
+    'admin_login': {'ip': (10, 60), 'user': (5, 60)},
+}
+
+rate_limit_decisions = Counter('rate_limit_decisions_total', 'Rate limiter decisions by endpoint and result',
+                               ('endpoint', 'result'))
+REGISTRY.append(rate_limit_decisions)
+
+
+class LocalRateLimitStore:
+    """GCRA state for this process; O(1) per key with lazy expiry"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._tats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, checks):
+        """checks: [(key, interval, burst)]; returns (None, 0) or (denied index, retry-after seconds)"""
+        now = time.monotonic()
+        with self._lock:
+            new_tats = []
+            for index, (key, interval, burst) in enumerate(checks):
+                new_tat = max(self._tats.get(key, now), now) + interval
+                allow_at = new_tat - interval * burst
+                if allow_at > now:
+                    return index, allow_at - now
+                new_tats.append(new_tat)
+            for (key, _, _), new_tat in zip(checks, new_tats):
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+            self._evict(now)
+        return None, 0
+
+    def _evict(self, now):
+        tats = self._tats
+        while tats:
+            key, tat = next(iter(tats.items()))
+            if tat > now and len(tats) <= self.max_keys:
+                break
+            del tats[key]
+
+    def __len__(self):
+        return len(self._tats)
+
+
+# Checks every key before touching any, so a refused attempt consumes nothing
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local new_tats = {}
+for i = 1, #KEYS do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local stored = redis.call('GET', KEYS[i])
+    local tat = stored and tonumber(stored) or now
+    if tat < now then tat = now end
+    local new_tat = tat + interval
+    local allow_at = new_tat - interval * burst
+    if allow_at > now then
+        return {i, tostring(allow_at - now)}
+    end
+    new_tats[i] = new_tat
+end
+for i = 1, #KEYS do
+    redis.call('SET', KEYS[i], tostring(new_tats[i]), 'PX', math.ceil((new_tats[i] - now) * 1000))
+end
+return {0, '0'}
+"""
+
+
+class RedisRateLimitStore:
+    """GCRA state in Redis, shared by every worker"""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.prefix = prefix
+        self._script = client.register_script(GCRA_SCRIPT)
+
+    def acquire(self, checks):
+        args = []
+        for _, interval, burst in checks:
+            args += [repr(interval), burst]
+        denied, retry_after = self._script(keys=[self.prefix + key for key, _, _ in checks], args=args)
+        return (denied - 1, float(retry_after)) if denied else (None, 0)
+
+
+def get_rate_limiter():
+    return current_app.extensions.get('rate_limit')
+
+
+def check_rate_limit(endpoint, username=None):
+    """Seconds the client must wait before trying `endpoint` again, or None if it may go ahead"""
+    store = get_rate_limiter()
+    limits = current_app.config['RATE_LIMITS'].get(endpoint)
+    if store is None or not limits:
+        return None
+
+    values = {'ip': client_ip(), 'user': normalize_username(username), 'global': ''}
+    scopes = [scope for scope in limits if values.get(scope) is not None and (scope != 'user' or values['user'])]
+    checks = [(f'{endpoint}:{scope}:{values[scope]}', limits[scope][1] / limits[scope][0], limits[scope][0])
+              for scope in scopes]
+    if not checks:
+        return None
+
+    try:
+        denied, retry_after = store.acquire(checks)
+    except Exception as e:
+        current_app.logger.warning(f"Rate limit store unavailable, allowing {endpoint} attempt: {e}")
+        rate_limit_decisions.inc((endpoint, 'error'))
+        return None
+
+    if denied is None:
+        rate_limit_decisions.inc((endpoint, 'allowed'))
+        return None
+    scope = scopes[denied]
+    rate_limit_decisions.inc((endpoint, f'limited_{scope}'))
+    security_logger.warning(f"{endpoint} rate limit ({scope}) hit for {values['user']!r} from {values['ip']}")
+    return retry_after
+
+
+def retry_after_header(retry_after):
+    return {'Retry-After': str(max(1, int(retry_after + 0.999)))}
+
+
+def init_rate_limit(app):
+    """Attach the attempt limiter; RATE_LIMITS entries override the defaults per endpoint"""
+    app.config['RATE_LIMITS'] = {**DEFAULT_RATE_LIMITS, **app.config.get('RATE_LIMITS', {})}
+    app.config.setdefault('RATE_LIMIT_BACKEND', 'local')
+    app.config.setdefault('RATE_LIMIT_REDIS_URL', None)
+    app.config.setdefault('RATE_LIMIT_MAX_KEYS', 100000)
+
+    backend = app.config['RATE_LIMIT_BACKEND']
+    if backend == 'redis' and app.config['RATE_LIMIT_REDIS_URL']:
+        import redis
+        store = RedisRateLimitStore(redis.Redis.from_url(app.config['RATE_LIMIT_REDIS_URL']))
+    elif backend in ('redis', 'local'):
+        store = LocalRateLimitStore(app.config['RATE_LIMIT_MAX_KEYS'])
+    elif backend == 'off':
+        store = None
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {backend!r}")
+
+    app.extensions['rate_limit'] = store
+    return store
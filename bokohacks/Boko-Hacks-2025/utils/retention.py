@@ -0,0 +1,156 @@
+"""Batched, resumable retention for old notes.
+
+    flask --app app notes-retention
+    flask --app app notes-retention --interval 3600
+
+Instead of one DELETE over the whole table (which holds the SQLite write
+lock until it finishes), the worker walks candidate notes in primary key
+order, NOTES_RETENTION_BATCH_SIZE at a time, deletes the expired ones by id
+and commits, then sleeps NOTES_RETENTION_PAUSE seconds so other writers
+get the lock. Candidates are found through the created_at index.
+
+Each user's window is users.note_retention_days, falling back to
+NOTES_RETENTION_DAYS; 0 keeps that user's notes forever. Progress is
+checkpointed after every batch together with the reference time the
+cutoffs were computed from, so an interrupted run resumes with the same
+cutoffs and never rescans what it already finished.
+
+Deleted notes are tombstoned for the change feed (utils.sync) and taken
+off their owners' hub summaries (utils.summary), and a completed run prunes tombstones older than SYNC_TOMBSTONE_DAYS.
+"""
+
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from sqlalchemy import delete, select
+
+from extensions import db
+from models.note import Note
+from models.retention import RetentionCheckpoint
+from models.user import User
+from utils.summary import adjust_summary
+from utils.sync import prune_tombstones, record_tombstones
+
+logger = logging.getLogger('retention')
+
+
+class NotesRetentionWorker:
+    job = 'notes'
+
+    def __init__(self, default_days=30, batch_size=500, pause=0.05, tombstone_days=None):
+        self.default_days = default_days
+        self.batch_size = batch_size
+        self.pause = pause
+        self.tombstone_days = tombstone_days
+
+    def _checkpoint(self, now):
+        checkpoint = db.session.get(RetentionCheckpoint, self.job)
+        if checkpoint is None:
+            checkpoint = RetentionCheckpoint(job=self.job, reference_time=now, last_id=0, removed=0)
+            db.session.add(checkpoint)
+            db.session.commit()
+            return checkpoint, False
+        return checkpoint, True
+
+    def _cutoffs(self, reference_time):
+        """(cutoff for users on the default window, {user_id: cutoff or None}, earliest-expiring cutoff)"""
+        def cutoff(days):
+            return reference_time - timedelta(days=days) if days and days > 0 else None
+
+        overrides = {user_id: cutoff(days) for user_id, days in db.session.execute(
+            select(User.id, User.note_retention_days).where(User.note_retention_days.isnot(None)))}
+        candidates = [c for c in [cutoff(self.default_days), *overrides.values()] if c is not None]
+        return cutoff(self.default_days), overrides, max(candidates, default=None)
+
+    def run(self, max_batches=None, now=None):
+        """Delete expired notes batch by batch; returns a report of what was done"""
+        started = time.perf_counter()
+        checkpoint, resumed = self._checkpoint(now or datetime.utcnow())
+        default_cutoff, overrides, scan_cutoff = self._cutoffs(checkpoint.reference_time)
+
+        scanned = removed = batches = 0
+        complete = scan_cutoff is None
+        while not complete:
+            rows = db.session.execute(
+                select(Note.id, Note.user_id, Note.created_at)
+                .where(Note.created_at < scan_cutoff, Note.id > checkpoint.last_id)
+                .order_by(Note.id)
+                .limit(self.batch_size)
+            ).all()
+            expired = [(note_id, user_id) for note_id, user_id, created_at in rows
+                       if (cutoff := overrides.get(user_id, default_cutoff)) is not None and created_at < cutoff]
+            if expired:
+                db.session.execute(delete(Note).where(Note.id.in_([note_id for note_id, _ in expired])),
+                                   execution_options={'synchronize_session': False})
+                record_tombstones(db.session.connection(), Note.__sync_kind__, expired)
+                for user_id, count in Counter(user_id for _, user_id in expired).items():
+                    adjust_summary(db.session.connection(), user_id, notes=-count)
+            if rows:
+                checkpoint.last_id = rows[-1].id
+            checkpoint.removed += len(expired)
+            db.session.commit()
+
+            scanned += len(rows)
+            removed += len(expired)
+            batches += 1
+            complete = len(rows) < self.batch_size
+            if not complete:
+                if max_batches and batches >= max_batches:
+                    break
+                # Let other writers take the SQLite lock between batches
+                time.sleep(self.pause)
+
+        total_removed = checkpoint.removed
+        if complete:
+            db.session.delete(checkpoint)
+            db.session.commit()
+            if self.tombstone_days:
+                prune_tombstones(self.tombstone_days)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'removed': removed,
+            'total_removed': total_removed,
+            'scanned': scanned,
+            'batches': batches,
+            'elapsed_s': round(elapsed, 3),
+            'rows_per_s': round(removed / elapsed, 1) if elapsed else 0.0,
+            'resumed': resumed,
+            'complete': complete,
+        }
+        logger.info(f"Notes retention {'finished' if complete else 'paused'}: removed {removed} of {scanned} "
+                    f"scanned in {batches} batches ({report['rows_per_s']} rows/s)", extra={'retention': report})
+        return report
+
+
+def get_retention_worker(app):
+    return NotesRetentionWorker(
+        default_days=app.config['NOTES_RETENTION_DAYS'],
+        batch_size=app.config['NOTES_RETENTION_BATCH_SIZE'],
+        pause=app.config['NOTES_RETENTION_PAUSE'],
+        tombstone_days=app.config.get('SYNC_TOMBSTONE_DAYS'),
+    )
+
+
+def init_retention(app):
+    """Retention settings plus the `flask notes-retention` command"""
+    app.config.setdefault('NOTES_RETENTION_DAYS', 30)
+    app.config.setdefault('NOTES_RETENTION_BATCH_SIZE', 500)
+    app.config.setdefault('NOTES_RETENTION_PAUSE', 0.05)
+
+    @app.cli.command('notes-retention')
+    @click.option('--interval', type=float, default=None, help='Keep running, one pass every INTERVAL seconds')
+    @click.option('--max-batches', type=int, default=None, help='Stop (resumably) after this many batches')
+    def notes_retention(interval, max_batches):
+        """Delete notes past their retention window in small batches"""
+        worker = get_retention_worker(app)
+        while True:
+            report = worker.run(max_batches=max_batches)
+            click.echo(f"removed {report['removed']} notes ({report['rows_per_s']} rows/s, "
+                       f"{report['batches']} batches, {'complete' if report['complete'] else 'resumable'})")
+            if interval is None:
+                break
+            time.sleep(interval)
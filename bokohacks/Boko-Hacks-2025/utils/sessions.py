@@ -0,0 +1,375 @@
+"""Server-side sessions: the cookie carries only a random session id.
+
+Session data lives in a store selected by SESSION_BACKEND:
+
+  * sqlite - a WAL-mode SQLite file shared by every worker on the host
+    (SESSION_SQLITE_PATH, next to the app database by default)
+  * redis  - a Redis server at SESSION_REDIS_URL, or an in-process
+    LocalRedis stand-in when no URL is set (single process only)
+  * cookie - Flask's default signed-cookie sessions
+
+A request's session is loaded from the store the first time it is read, so
+requests that never touch it cost nothing, and it is written back only when
+modified. Idle sessions expire after SESSION_IDLE_TIMEOUT; unmodified
+sessions refresh their idle clock at most once per SESSION_TOUCH_INTERVAL.
+
+Each user has a revocation epoch. A session is owned by the user logged in
+to the site (session['user']) and by the admin logged in to the admin
+panel (session['admin_username']), and remembers each owner's epoch as of
+login. It is discarded on load once either differs, so
+revoke_user_sessions() ends every user and admin session of a username
+with one write. Whenever either owner changes (a login, an admin login,
+either logout) the session gets a fresh id, so an id planted before a
+login never gains its privileges.
+"""
+
+import json
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+from flask import current_app
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+
+security_logger = logging.getLogger('security')
+
+SID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{32}$')
+
+
+def new_sid():
+    return secrets.token_urlsafe(24)
+
+
+class SQLiteSessionStore:
+    """Sessions and per-user revocation epochs in one SQLite file"""
+
+    def __init__(self, path, idle_timeout=86400, cleanup_interval=600):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.cleanup_interval = cleanup_interval
+        self._local = threading.local()
+        self._last_cleanup = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions '
+                         '(sid TEXT PRIMARY KEY, user TEXT, epoch INTEGER, data TEXT, accessed REAL, '
+                         'admin TEXT, admin_epoch INTEGER NOT NULL DEFAULT 0)')
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(sessions)')}
+            if 'admin' not in columns:
+                # Session files written before admin logins were bound to their owner
+                conn.execute('ALTER TABLE sessions ADD COLUMN admin TEXT')
+                conn.execute('ALTER TABLE sessions ADD COLUMN admin_epoch INTEGER NOT NULL DEFAULT 0')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_sessions_accessed ON sessions (accessed)')
+            conn.execute('CREATE TABLE IF NOT EXISTS session_epochs (user TEXT PRIMARY KEY, epoch INTEGER)')
+
+    def _conn(self):
+        # One connection per thread and process; connections must not cross fork()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def load(self, sid):
+        """(owners, payload, accessed) or None; owners is ((name, session epoch, current epoch), ...)"""
+        row = self._conn().execute(
+            'SELECT s.user, s.epoch, COALESCE(e.epoch, 0), s.admin, s.admin_epoch, COALESCE(a.epoch, 0), '
+            's.data, s.accessed FROM sessions s '
+            'LEFT JOIN session_epochs e ON e.user = s.user LEFT JOIN session_epochs a ON a.user = s.admin '
+            'WHERE s.sid = ? AND s.accessed >= ?',
+            (sid, time.time() - self.idle_timeout)).fetchone()
+        if row is None:
+            return None
+        return (tuple(row[0:3]), tuple(row[3:6])), row[6], row[7]
+
+    def save(self, sid, owners, payload):
+        (user, epoch), (admin, admin_epoch) = owners
+        with self._conn() as conn:
+            conn.execute('INSERT OR REPLACE INTO sessions (sid, user, epoch, admin, admin_epoch, data, accessed) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)', (sid, user, epoch, admin, admin_epoch, payload, time.time()))
+        self._maybe_expire()
+
+    def delete(self, sid):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def user_epoch(self, user):
+        row = self._conn().execute('SELECT epoch FROM session_epochs WHERE user = ?', (user,)).fetchone()
+        return row[0] if row else 0
+
+    def revoke_user(self, user):
+        with self._conn() as conn:
+            conn.execute('INSERT INTO session_epochs VALUES (?, 1) '
+                         'ON CONFLICT (user) DO UPDATE SET epoch = epoch + 1', (user,))
+
+    def expire_idle(self):
+        """Delete every session idle longer than the timeout; returns how many"""
+        with self._conn() as conn:
+            return conn.execute('DELETE FROM sessions WHERE accessed < ?',
+                                (time.time() - self.idle_timeout,)).rowcount
+
+    def _maybe_expire(self):
+        now = time.time()
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._last_cleanup = now
+            self.expire_idle()
+
+
+class LocalRedis:
+    """The handful of Redis commands the session store uses, in process memory"""
+
+    def __init__(self):
+        self._values = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key, now):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= now:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def get(self, key):
+        with self._lock:
+            return self._values[key] if self._alive(key, time.time()) else None
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._values[key] = value.encode() if isinstance(value, str) else value
+            if ex is None:
+                self._expires.pop(key, None)
+            else:
+                self._expires[key] = time.time() + ex
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._alive(key, time.time()):
+                self._expires[key] = time.time() + seconds
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._values.get(key, 0)) + 1
+            self._values[key] = str(value).encode()
+            return value
+
+    def sweep(self):
+        """Drop expired keys in one pass (a Redis server does this itself)"""
+        now = time.time()
+        with self._lock:
+            expired = [key for key, expires in self._expires.items() if expires <= now]
+            for key in expired:
+                self._values.pop(key, None)
+                self._expires.pop(key, None)
+        return len(expired)
+
+
+class RedisSessionStore:
+    """Sessions as Redis keys whose TTL is the idle timeout"""
+
+    def __init__(self, client, idle_timeout=86400, cleanup_interval=600, prefix='session:'):
+        self.client = client
+        self.idle_timeout = idle_timeout
+        self.cleanup_interval = cleanup_interval
+        self.prefix = prefix
+        self._last_cleanup = time.time()
+
+    def load(self, sid):
+        raw = self.client.get(self.prefix + sid)
+        if raw is None:
+            return None
+        user, epoch, payload, accessed, *admin = json.loads(raw)
+        owners = ((user, epoch), tuple(admin) if admin else (None, 0))
+        return tuple((name, epoch, self.user_epoch(name) if name else 0) for name, epoch in owners), payload, accessed
+
+    def save(self, sid, owners, payload):
+        (user, epoch), (admin, admin_epoch) = owners
+        self.client.set(self.prefix + sid, json.dumps([user, epoch, payload, time.time(), admin, admin_epoch]),
+                        ex=self.idle_timeout)
+        self._maybe_expire()
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def user_epoch(self, user):
+        return int(self.client.get(self.prefix + 'epoch:' + user) or 0)
+
+    def revoke_user(self, user):
+        self.client.incr(self.prefix + 'epoch:' + user)
+
+    def expire_idle(self):
+        sweep = getattr(self.client, 'sweep', None)
+        return sweep() if sweep else 0
+
+    def _maybe_expire(self):
+        now = time.time()
+        if now - self._last_cleanup >= self.cleanup_interval:
+            self._last_cleanup = now
+            self.expire_idle()
+
+
+class ServerSideSession(SessionMixin):
+    """Session dict that is fetched from the store on first use"""
+
+    def __init__(self, interface, sid=None):
+        self.interface = interface
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self.owners = ((None, 0), (None, 0))  # ((user, epoch), (admin, epoch)) as stored
+        self.last_access = 0.0
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self.accessed = True
+            self._data = self.interface.load(self)
+        return self._data
+
+    @property
+    def loaded(self):
+        return self._data is not None
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.modified = True
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.modified = True
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, touch_interval=300):
+        self.store = store
+        self.touch_interval = touch_interval
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        return ServerSideSession(self, sid if sid and SID_PATTERN.match(sid) else None)
+
+    def load(self, session):
+        if session.sid is None:
+            return {}
+        record = self.store.load(session.sid)
+        if record is None:
+            session.sid, session.new = None, True
+            return {}
+        owners, payload, accessed = record
+        if any(name and epoch != current_epoch for name, epoch, current_epoch in owners):
+            # Revoked: every session a user or admin had before their epoch moved is dead
+            self.store.delete(session.sid)
+            session.sid, session.new = None, True
+            return {}
+        session.owners = tuple((name, epoch) for name, epoch, _ in owners)
+        session.last_access = accessed
+        return self.serializer.loads(payload)
+
+    def save_session(self, app, session, response):
+        if not session.loaded:
+            return
+        response.vary.add('Cookie')
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.sid is not None and session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=self.get_cookie_secure(app),
+                                       samesite=self.get_cookie_samesite(app),
+                                       httponly=self.get_cookie_httponly(app))
+            return
+
+        names = (session.get('user'), session.get('admin_username'))
+        set_cookie = session.modified and (session.sid is None
+                                           or names != tuple(name for name, _ in session.owners))
+        if set_cookie:
+            # Any login or logout gets a fresh id (no session fixation) bound to the owners' current epochs
+            if session.sid is not None:
+                self.store.delete(session.sid)
+            session.sid = new_sid()
+            session.owners = tuple((name, self.store.user_epoch(name) if name else 0) for name in names)
+        # Unmodified sessions are only rewritten to push back their idle expiry
+        if session.modified or time.time() - session.last_access >= self.touch_interval:
+            self.store.save(session.sid, session.owners, self.serializer.dumps(dict(session)))
+
+        if set_cookie or (session.permanent and app.config['SESSION_REFRESH_EACH_REQUEST']):
+            response.set_cookie(name, session.sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+
+
+def default_sqlite_path(app):
+    """sessions.db beside the app's SQLite database, else in the instance folder"""
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    if uri.startswith('sqlite:///') and uri != 'sqlite:///:memory:':
+        db_path = uri[len('sqlite:///'):]
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(app.instance_path, db_path)
+        return os.path.join(os.path.dirname(db_path), 'sessions.db')
+    return os.path.join(app.instance_path, 'sessions.db')
+
+
+def init_sessions(app):
+    """Replace signed-cookie sessions with the configured server-side store"""
+    app.config.setdefault('SESSION_BACKEND', 'sqlite')
+    app.config.setdefault('SESSION_SQLITE_PATH', default_sqlite_path(app))
+    app.config.setdefault('SESSION_REDIS_URL', None)
+    app.config.setdefault('SESSION_IDLE_TIMEOUT', 86400)
+    app.config.setdefault('SESSION_TOUCH_INTERVAL', 300)
+    app.config.setdefault('SESSION_CLEANUP_INTERVAL', 600)
+
+    backend = app.config['SESSION_BACKEND']
+    timeouts = dict(idle_timeout=app.config['SESSION_IDLE_TIMEOUT'],
+                    cleanup_interval=app.config['SESSION_CLEANUP_INTERVAL'])
+    if backend == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+        return None
+    if backend == 'sqlite':
+        store = SQLiteSessionStore(app.config['SESSION_SQLITE_PATH'], **timeouts)
+    elif backend == 'redis':
+        if app.config['SESSION_REDIS_URL']:
+            import redis
+            client = redis.Redis.from_url(app.config['SESSION_REDIS_URL'])
+        else:
+            client = LocalRedis()
+        store = RedisSessionStore(client, **timeouts)
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND {backend!r}")
+
+    app.session_interface = ServerSideSessionInterface(store, app.config['SESSION_TOUCH_INTERVAL'])
+    return store
+
+
+def revoke_user_sessions(username):
+    """End every user and admin session of a username, wherever it is; O(1) regardless of how many there are"""
+    interface = current_app.session_interface
+    if isinstance(interface, ServerSideSessionInterface) and username:
+        interface.store.revoke_user(username)
+        security_logger.info(f"Revoked all sessions of {username!r}")
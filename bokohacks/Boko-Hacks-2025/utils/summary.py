@@ -0,0 +1,136 @@
+"""Per-user totals for the hub, maintained as writes happen.
+
+    flask --app app rebuild-summaries
+
+The hub shows how many notes and files a user has, how much storage the
+files take and their 401(k) balance. Counting those on every hub load
+means a COUNT over notes and an aggregate over files per view. Instead,
+each user has one user_summaries row that every write to notes or files
+adjusts by the amount it changed, in the same transaction. The hub then
+reads the summary row joined to the users row (which already holds funds
+and balance_401k) in a single query.
+
+ORM writes are counted by an after_flush hook. Bulk Core statements (the
+notes batch endpoint, retention) call adjust_summary() themselves once
+their statement has run. A user without a summary row yet gets one built
+from a full count the first time it is needed; `flask rebuild-summaries`
+recounts everyone, in case rows were ever changed behind the app's back.
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime
+
+import click
+from sqlalchemy import delete, event, func, insert, literal, select, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.file import File
+from models.note import Note
+from models.summary import UserSummary
+from models.user import User
+
+
+def _recount(user_ids=None):
+    """INSERT ... SELECT of fresh totals for `user_ids`, or every user"""
+    totals = select(
+        User.id,
+        select(func.count()).where(Note.user_id == User.id).scalar_subquery(),
+        select(func.count()).where(File.user_id == User.id).scalar_subquery(),
+        select(func.coalesce(func.sum(File.size), 0)).where(File.user_id == User.id).scalar_subquery(),
+        literal(datetime.utcnow()),
+    )
+    if user_ids is not None:
+        totals = totals.where(User.id.in_(user_ids))
+    return insert(UserSummary).from_select(
+        ['user_id', 'note_count', 'file_count', 'storage_bytes', 'updated_at'], totals)
+
+
+def adjust_summary(connection, user_id, notes=0, files=0, storage=0):
+    """Apply a change that has already been written; builds the row if it is missing"""
+    changed = connection.execute(
+        update(UserSummary).where(UserSummary.user_id == user_id).values(
+            note_count=UserSummary.note_count + notes,
+            file_count=UserSummary.file_count + files,
+            storage_bytes=UserSummary.storage_bytes + storage,
+            updated_at=datetime.utcnow(),
+        )
+    ).rowcount
+    if not changed:
+        # The count already includes the write being recorded
+        connection.execute(_recount([user_id]))
+
+
+def _track_changes(session, flush_context):
+    deltas = defaultdict(lambda: [0, 0, 0])
+    removed_users = []
+    for objs, sign in ((session.new, 1), (session.deleted, -1)):
+        for obj in objs:
+            if isinstance(obj, Note):
+                deltas[obj.user_id][0] += sign
+            elif isinstance(obj, File):
+                deltas[obj.user_id][1] += sign
+                deltas[obj.user_id][2] += sign * (obj.size or 0)
+            elif isinstance(obj, User):
+                if sign > 0:
+                    deltas[obj.id]
+                else:
+                    removed_users.append(obj.id)
+    if not deltas and not removed_users:
+        return
+
+    connection = session.connection()
+    for user_id, (notes, files, storage) in deltas.items():
+        if user_id not in removed_users:
+            adjust_summary(connection, user_id, notes, files, storage)
+    if removed_users:
+        connection.execute(delete(UserSummary).where(UserSummary.user_id.in_(removed_users)))
+
+
+def get_summary(username):
+    """The hub summary for `username` in one query, or None if there is no such user"""
+    query = (
+        select(User.id, User.funds, User.balance_401k, UserSummary.note_count, UserSummary.file_count,
+               UserSummary.storage_bytes, UserSummary.updated_at)
+        .outerjoin(UserSummary, UserSummary.user_id == User.id)
+        .where(User.username == username)
+    )
+    row = db.session.execute(query).first()
+    if row is None:
+        return None
+    if row.note_count is None:
+        db.session.execute(_recount([row.id]))
+        db.session.commit()
+        row = db.session.execute(query).first()
+    return {
+        'notes': row.note_count,
+        'files': row.file_count,
+        'storage_bytes': row.storage_bytes,
+        'funds': row.funds,
+        'balance_401k': row.balance_401k,
+        'updated_at': row.updated_at.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def rebuild_summaries():
+    """Recount every user from the notes and files tables; returns the number of users"""
+    # Files uploaded before sizes were recorded count as 0 bytes until measured
+    for file_id, file_path in db.session.execute(select(File.id, File.file_path).where(File.size == 0)):
+        if os.path.exists(file_path):
+            db.session.execute(update(File).where(File.id == file_id).values(size=os.path.getsize(file_path)))
+    db.session.execute(delete(UserSummary))
+    rebuilt = db.session.execute(_recount()).rowcount
+    db.session.commit()
+    return rebuilt
+
+
+def init_summary(app):
+    """Keep summaries current on every ORM flush, plus `flask rebuild-summaries`"""
+    if not event.contains(Session, 'after_flush', _track_changes):
+        event.listen(Session, 'after_flush', _track_changes)
+
+    @app.cli.command('rebuild-summaries')
+    def rebuild_summaries_command():
+        """Recount every user's hub summary from scratch"""
+        click.echo(f"rebuilt {rebuild_summaries()} user summaries")
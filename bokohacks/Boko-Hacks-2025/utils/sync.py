@@ -0,0 +1,126 @@
+"""Change feeds for notes and files.
+
+Every insert or update of a Note or File takes the next value of a single
+shared revision counter, and every delete leaves a tombstone row with its
+own revision. A client that has seen everything up to revision R asks for
+changes since R and gets back only the rows and tombstones stamped after
+it, read from the (user_id, revision) indexes.
+
+The counter is one row updated inside the writing transaction, which holds
+the database write lock until commit, so revisions become visible in
+order and a cursor never skips a row that commits later.
+
+ORM writes are stamped by a before_flush hook. Bulk Core statements (the
+notes batch endpoint, retention) call claim_revisions() and
+record_tombstones() themselves.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.sync import SyncCounter, SyncTombstone
+
+FEED_PAGE_SIZE = 500
+
+
+def claim_revisions(connection, count=1):
+    """Reserve `count` consecutive revisions; returns the first"""
+    new_revision = connection.execute(
+        update(SyncCounter).where(SyncCounter.id == 1)
+        .values(revision=SyncCounter.revision + count)
+        .returning(SyncCounter.revision)
+    ).scalar()
+    if new_revision is None:
+        # Databases built with create_all() instead of the migration have no counter row yet
+        connection.execute(insert(SyncCounter).values(id=1, revision=count, pruned_revision=0))
+        new_revision = count
+    return new_revision - count + 1
+
+
+def record_tombstones(connection, kind, deleted):
+    """Tombstone deleted rows, given as (entity_id, user_id) pairs"""
+    if not deleted:
+        return
+    first = claim_revisions(connection, len(deleted))
+    now = datetime.utcnow()
+    connection.execute(insert(SyncTombstone), [
+        {'kind': kind, 'entity_id': entity_id, 'user_id': user_id, 'revision': first + i, 'deleted_at': now}
+        for i, (entity_id, user_id) in enumerate(deleted)
+    ])
+
+
+def _stamp_revisions(session, flush_context, instances):
+    changed = [obj for obj in session.new if getattr(obj, '__sync_kind__', None)]
+    changed += [obj for obj in session.dirty
+                if getattr(obj, '__sync_kind__', None) and session.is_modified(obj, include_collections=False)]
+    deleted = [obj for obj in session.deleted if getattr(obj, '__sync_kind__', None)]
+    if not changed and not deleted:
+        return
+
+    connection = session.connection()
+    if changed:
+        first = claim_revisions(connection, len(changed))
+        for i, obj in enumerate(changed):
+            obj.revision = first + i
+    for kind in {obj.__sync_kind__ for obj in deleted}:
+        record_tombstones(connection, kind, [(obj.id, obj.user_id) for obj in deleted if obj.__sync_kind__ == kind])
+
+
+def change_feed(model, user_id, since, serialize, limit=FEED_PAGE_SIZE):
+    """Changes to a user's rows after revision `since`, oldest first
+
+    Returns {'revision', 'changes', 'has_more', 'reset'}: pass 'revision'
+    back as the next `since`. 'reset' means tombstones the client needed
+    were pruned, so it must drop its copy and start again from 0.
+    """
+    pruned = db.session.scalar(select(SyncCounter.pruned_revision).where(SyncCounter.id == 1)) or 0
+    if 0 < since < pruned:
+        return {'revision': 0, 'changes': [], 'has_more': True, 'reset': True}
+
+    rows = db.session.scalars(
+        select(model).where(model.user_id == user_id, model.revision > since)
+        .order_by(model.revision).limit(limit + 1)
+    ).all()
+    # A client starting from scratch has nothing to delete
+    tombstones = db.session.scalars(
+        select(SyncTombstone).where(SyncTombstone.kind == model.__sync_kind__, SyncTombstone.user_id == user_id,
+                                    SyncTombstone.revision > since)
+        .order_by(SyncTombstone.revision).limit(limit + 1)
+    ).all() if since else []
+
+    changes = sorted(
+        [{'op': 'upsert', 'revision': row.revision, model.__sync_kind__: serialize(row)} for row in rows]
+        + [{'op': 'delete', 'revision': t.revision, 'id': t.entity_id} for t in tombstones],
+        key=lambda change: change['revision'],
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if changes:
+        revision = changes[-1]['revision']
+    else:
+        # Nothing new: hand back the current head so an idle client's cursor keeps up
+        revision = max(since, db.session.scalar(select(SyncCounter.revision).where(SyncCounter.id == 1)) or 0)
+    return {'revision': revision, 'changes': changes, 'has_more': has_more, 'reset': False}
+
+
+def prune_tombstones(days):
+    """Drop tombstones older than `days`; clients behind them are told to reset"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    newest = db.session.scalar(select(func.max(SyncTombstone.revision)).where(SyncTombstone.deleted_at < cutoff))
+    if newest is None:
+        return 0
+    removed = db.session.execute(delete(SyncTombstone).where(SyncTombstone.revision <= newest)).rowcount
+    db.session.execute(update(SyncCounter).where(SyncCounter.id == 1, SyncCounter.pruned_revision < newest)
+                       .values(pruned_revision=newest))
+    db.session.commit()
+    return removed
+
+
+def init_sync(app):
+    """Stamp revisions and tombstones on every ORM flush"""
+    app.config.setdefault('SYNC_TOMBSTONE_DAYS', 30)
+    if not event.contains(Session, 'before_flush', _stamp_revisions):
+        event.listen(Session, 'before_flush', _stamp_revisions)
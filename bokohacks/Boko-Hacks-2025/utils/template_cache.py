@@ -0,0 +1,166 @@
+"""Jinja bytecode cache and a rendered-page cache for user-independent templates.
+
+Compiled template bytecode is written to TEMPLATE_BYTECODE_CACHE_DIR
+(jinja-bytecode in the instance folder by default), so new worker processes
+load templates without recompiling them (Jinja keys each file by a checksum
+of the template source). Jinja executes whatever it finds there, so the
+directory must not be writable by anyone else: it is created 0700 and
+refused if another user owns it or can write to it.
+
+render_cached() keeps the HTML of templates that cannot depend on the user
+in a bounded in-process LRU. A template qualifies when neither it nor any
+template it includes/extends references session, request, g or flashed
+messages; this is decided once per template from its Jinja AST. Entries are
+keyed by deploy id, static asset version, template, locale, script root and
+the render context, where the deploy id is DEPLOY_ID or a digest of every
+template source, so a deploy that changes any template never serves an old
+page. The key also serves as the page's weak ETag, so a matching
+If-None-Match is answered with 304 without rendering.
+"""
+
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+
+from flask import current_app, render_template, request
+from jinja2 import FileSystemBytecodeCache, meta, nodes
+
+from utils.metrics import REGISTRY, Counter
+
+# Template globals that make the output depend on who is asking (or, for captchas, differ on every render)
+USER_DEPENDENT_NAMES = frozenset({'session', 'request', 'g', 'get_flashed_messages', 'new_captcha_challenge'})
+
+template_cache_lookups = Counter('template_cache_lookups_total', 'Rendered template cache lookups',
+                                 ('template', 'result'))
+REGISTRY.append(template_cache_lookups)
+
+
+class TemplateCache:
+    """Bounded LRU of rendered HTML plus a memo of which templates are cacheable"""
+
+    def __init__(self, max_entries=256, deploy_id=None):
+        self.max_entries = max_entries
+        self._deploy_id = deploy_id
+        self._entries = OrderedDict()
+        self._cacheable = {}
+        self._lock = threading.Lock()
+
+    def deploy_id(self, env):
+        if self._deploy_id is None:
+            digest = hashlib.sha1()
+            for name in sorted(env.list_templates()):
+                source, _, _ = env.loader.get_source(env, name)
+                digest.update(name.encode())
+                digest.update(source.encode())
+            self._deploy_id = digest.hexdigest()[:12]
+        return self._deploy_id
+
+    def is_cacheable(self, env, name, _seen=None):
+        """True when the template (and everything it pulls in) never looks at the request or session"""
+        if name in self._cacheable:
+            return self._cacheable[name]
+        seen = _seen if _seen is not None else set()
+        if name in seen:
+            return True
+        seen.add(name)
+
+        source, _, _ = env.loader.get_source(env, name)
+        ast = env.parse(source)
+        # Every Name node, not meta.find_undeclared_variables(): that skips env.globals
+        # such as get_flashed_messages, which Flask registers on its environment
+        cacheable = not ({node.name for node in ast.find_all(nodes.Name)} & USER_DEPENDENT_NAMES)
+        for child in meta.find_referenced_templates(ast):
+            # Dynamic includes (child is None) could be anything
+            if child is None or not self.is_cacheable(env, child, seen):
+                cacheable = False
+        self._cacheable[name] = cacheable
+        return cacheable
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._cacheable.clear()
+
+
+def request_locale():
+    return request.accept_languages.best_match(current_app.config['TEMPLATE_CACHE_LOCALES']) \
+        or current_app.config['TEMPLATE_CACHE_LOCALES'][0]
+
+
+def render_cached(template_name, **context):
+    """render_template() for pages that are the same for every user; context values must be hashable"""
+    cache = current_app.extensions.get('template_cache')
+    env = current_app.jinja_env
+    # Auto-reload (debug) means templates can change under us
+    if cache is None or env.auto_reload or not cache.is_cacheable(env, template_name):
+        return render_template(template_name, **context)
+
+    manifest = current_app.extensions.get('static_manifest')
+    key = (cache.deploy_id(env), getattr(manifest, 'version', None), template_name, request_locale(),
+           request.script_root, tuple(sorted(context.items())))
+    # The key fully determines the page, so it doubles as the ETag and a match needs no render
+    etag = hashlib.sha1(repr(key).encode()).hexdigest()[:20]
+    if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(etag):
+        template_cache_lookups.inc((template_name, 'not_modified'))
+        response = current_app.response_class(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    html = cache.get(key)
+    if html is not None:
+        template_cache_lookups.inc((template_name, 'hit'))
+    else:
+        template_cache_lookups.inc((template_name, 'miss'))
+        html = render_template(template_name, **context)
+        cache.put(key, html)
+
+    response = current_app.response_class(html, mimetype='text/html')
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def _private_dir(path):
+    """Create `path` 0700, or check an existing one belongs to us and nobody else can write to it"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode):
+        raise RuntimeError(f"Template bytecode cache {path!r} is not a directory")
+    if hasattr(os, 'getuid') and (info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise RuntimeError(f"Template bytecode cache {path!r} must be owned by this user and not group/world "
+                           f"writable")
+    return path
+
+
+def init_template_cache(app):
+    """Enable the Jinja bytecode cache and the rendered-page cache"""
+    app.config.setdefault('TEMPLATE_CACHE_ENABLED', True)
+    app.config.setdefault('TEMPLATE_CACHE_MAX_ENTRIES', 256)
+    app.config.setdefault('TEMPLATE_CACHE_LOCALES', ('en',))
+    app.config.setdefault('TEMPLATE_BYTECODE_CACHE_DIR', os.environ.get(
+        'TEMPLATE_BYTECODE_CACHE_DIR', os.path.join(app.instance_path, 'jinja-bytecode')))
+    app.config.setdefault('DEPLOY_ID', os.environ.get('DEPLOY_ID'))
+
+    if app.config['TEMPLATE_BYTECODE_CACHE_DIR']:
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(_private_dir(app.config['TEMPLATE_BYTECODE_CACHE_DIR']))
+
+    cache = None
+    if app.config['TEMPLATE_CACHE_ENABLED']:
+        cache = TemplateCache(app.config['TEMPLATE_CACHE_MAX_ENTRIES'], app.config['DEPLOY_ID'])
+    app.extensions['template_cache'] = cache
+    return cache
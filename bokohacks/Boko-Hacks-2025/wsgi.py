@@ -0,0 +1,13 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+With preload_app (the default in gunicorn.conf.py) this module is imported
+once in the gunicorn master, so the templates compiled and the model loaded
+here are shared copy-on-write by every forked worker.
+"""
+
+from app import create_app, warm
+
+app = create_app()
+warm(app)